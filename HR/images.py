@@ -0,0 +1,90 @@
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Square thumbnails, edge length in pixels.
+THUMBNAIL_SIZES = {
+    'small': 64,
+    'medium': 160,
+    'large': 320,
+}
+THUMBNAIL_FORMATS = {
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True}),
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+}
+THUMBNAIL_DIR = 'thumbnails/staff'
+# Written last, so its presence means the whole set is on disk.
+_MARKER = ('large', 'webp')
+
+
+def thumbnail_name(photo_name, size, ext):
+    key = hashlib.sha1(photo_name.encode()).hexdigest()[:16]
+    return f"{THUMBNAIL_DIR}/{key}/{size}.{ext}"
+
+
+def _thumbnail_path(photo_name, size, ext):
+    return os.path.join(settings.MEDIA_ROOT, thumbnail_name(photo_name, size, ext))
+
+
+def thumbnails_ready(photo_name):
+    return bool(photo_name) and os.path.exists(_thumbnail_path(photo_name, *_MARKER))
+
+
+def thumbnail_names(photo_name):
+    """{size: {ext: media-relative name}} for a photo whose thumbnails are on disk, else None."""
+    if not thumbnails_ready(photo_name):
+        return None
+    return {
+        size: {ext: thumbnail_name(photo_name, size, ext) for ext in THUMBNAIL_FORMATS}
+        for size in THUMBNAIL_SIZES
+    }
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def generate_thumbnails(photo_name):
+    """Render every size/format of a stored photo into the on-disk thumbnail cache."""
+    with default_storage.open(photo_name, 'rb') as f:
+        image = Image.open(f)
+        # Let the JPEG decoder downscale while decoding instead of loading full resolution.
+        edge = max(THUMBNAIL_SIZES.values())
+        image.draft('RGB', (edge * 2, edge * 2))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGB')
+
+    # Largest first, each size resampled from the previous one.
+    outputs = []
+    for size, edge in sorted(THUMBNAIL_SIZES.items(), key=lambda item: -item[1]):
+        image = ImageOps.fit(image, (edge, edge), Image.LANCZOS)
+        for ext, (fmt, options) in THUMBNAIL_FORMATS.items():
+            buffer = BytesIO()
+            image.save(buffer, fmt, **options)
+            outputs.append((size, ext, buffer.getvalue()))
+
+    outputs.sort(key=lambda output: output[:2] == _MARKER)
+    for size, ext, data in outputs:
+        _write_atomic(_thumbnail_path(photo_name, size, ext), data)
+
+
+def generate_staff_thumbnails(staff_pk):
+    from .models import StaffDetails
+    photo_name = StaffDetails.objects.filter(pk=staff_pk).values_list('profile_photo', flat=True).first()
+    if photo_name and not thumbnails_ready(photo_name):
+        generate_thumbnails(photo_name)
@@ -3,6 +3,9 @@ from .models import StaffDetails, Attendance, LeaveRequest, LeaveComment, Loan,
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from datetime import datetime, date
+from django.conf import settings
+from .images import thumbnail_names
+from filestore.uploadhandlers import SNIFF_BYTES, sniff_type
 
 class CoerceDateField(serializers.DateField):
     """Custom DateField that coerces datetime to date."""
@@ -21,8 +24,15 @@ class CoerceDateField(serializers.DateField):
         return super().to_internal_value(value)
 
 def validate_pdf(file):
-    if file and not file.name.endswith('.pdf'):
+    if not file:
+        return
+    if not file.name.lower().endswith('.pdf'):
         raise ValidationError('File must be a PDF.')
+    file.seek(0)
+    header = file.read(SNIFF_BYTES)
+    file.seek(0)
+    if sniff_type(header) != 'pdf':
+        raise ValidationError('File content is not a PDF.')
 
 class StaffDetailsSerializer(serializers.ModelSerializer):
     passport_expiry = CoerceDateField()
@@ -30,6 +40,7 @@ class StaffDetailsSerializer(serializers.ModelSerializer):
     insurance_expiry = CoerceDateField()
     joining_date = CoerceDateField(read_only=True)
     visa_status = serializers.ReadOnlyField(source='visa_status_dynamic')
+    profile_photo_thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = StaffDetails
@@ -37,9 +48,24 @@ class StaffDetailsSerializer(serializers.ModelSerializer):
             'staff_id', 'staff_type', 'name', 'passport_no', 'visa_no', 'emirates_id_number',
             'designation', 'nationality', 'insurance_number', 'email',
             'passport_expiry', 'visa_expiry', 'salary', 'emergency_contact',
-            'insurance_expiry', 'contact_number', 'profile_photo', 'offer_letter',
+            'insurance_expiry', 'contact_number', 'profile_photo', 'profile_photo_thumbnails', 'offer_letter',
             'home_address', 'uae_address', 'joining_date', 'visa_status'
         ]
+        extra_kwargs = {'offer_letter': {'validators': [validate_pdf]}}
+
+    def get_profile_photo_thumbnails(self, obj):
+        """URLs by size and format, or None until the background worker has built them."""
+        names = thumbnail_names(obj.profile_photo.name) if obj.profile_photo else None
+        if names is None:
+            return None
+        request = self.context.get('request')
+        def build_url(name):
+            url = settings.MEDIA_URL + name
+            return request.build_absolute_uri(url) if request else url
+        return {
+            size: {ext: build_url(name) for ext, name in formats.items()}
+            for size, formats in names.items()
+        }
 
     def validate(self, data):
         
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from backend.tasks import enqueue
+from .images import generate_staff_thumbnails, thumbnails_ready
+from .models import StaffDetails
+
+
+@receiver(post_save, sender=StaffDetails)
+def queue_profile_photo_thumbnails(sender, instance, **kwargs):
+    """Build thumbnails for a new profile photo on the background queue."""
+    if instance.profile_photo and not thumbnails_ready(instance.profile_photo.name):
+        enqueue(generate_staff_thumbnails, instance.pk)
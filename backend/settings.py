@@ -47,6 +47,8 @@ INSTALLED_APPS = [
     'authapp',
     'HR',
     'inventory',
+    'filestore',
+    'search',
 ]
 
 MIDDLEWARE = [
@@ -91,6 +93,24 @@ DATABASES = {
     }
 }
 
+# 'default' holds per-process results (product autocomplete) in local memory. 'shared' holds
+# only the small version keys that make every worker process drop its category, autocomplete
+# and scan caches, so it must be seen by all of them: production runs several workers and
+# requires Redis, set through CACHE_REDIS_URL. Without it the database cache is used, whose
+# table the filestore migrations create; that suits a single development server.
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', '')
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': (
+        {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_REDIS_URL}
+        if CACHE_REDIS_URL else
+        {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'django_cache'}
+    ),
+}
+# Longest a process goes without re-reading a shared version key, i.e. how long a change
+# made through another worker can take to show in this one's cached categories and autocomplete.
+CACHE_VERSION_CHECK_SECONDS = int(os.getenv('CACHE_VERSION_CHECK_SECONDS', 5))
+
 
 
 
@@ -162,9 +182,59 @@ CORS_ALLOWED_ORIGINS = [
     'https://wantik-frontend-kb.vercel.app', 
 ]
 
+# VAT applied to new sales orders; each order stores the rate it was priced with.
+SALES_VAT_PERCENTAGE = os.getenv('SALES_VAT_PERCENTAGE', '5.00')
+# VAT suggested for quotes that apply VAT without giving a rate.
+QUOTE_DEFAULT_VAT_PERCENTAGE = os.getenv('QUOTE_DEFAULT_VAT_PERCENTAGE', '5.00')
+
+# How long a product autocomplete result is cached; product saves invalidate it sooner.
+INVENTORY_AUTOCOMPLETE_CACHE_SECONDS = 60
+# Scanned codes each process keeps resolved, and for how long; stock changes invalidate them sooner.
+INVENTORY_SCAN_CACHE_SIZE = 2048
+INVENTORY_SCAN_CACHE_SECONDS = 300
+# Longest a process keeps its category tree; category saves and deletes invalidate it sooner.
+INVENTORY_CATEGORY_CACHE_SECONDS = 300
+# Days of removal history used for product daily usage by `compute_reorder_points`.
+INVENTORY_USAGE_WINDOW_DAYS = int(os.getenv('INVENTORY_USAGE_WINDOW_DAYS', 90))
+# Weeks of removal history used by `compute_forecasts`, and processes it may fit on.
+INVENTORY_FORECAST_WEEKS = int(os.getenv('INVENTORY_FORECAST_WEEKS', 104))
+INVENTORY_FORECAST_WORKERS = int(os.getenv('INVENTORY_FORECAST_WORKERS', 1))
+# Comma-separated addresses that receive the low-stock digest.
+INVENTORY_ALERT_RECIPIENTS = [email for email in os.getenv('INVENTORY_ALERT_RECIPIENTS', '').split(',') if email]
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+FILE_UPLOAD_HANDLERS = [
+    'filestore.uploadhandlers.ValidatingUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+UPLOAD_MAX_REQUEST_SIZE = 25 * 1024 * 1024
+# Per form field: maximum size in bytes and allowed types (see filestore.uploadhandlers.sniff_type).
+UPLOAD_FIELD_RULES = {
+    'license_file': {'max_size': 10 * 1024 * 1024, 'types': ['pdf', 'png', 'jpeg']},
+    'offer_letter': {'max_size': 10 * 1024 * 1024, 'types': ['pdf']},
+    'profile_photo': {'max_size': 5 * 1024 * 1024, 'types': ['png', 'jpeg', 'webp', 'gif']},
+}
+UPLOAD_DEFAULT_RULE = {'max_size': 10 * 1024 * 1024, 'types': None}
+
+STORAGES = {
+    'default': {
+        # Uploads are stored once per distinct content under media/blobs/.
+        'BACKEND': 'filestore.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+# File names matching this are content-addressed and served with a long-lived immutable cache.
+MEDIA_IMMUTABLE_NAME_PATTERN = r'^[0-9a-f]{64}(\.[A-Za-z0-9]+)?$'
+# 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache) hands media downloads to the web server.
+MEDIA_ACCEL_REDIRECT = os.getenv('MEDIA_ACCEL_REDIRECT', '')
+# nginx `internal` location aliased to MEDIA_ROOT, used with X-Accel-Redirect.
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
@@ -175,4 +245,8 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('EMAIL_HOST_USER')
 
-STATIC_ROOT = BASE_DIR / "staticfiles"
\ No newline at end of file
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# Worker threads for backend.tasks.enqueue (PDF rendering and other deferred work).
+BACKGROUND_TASK_WORKERS = int(os.getenv('BACKGROUND_TASK_WORKERS', 2))
+BACKGROUND_TASKS_EAGER = False
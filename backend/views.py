@@ -0,0 +1,135 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, quote_etag
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """Files are returned as-is, so never reject a request over its Accept header."""
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
+
+
+def _stream_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _parse_range(header, size):
+    """Return (start, end) for a single-range `Range` header, None to ignore it, or False if unsatisfiable."""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+class MediaFileView(APIView):
+    """
+    Serve files under MEDIA_ROOT to authenticated users.
+
+    Responses carry an ETag and Last-Modified, honour If-None-Match and single
+    byte ranges, and are streamed in chunks. Content-addressed names (see
+    MEDIA_IMMUTABLE_NAME_PATTERN) are cached for a year. When MEDIA_ACCEL_REDIRECT
+    is set the body is left to nginx (X-Accel-Redirect) or Apache (X-Sendfile).
+    """
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = IgnoreClientContentNegotiation
+
+    def get(self, request, path):
+        try:
+            full_path = safe_join(settings.MEDIA_ROOT, path)
+        except SuspiciousFileOperation:
+            raise Http404("File not found.")
+        if not os.path.isfile(full_path):
+            raise Http404("File not found.")
+
+        stat = os.stat(full_path)
+        basename = os.path.basename(full_path)
+        immutable = re.match(settings.MEDIA_IMMUTABLE_NAME_PATTERN, basename) is not None
+        etag = quote_etag(basename.split('.')[0] if immutable else f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+        headers = {
+            'ETag': etag,
+            'Last-Modified': http_date(stat.st_mtime),
+            'Cache-Control': 'private, max-age=31536000, immutable' if immutable else 'private, no-cache',
+        }
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+            response = HttpResponseNotModified()
+            for key, value in headers.items():
+                response[key] = value
+            return response
+
+        content_type, encoding = mimetypes.guess_type(full_path)
+        content_type = content_type or 'application/octet-stream'
+
+        accel = (settings.MEDIA_ACCEL_REDIRECT or '').lower()
+        if accel:
+            response = HttpResponse(content_type=content_type)
+            if accel == 'x-sendfile':
+                response['X-Sendfile'] = full_path
+            else:
+                response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + path.lstrip('/')
+            for key, value in headers.items():
+                response[key] = value
+            return response
+
+        byte_range = None
+        range_header = request.headers.get('Range')
+        if_range = request.headers.get('If-Range')
+        if range_header and (not if_range or if_range.strip() == etag):
+            byte_range = _parse_range(range_header, stat.st_size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f"bytes */{stat.st_size}"
+            return response
+
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(_stream_range(full_path, start, length), status=206, content_type=content_type)
+            response['Content-Length'] = str(length)
+            response['Content-Range'] = f"bytes {start}-{end}/{stat.st_size}"
+        else:
+            response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Accept-Ranges'] = 'bytes'
+        for key, value in headers.items():
+            response[key] = value
+        return response
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from filestore.sweep import recount_references, sweep_orphans
+
+
+class Command(BaseCommand):
+    help = "Recount blob references and delete blobs nothing points at any more. Run periodically from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-minutes', type=int, default=60,
+                            help="Only collect blobs unreferenced for at least this long.")
+        parser.add_argument('--no-recount', action='store_true',
+                            help="Trust the stored reference counts instead of recounting file fields.")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if not options['no_recount'] and not options['dry_run']:
+            changed = recount_references()
+            self.stdout.write(f"Corrected {changed} reference counts.")
+        removed = sweep_orphans(timedelta(minutes=options['grace_minutes']), dry_run=options['dry_run'])
+        verb = "Would remove" if options['dry_run'] else "Removed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(removed)} orphaned blobs."))
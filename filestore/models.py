@@ -0,0 +1,47 @@
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+class Blob(models.Model):
+    """One stored file body, keyed by its SHA-256, shared by every upload with the same content."""
+    digest = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255)
+    size = models.BigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_on = models.DateTimeField(default=timezone.now)
+    updated_on = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_on'], name='filestore_blob_orphan_idx'),
+        ]
+
+    @classmethod
+    def acquire(cls, digest, name, size):
+        """
+        Add a reference to the blob, creating its row on first upload. Returns
+        the blob's stored name, which wins over `name` when the same content
+        was first uploaded under another extension.
+        """
+        now = timezone.now()
+        blobs = cls.objects.filter(digest=digest)
+        if blobs.update(ref_count=F('ref_count') + 1, updated_on=now):
+            return blobs.values_list('name', flat=True).get()
+        try:
+            with transaction.atomic():
+                cls.objects.create(digest=digest, name=name, size=size, ref_count=1, created_on=now, updated_on=now)
+            return name
+        except IntegrityError:
+            blobs.update(ref_count=F('ref_count') + 1, updated_on=now)
+            return blobs.values_list('name', flat=True).get()
+
+    @classmethod
+    def release(cls, name):
+        """Drop a reference. The file itself is only removed by the orphan sweep."""
+        return cls.objects.filter(name=name, ref_count__gt=0).update(
+            ref_count=F('ref_count') - 1, updated_on=timezone.now()
+        )
@@ -0,0 +1,80 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_DIR = 'blobs'
+TMP_DIR = '.tmp'
+
+
+def blob_name(digest, ext=''):
+    return f"{BLOB_DIR}/{digest[:2]}/{digest}{ext}"
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(BLOB_DIR + '/')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that keeps every upload as blobs/<aa>/<sha256><ext>.
+
+    Identical uploads share one file and one filestore.Blob row whose
+    ref_count tracks how many saves point at it. Bodies are written to a
+    temporary file and moved into place with an atomic rename, so a reader
+    never sees a partial file even when the same content is uploaded
+    concurrently. delete() only drops a reference; unreferenced blobs are
+    removed by the `sweep_blobs` command.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save, so the
+        # usual "append a random suffix" collision check is not needed.
+        return name
+
+    def _save(self, name, content):
+        from .models import Blob
+
+        tmp_dir = self.path(TMP_DIR)
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            with os.fdopen(fd, 'wb') as tmp:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+
+            # Take the reference before the file is in place so a concurrent
+            # sweep cannot collect the blob between the rename and the count.
+            # Content already stored keeps its first name, whatever this upload's extension.
+            final_name = Blob.acquire(
+                digest.hexdigest(), blob_name(digest.hexdigest(), os.path.splitext(name)[1].lower()), size,
+            )
+
+            final_path = self.path(final_name)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return final_name
+
+    def delete(self, name):
+        if not is_blob_name(name):
+            # Files stored before the content-addressed layout are not shared.
+            return super().delete(name)
+        from .models import Blob
+        Blob.release(name)
@@ -0,0 +1,115 @@
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.db import models
+from django.utils import timezone
+
+from .models import Blob
+from .storage import BLOB_DIR, TMP_DIR, ContentAddressedStorage
+
+
+def _blob_file_fields():
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField) and isinstance(field.storage, ContentAddressedStorage):
+                yield model, field
+
+
+def recount_references():
+    """Set every Blob.ref_count to the number of file fields that actually point at it."""
+    counts = Counter()
+    for model, field in _blob_file_fields():
+        names = model._default_manager.filter(**{f'{field.name}__startswith': BLOB_DIR + '/'}).values_list(field.name, flat=True)
+        counts.update(names.iterator())
+
+    changed = []
+    for blob in Blob.objects.only('id', 'name', 'ref_count').iterator(chunk_size=2000):
+        if blob.ref_count != counts[blob.name]:
+            blob.ref_count = counts[blob.name]
+            changed.append(blob)
+    Blob.objects.bulk_update(changed, ['ref_count'], batch_size=500)
+    return len(changed)
+
+
+def _is_referenced(name):
+    return any(
+        model._default_manager.filter(**{field.name: name}).exists()
+        for model, field in _blob_file_fields()
+    )
+
+
+def _stray_blob_files(storage, stale_before):
+    """
+    Names of files under blobs/ older than `stale_before` with no Blob row: left
+    behind when the upload that wrote them rolled back its row. Files still named
+    by a file field (e.g. stored under a second extension) are kept.
+    """
+    blob_dir = storage.path(BLOB_DIR)
+    if not os.path.isdir(blob_dir):
+        return []
+    candidates = {}
+    for shard in os.scandir(blob_dir):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            # `.sweep` files are being collected by a sweep right now.
+            if entry.is_file() and not entry.name.endswith('.sweep') and entry.stat().st_mtime < stale_before:
+                candidates[f"{BLOB_DIR}/{shard.name}/{entry.name}"] = entry.path
+    known = set()
+    names = list(candidates)
+    for start in range(0, len(names), 500):
+        known.update(Blob.objects.filter(name__in=names[start:start + 500]).values_list('name', flat=True))
+    return [
+        (name, candidates[name]) for name in names
+        if name not in known and not _is_referenced(name)
+    ]
+
+
+def sweep_orphans(grace=timedelta(hours=1), dry_run=False):
+    """
+    Delete blobs that have had no references for longer than `grace`, and
+    files under blobs/ that lost their row to a rolled-back upload.
+
+    The file is moved aside before its row is deleted and put back if an
+    upload re-acquired the blob in between, so a concurrent save never ends
+    up pointing at a missing file.
+    """
+    storage = default_storage if isinstance(default_storage, ContentAddressedStorage) else ContentAddressedStorage()
+    cutoff = timezone.now() - grace
+    removed = []
+    for blob in Blob.objects.filter(ref_count=0, updated_on__lt=cutoff).iterator():
+        if dry_run:
+            removed.append(blob.name)
+            continue
+        path = storage.path(blob.name)
+        trash_path = f"{path}.sweep"
+        moved = False
+        if os.path.exists(path):
+            os.replace(path, trash_path)
+            moved = True
+        deleted, _ = Blob.objects.filter(pk=blob.pk, ref_count=0, updated_on__lt=cutoff).delete()
+        if moved:
+            if deleted or os.path.exists(path):
+                os.remove(trash_path)
+            else:
+                os.replace(trash_path, path)
+        if deleted:
+            removed.append(blob.name)
+
+    stale_before = time.time() - grace.total_seconds()
+    for name, path in _stray_blob_files(storage, stale_before):
+        if not dry_run:
+            os.remove(path)
+        removed.append(name)
+
+    tmp_dir = storage.path(TMP_DIR)
+    if not dry_run and os.path.isdir(tmp_dir):
+        # Leftovers from uploads that died mid-write.
+        for entry in os.scandir(tmp_dir):
+            if entry.is_file() and entry.stat().st_mtime < stale_before:
+                os.remove(entry.path)
+    return removed
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+
+# Enough leading bytes to recognise every type below.
+SNIFF_BYTES = 16
+
+
+def sniff_type(header):
+    """Identify a file from its leading bytes. Returns a short type name or None."""
+    if header.startswith(b'%PDF-'):
+        return 'pdf'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if header.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class UploadRejected(MultiPartParserError):
+    """Raised mid-stream; DRF's multipart parser turns it into a 400 response."""
+
+
+class ValidatingUploadHandler(FileUploadHandler):
+    """
+    First handler in FILE_UPLOAD_HANDLERS. Enforces UPLOAD_FIELD_RULES while
+    the body is still arriving: the request is refused from its Content-Length
+    when possible, and each file is checked for size and magic bytes chunk by
+    chunk, so an oversized or mislabeled upload is aborted before the
+    following handlers spool it to memory or disk.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length and content_length > settings.UPLOAD_MAX_REQUEST_SIZE:
+            raise UploadRejected(
+                f"Request body ({content_length} bytes) exceeds the {settings.UPLOAD_MAX_REQUEST_SIZE} byte limit."
+            )
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.rule = settings.UPLOAD_FIELD_RULES.get(field_name, settings.UPLOAD_DEFAULT_RULE)
+        self.received = 0
+        self.header = b''
+        if self.content_length and self.content_length > self.rule['max_size']:
+            self._reject_size()
+
+    def _reject_size(self):
+        raise UploadRejected(f"{self.field_name}: file exceeds the {self.rule['max_size']} byte limit.")
+
+    def _check_type(self):
+        allowed = self.rule.get('types')
+        if allowed and sniff_type(self.header) not in allowed:
+            raise UploadRejected(f"{self.field_name}: file must be one of {', '.join(allowed)}.")
+        self.header = None
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.rule['max_size']:
+            self._reject_size()
+        if self.header is not None:
+            self.header += raw_data[:SNIFF_BYTES - len(self.header)]
+            if len(self.header) >= SNIFF_BYTES:
+                self._check_type()
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.header is not None:
+            self._check_type()
+        # Let the next handler build the uploaded file object.
+        return None
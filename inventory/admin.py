@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Category, SubCategory, Product, RemovalRequest, RemovalRequestItem
+from .models import (
+    Category, SubCategory, Product, RemovalRequest, RemovalRequestItem, StockReservation, CostLayer, CostConsumption,
+    Location, LocationStock, StockTransfer, StockMovement, StockSnapshot, ProductForecast
+)
 # Register your models here.
 admin.site.register([
     # Register your models here.
@@ -8,4 +11,13 @@ admin.site.register([
     Product,
     RemovalRequest,
     RemovalRequestItem,
+    StockReservation,
+    CostLayer,
+    CostConsumption,
+    Location,
+    LocationStock,
+    StockTransfer,
+    StockMovement,
+    StockSnapshot,
+    ProductForecast,
 ])
\ No newline at end of file
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Product
+from .versions import SharedVersion
+
+AUTOCOMPLETE_FIELDS = ('id', 'product_id', 'product_name', 'part_no', 'stock_count')
+MAX_LIMIT = 20
+# Substring matching scans the table, so it is only tried for longer terms with no prefix hit.
+MIN_CONTAINS_LENGTH = 3
+VERSION_KEY = 'inventory:autocomplete:version'
+# Upper bound for a prefix range: every string starting with the prefix sorts below prefix + this.
+PREFIX_END = '\U0010ffff'
+
+
+# Results are cached per process (the local 'default' cache) under this shared version.
+_version = SharedVersion(VERSION_KEY)
+
+
+def invalidate():
+    """
+    Make every cached autocomplete result stale by moving to a new cache key version.
+    Inside a transaction, call it through transaction.on_commit, so a concurrent search
+    cannot cache the old rows again under the new version before the change is visible.
+    """
+    _version.bump()
+
+
+def _prefix(field, text):
+    # A range instead of LIKE so the (type, lower(field)) indexes are used on every backend.
+    return Q(**{f'{field}__gte': text, f'{field}__lt': text + PREFIX_END})
+
+
+def _search(product_type, text, limit):
+    products = Product.objects.filter(type=product_type).alias(
+        name_key=Lower('product_name'), part_key=Lower('part_no'),
+    )
+    rows = list(
+        products.filter(_prefix('part_key', text) | _prefix('product_id', text) | _prefix('name_key', text))
+        .order_by('product_name', 'pk')
+        .values(*AUTOCOMPLETE_FIELDS)[:limit]
+    )
+    if not rows and len(text) >= MIN_CONTAINS_LENGTH:
+        rows = list(
+            products.filter(Q(part_no__icontains=text) | Q(product_name__icontains=text))
+            .order_by('product_name', 'pk')
+            .values(*AUTOCOMPLETE_FIELDS)[:limit]
+        )
+    return rows
+
+
+def autocomplete(product_type, text, limit=10):
+    """Products of `product_type` whose part number, product id or name starts with `text`, cached per prefix."""
+    text = text.strip().lower()
+    limit = max(1, min(limit, MAX_LIMIT))
+    if not text:
+        return []
+    key = f'inventory:autocomplete:{_version.get()}:{product_type}:{limit}:{text}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = _search(product_type, text, limit)
+        cache.set(key, rows, settings.INVENTORY_AUTOCOMPLETE_CACHE_SECONDS)
+    return rows
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_autocomplete(sender, **kwargs):
+    transaction.on_commit(invalidate)
@@ -0,0 +1,97 @@
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Category, Product, SubCategory
+from .versions import SharedVersion
+
+VERSION_KEY = 'inventory:category_tree:version'
+PATH_SEPARATOR = ' / '
+
+# The whole category tree as rendered by CategorySerializer/SubCategorySerializer,
+# kept per process and swapped out whole whenever the shared version moves on.
+_tree = None
+_version = SharedVersion(VERSION_KEY)
+
+
+class CategoryTree:
+    def __init__(self, version):
+        from .serializers import CategorySerializer, SubCategorySerializer
+        self.version = version
+        self.built_at = time.monotonic()
+        self.categories = {row['id']: dict(row) for row in CategorySerializer(Category.objects.order_by('pk'), many=True).data}
+        self.subcategories = {}
+        for row in SubCategorySerializer(SubCategory.objects.select_related('category').order_by('pk'), many=True).data:
+            row = dict(row)
+            # Share the category dicts rather than holding a copy per subcategory.
+            row['category'] = self.categories[row['category']['id']]
+            self.subcategories[row['id']] = row
+
+
+def invalidate():
+    """Make every process rebuild its category tree on next use. Call it once the change is committed."""
+    _version.bump()
+
+
+def category_tree():
+    """
+    The cached tree, rebuilt (two queries) when its version is stale or it has outlived its TTL.
+    Serializers fetch it once per response rather than once per row.
+    """
+    global _tree
+    version = _version.get()
+    tree = _tree
+    if tree is None or tree.version != version or time.monotonic() - tree.built_at > settings.INVENTORY_CATEGORY_CACHE_SECONDS:
+        tree = _tree = CategoryTree(version)
+    return tree
+
+
+def category_path(category_id, subcategory_id):
+    """
+    'Category / Subcategory' for a product. Read from the database rather than the cached
+    tree, which can lag a change made through another process or earlier in this transaction.
+    """
+    parts = [
+        Category.objects.filter(pk=category_id).values_list('name', flat=True).first() if category_id else None,
+        SubCategory.objects.filter(pk=subcategory_id).values_list('name', flat=True).first() if subcategory_id else None,
+    ]
+    return PATH_SEPARATOR.join(part for part in parts if part)
+
+
+def _refresh_paths(products):
+    pairs = products.order_by().values_list('category_id', 'subcategory_id').distinct()
+    for category_id, subcategory_id in list(pairs):
+        products.filter(category_id=category_id, subcategory_id=subcategory_id).update(
+            category_path=category_path(category_id, subcategory_id),
+        )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+def refresh_category_paths(sender, instance, created, **kwargs):
+    transaction.on_commit(invalidate)
+    if not created:
+        # A rename changes the stored path of every product under it.
+        field = 'category' if sender is Category else 'subcategory'
+        _refresh_paths(Product.objects.filter(**{field: instance}))
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=SubCategory)
+def collect_category_products(sender, instance, **kwargs):
+    # The delete sets the products' foreign key to NULL with an UPDATE that sends no signals,
+    # so note them now and refresh their stored paths once the row is gone.
+    field = 'category' if sender is Category else 'subcategory'
+    instance._product_ids = list(Product.objects.filter(**{field: instance}).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+def invalidate_category_tree(sender, instance, **kwargs):
+    transaction.on_commit(invalidate)
+    product_ids = getattr(instance, '_product_ids', None)
+    if product_ids:
+        _refresh_paths(Product.objects.filter(pk__in=product_ids))
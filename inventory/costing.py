@@ -0,0 +1,270 @@
+import heapq
+from collections import deque
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+
+from .models import CostConsumption, CostLayer, Product, RemovalRequestItem, StockHistory
+
+COST_PLACES = Decimal('0.0001')
+CENT = Decimal('0.01')
+ZERO = Decimal('0')
+BATCH_SIZE = 1000
+
+
+def _cost(value):
+    return Decimal(value).quantize(COST_PLACES, rounding=ROUND_HALF_UP)
+
+
+def moving_average(on_hand, average_cost, quantity, unit_cost):
+    """The weighted-average unit cost after receiving `quantity` at `unit_cost`."""
+    on_hand = max(on_hand, 0)
+    total = on_hand + quantity
+    if total <= 0:
+        return _cost(unit_cost)
+    return _cost((Decimal(average_cost) * on_hand + Decimal(unit_cost) * quantity) / total)
+
+
+def take_from_layers(layers, quantity):
+    """
+    Draw `quantity` from `layers` (open layers, oldest first), lowering their
+    `remaining` in place. Returns [(layer, quantity taken)] and the shortfall.
+    """
+    taken = []
+    for layer in layers:
+        if quantity <= 0:
+            break
+        amount = min(layer.remaining, quantity)
+        if amount <= 0:
+            continue
+        layer.remaining -= amount
+        quantity -= amount
+        taken.append((layer, amount))
+    return taken, quantity
+
+
+def _consumptions(item, product, taken, shortfall, consumed_on):
+    use_layer_cost = product.costing_method == 'fifo'
+    rows = [
+        CostConsumption(
+            removal_item=item, product=product, layer=layer, quantity=amount, consumed_on=consumed_on,
+            unit_cost=layer.unit_cost if use_layer_cost else product.average_cost,
+        )
+        for layer, amount in taken
+    ]
+    if shortfall:
+        # Stock that predates cost tracking has no layer; cost it at the running average.
+        rows.append(CostConsumption(
+            removal_item=item, product=product, layer=None, quantity=shortfall,
+            unit_cost=product.average_cost, consumed_on=consumed_on,
+        ))
+    return rows
+
+
+@transaction.atomic
+def receive(stock_history, on_hand_before):
+    """Open a cost layer for a stock addition and fold it into the product's average cost."""
+    product = Product.objects.select_for_update().get(pk=stock_history.product_id)
+    CostLayer.objects.create(
+        product=product, stock_history=stock_history, received_on=stock_history.added_on,
+        quantity=stock_history.quantity_added, remaining=stock_history.quantity_added,
+        unit_cost=stock_history.unit_cost,
+    )
+    Product.objects.filter(pk=product.pk).update(average_cost=moving_average(
+        on_hand_before, product.average_cost, stock_history.quantity_added, stock_history.unit_cost,
+    ))
+
+
+@transaction.atomic
+def consume(removal_request, consumed_on):
+    """Consume cost layers, oldest first, for every line of a removal request being deducted."""
+    consumptions = []
+    for item in removal_request.items.select_related('product'):
+        layers = list(
+            CostLayer.objects.select_for_update()
+            .filter(product_id=item.product_id, remaining__gt=0)
+            .order_by('received_on', 'id')
+        )
+        taken, shortfall = take_from_layers(layers, item.quantity)
+        CostLayer.objects.bulk_update([layer for layer, _ in taken], ['remaining'])
+        consumptions += _consumptions(item, item.product, taken, shortfall, consumed_on)
+    CostConsumption.objects.bulk_create(consumptions)
+    return consumptions
+
+
+def _value(quantity_field, cost_field):
+    return Sum(ExpressionWrapper(F(quantity_field) * F(cost_field), output_field=DecimalField(max_digits=20, decimal_places=4)))
+
+
+def _rows(rows, type_field, category_field):
+    return [
+        {
+            'type': row[type_field],
+            'category': row[category_field],
+            'quantity': row['quantity'] or 0,
+            'value': Decimal(row['value'] or 0).quantize(CENT, rounding=ROUND_HALF_UP),
+        }
+        for row in rows
+    ]
+
+
+def valuation_report():
+    """
+    Stock value per product type and category: FIFO products valued from
+    their open layers, weighted-average products at stock x average cost.
+    """
+    fifo = (
+        CostLayer.objects.filter(remaining__gt=0, product__costing_method='fifo')
+        .values('product__type', 'product__category__name').order_by()
+        .annotate(quantity=Sum('remaining'), value=_value('remaining', 'unit_cost'))
+    )
+    average = (
+        Product.objects.filter(costing_method='average', stock_count__gt=0)
+        .values('type', 'category__name').order_by()
+        .annotate(quantity=Sum('stock_count'), value=_value('stock_count', 'average_cost'))
+    )
+    totals = {}
+    for row in _rows(fifo, 'product__type', 'product__category__name') + _rows(average, 'type', 'category__name'):
+        key = (row['type'], row['category'])
+        if key in totals:
+            totals[key]['quantity'] += row['quantity']
+            totals[key]['value'] += row['value']
+        else:
+            totals[key] = row
+    return sorted(totals.values(), key=lambda row: (row['type'] or '', row['category'] or ''))
+
+
+def write_off_report(start=None, end=None):
+    """Cost of deadstock removals per product type and category, between two dates inclusive."""
+    consumptions = CostConsumption.objects.filter(removal_item__request__removal_type='deadstock')
+    if start:
+        consumptions = consumptions.filter(consumed_on__date__gte=start)
+    if end:
+        consumptions = consumptions.filter(consumed_on__date__lte=end)
+    rows = (
+        consumptions.values('product__type', 'product__category__name')
+        .order_by('product__type', 'product__category__name')
+        # Value first: once `quantity` is annotated, F('quantity') would mean the sum.
+        .annotate(value=_value('quantity', 'unit_cost'), quantity=Sum('quantity'))
+    )
+    return _rows(rows, 'product__type', 'product__category__name')
+
+
+class _Revaluation:
+    """
+    Replays stock additions and deducted removals in date order. Only each
+    product's open layers and running average are held in memory; layers,
+    consumptions and products are written in batches as the stream goes.
+    """
+
+    def __init__(self):
+        self.open_layers = {}
+        self.on_hand = {}
+        self.average = {}
+        self.methods = dict(Product.objects.values_list('pk', 'costing_method').iterator(chunk_size=BATCH_SIZE))
+        self.new_layers, self.dirty_layers, self.consumptions = [], {}, []
+        self.events = 0
+
+    def flush(self, layers_only=False):
+        if self.new_layers:
+            CostLayer.objects.bulk_create(self.new_layers, batch_size=BATCH_SIZE)
+            self.new_layers = []
+        if layers_only:
+            return
+        if self.dirty_layers:
+            CostLayer.objects.bulk_update(list(self.dirty_layers.values()), ['remaining'], batch_size=BATCH_SIZE)
+            self.dirty_layers = {}
+        if self.consumptions:
+            CostConsumption.objects.bulk_create(self.consumptions, batch_size=BATCH_SIZE)
+            self.consumptions = []
+
+    def receive(self, product_id, quantity, unit_cost, received_on, stock_history_id=None):
+        layer = CostLayer(
+            product_id=product_id, stock_history_id=stock_history_id, received_on=received_on,
+            quantity=quantity, remaining=quantity, unit_cost=unit_cost,
+        )
+        self.new_layers.append(layer)
+        self.open_layers.setdefault(product_id, deque()).append(layer)
+        on_hand = self.on_hand.get(product_id, 0)
+        self.average[product_id] = moving_average(on_hand, self.average.get(product_id, ZERO), quantity, unit_cost)
+        self.on_hand[product_id] = on_hand + quantity
+
+    def consume(self, item_id, product_id, quantity, consumed_on):
+        layers = self.open_layers.get(product_id, deque())
+        if any(layer.pk is None for layer in layers):
+            # Consumptions point at layers, so the layers need their ids first.
+            self.flush(layers_only=True)
+        taken, shortfall = take_from_layers(layers, quantity)
+        while layers and layers[0].remaining == 0:
+            layers.popleft()
+        for layer, _ in taken:
+            self.dirty_layers[layer.pk] = layer
+        product = Product(pk=product_id, costing_method=self.methods.get(product_id, 'fifo'),
+                          average_cost=self.average.get(product_id, ZERO))
+        item = RemovalRequestItem(pk=item_id)
+        self.consumptions += _consumptions(item, product, taken, shortfall, consumed_on)
+        self.on_hand[product_id] = self.on_hand.get(product_id, 0) - quantity
+
+    def run(self):
+        receipts = (
+            (row[1], 0, row[0], row)
+            for row in StockHistory.objects.order_by('added_on', 'pk')
+            .values_list('pk', 'added_on', 'product_id', 'quantity_added', 'unit_cost')
+            .iterator(chunk_size=BATCH_SIZE)
+        )
+        removals = (
+            (row[1], 1, row[0], row)
+            for row in RemovalRequestItem.objects.filter(request__stock_deducted=True)
+            .order_by('request__stock_deducted_on', 'pk')
+            .values_list('pk', 'request__stock_deducted_on', 'product_id', 'quantity')
+            .iterator(chunk_size=BATCH_SIZE)
+        )
+        # Same timestamp: receipts before removals.
+        for _, kind, _, row in heapq.merge(receipts, removals):
+            if kind == 0:
+                pk, added_on, product_id, quantity, unit_cost = row
+                self.receive(product_id, quantity, unit_cost, added_on, stock_history_id=pk)
+            else:
+                pk, deducted_on, product_id, quantity = row
+                self.consume(pk, product_id, quantity, deducted_on)
+            self.events += 1
+            if self.events % BATCH_SIZE == 0:
+                self.flush()
+        self.flush()
+        self.reconcile()
+
+    def reconcile(self):
+        """Match layers to each product's stock_count and store the final average costs."""
+        now = timezone.now()
+        products = []
+        for pk, stock_count in Product.objects.order_by('pk').values_list('pk', 'stock_count').iterator(chunk_size=BATCH_SIZE):
+            layers = self.open_layers.pop(pk, deque())
+            layered = sum(layer.remaining for layer in layers)
+            average = self.average.get(pk, ZERO)
+            if stock_count > layered:
+                # Stock added outside stock history (or before it was kept) becomes an opening layer.
+                self.receive(pk, stock_count - layered, average, now)
+                self.open_layers.pop(pk, None)
+            elif stock_count < layered:
+                taken, _ = take_from_layers(layers, layered - stock_count)
+                for layer, _ in taken:
+                    self.dirty_layers[layer.pk] = layer
+            products.append(Product(pk=pk, average_cost=average))
+            if len(products) >= BATCH_SIZE:
+                self.flush()
+                Product.objects.bulk_update(products, ['average_cost'])
+                products = []
+        self.flush()
+        Product.objects.bulk_update(products, ['average_cost'], batch_size=BATCH_SIZE)
+
+
+def revalue_all():
+    """Rebuild every cost layer and consumption from history. Returns the number of events replayed."""
+    with transaction.atomic():
+        CostConsumption.objects.all().delete()
+        CostLayer.objects.all().delete()
+        revaluation = _Revaluation()
+        revaluation.run()
+    return revaluation.events
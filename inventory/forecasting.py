@@ -0,0 +1,83 @@
+import math
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Product, ProductForecast, RemovalRequestItem
+from .smoothing import smooth_parallel
+
+CHUNK_SIZE = 5000
+PERIOD_DAYS = 7
+
+
+def demand_series(ids, now, weeks):
+    """
+    Weekly outflow per product from deducted removal requests, as a
+    (len(ids), weeks) array with the oldest week first.
+    """
+    start = now - timezone.timedelta(weeks=weeks)
+    moves = list(
+        RemovalRequestItem.objects.filter(request__stock_deducted_on__gte=start, request__stock_deducted_on__lt=now)
+        .values_list('product_id', 'request__stock_deducted_on', 'quantity').iterator(chunk_size=CHUNK_SIZE)
+    )
+    series = np.zeros((len(ids), weeks), dtype=np.float64)
+    if not moves:
+        return series
+    product_ids, dates, quantities = zip(*moves)
+    product_ids = np.array(product_ids, dtype=np.int64)
+    seconds = np.array([(value - start).total_seconds() for value in dates], dtype=np.float64)
+    periods = np.minimum((seconds // (PERIOD_DAYS * 86400)).astype(np.int64), weeks - 1)
+    positions = np.searchsorted(ids, product_ids)
+    found = (positions < len(ids)) & (ids[np.minimum(positions, len(ids) - 1)] == product_ids)
+    np.add.at(series, (positions[found], periods[found]), np.array(quantities, dtype=np.float64)[found])
+    return series
+
+
+def compute_forecasts(weeks=None, workers=None, now=None):
+    """
+    Forecast weekly demand for every product by exponential smoothing over
+    its removal history, and store it with the demand expected over the
+    product's lead time and the quantity to order to cover it. Returns the
+    number of products forecast.
+    """
+    weeks = weeks or settings.INVENTORY_FORECAST_WEEKS
+    workers = workers or settings.INVENTORY_FORECAST_WORKERS
+    now = now or timezone.now()
+    rows = list(Product.objects.order_by('pk').values_list('pk', 'stock_count', 'lead_time_days').iterator(chunk_size=CHUNK_SIZE))
+    if not rows:
+        return 0
+    ids, stock, lead = (np.array(column, dtype=np.int64) for column in zip(*rows))
+
+    alpha, weekly, error = smooth_parallel(demand_series(ids, now, weeks), workers)
+    lead_time_demand = weekly * lead / PERIOD_DAYS
+    suggested = np.maximum(np.ceil(lead_time_demand - 1e-9).astype(np.int64) - stock, 0)
+
+    forecasts = [
+        ProductForecast(
+            product_id=int(ids[i]), computed_on=now, history_weeks=weeks,
+            alpha=float(alpha[i]), weekly_demand=round(float(weekly[i]), 4), error=round(float(error[i]), 4),
+            lead_time_demand=round(float(lead_time_demand[i]), 4), suggested_order=int(suggested[i]),
+        )
+        for i in range(len(ids))
+    ]
+    with transaction.atomic():
+        ProductForecast.objects.bulk_create(
+            forecasts, batch_size=1000, update_conflicts=True, unique_fields=['product'],
+            update_fields=['computed_on', 'history_weeks', 'alpha', 'weekly_demand', 'error', 'lead_time_demand', 'suggested_order'],
+        )
+    return len(forecasts)
+
+
+def purchasing_forecasts(product_type=None):
+    """Stored forecasts for the purchasing screen, products most in need of ordering first."""
+    forecasts = ProductForecast.objects.all()
+    if product_type:
+        forecasts = forecasts.filter(product__type=product_type)
+    return forecasts.order_by('-suggested_order', F('product__product_name')).values(
+        'product_id', 'product__product_id', 'product__product_name', 'product__part_no', 'product__type',
+        'product__stock_count', 'product__lead_time_days', 'weekly_demand', 'lead_time_demand',
+        'suggested_order', 'alpha', 'error', 'computed_on',
+    )
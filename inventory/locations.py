@@ -0,0 +1,87 @@
+from django.db import transaction
+from django.db.models import F
+
+from .models import LocationStock, Product, StockMovement, StockTransfer
+
+
+def move(product_id, location_id, quantity, movement_type, user=None, **links):
+    """
+    Apply a signed `quantity` to a product's stock in one location and
+    record the movement. Raises ValueError if the location holds too little.
+    Call inside a transaction.
+    """
+    if quantity < 0:
+        moved = LocationStock.objects.filter(
+            product_id=product_id, location_id=location_id, quantity__gte=-quantity,
+        ).update(quantity=F('quantity') + quantity)
+        if not moved:
+            on_hand = (
+                LocationStock.objects.filter(product_id=product_id, location_id=location_id)
+                .values_list('quantity', flat=True).first() or 0
+            )
+            raise ValueError(f"Only {on_hand} of product {product_id} in location {location_id}; {-quantity} requested.")
+    else:
+        stock, created = LocationStock.objects.get_or_create(
+            product_id=product_id, location_id=location_id, defaults={'quantity': quantity},
+        )
+        if not created:
+            LocationStock.objects.filter(pk=stock.pk).update(quantity=F('quantity') + quantity)
+    return StockMovement.objects.create(
+        product_id=product_id, location_id=location_id, quantity=quantity,
+        movement_type=movement_type, created_by=user, **links,
+    )
+
+
+def settle_unlocated(product_id, movement_type, user=None, **links):
+    """
+    After stock left a product without naming a location, take any located
+    stock now beyond Product.stock_count out of its locations, fullest first,
+    so the located quantities never exceed the product total. Call inside a transaction.
+    """
+    rows = list(
+        LocationStock.objects.select_for_update().filter(product_id=product_id, quantity__gt=0)
+        .order_by('-quantity', 'location__code')
+    )
+    if not rows:
+        return []
+    excess = sum(row.quantity for row in rows) - Product.objects.values_list('stock_count', flat=True).get(pk=product_id)
+    movements = []
+    for row in rows:
+        if excess <= 0:
+            break
+        amount = min(row.quantity, excess)
+        movements.append(move(product_id, row.location_id, -amount, movement_type, user, **links))
+        excess -= amount
+    return movements
+
+
+@transaction.atomic
+def transfer(product, from_location, to_location, quantity, user=None, remarks=''):
+    """Move stock between two locations as a paired out/in movement. Raises ValueError on shortfall."""
+    if from_location.pk == to_location.pk:
+        raise ValueError("Source and destination locations must differ.")
+    record = StockTransfer.objects.create(
+        product=product, from_location=from_location, to_location=to_location,
+        quantity=quantity, transferred_by=user, remarks=remarks,
+    )
+    move(product.pk, from_location.pk, -quantity, 'transfer_out', user, transfer=record)
+    move(product.pk, to_location.pk, quantity, 'transfer_in', user, transfer=record)
+    return record
+
+
+def stock_by_location(location_id):
+    """Every product held in a location, in one indexed query."""
+    return (
+        LocationStock.objects.filter(location_id=location_id, quantity__gt=0)
+        .order_by('product__product_name')
+        .values('product_id', 'product__product_id', 'product__product_name', 'product__part_no', 'quantity')
+    )
+
+
+def product_locations(product_id):
+    """Where a product is held, fullest location first, in one indexed query."""
+    return (
+        LocationStock.objects.filter(product_id=product_id, quantity__gt=0)
+        .order_by('-quantity', 'location__code')
+        .values('location_id', 'location__code', 'location__name', 'location__kind', 'quantity')
+    )
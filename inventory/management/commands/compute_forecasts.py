@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from inventory.forecasting import compute_forecasts
+
+
+class Command(BaseCommand):
+    help = "Forecast weekly demand per product from removal history and store it for purchasing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--weeks', type=int, default=None, help="Weeks of history to fit on.")
+        parser.add_argument('--workers', type=int, default=None, help="Processes to fit across.")
+
+    def handle(self, *args, **options):
+        count = compute_forecasts(weeks=options['weeks'], workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(f"Forecast demand for {count} products."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from inventory.replenishment import compute_reorder_points, send_low_stock_digest
+
+
+class Command(BaseCommand):
+    help = "Recompute product usage and reorder points, flag low stock, and optionally email a digest."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window-days', type=int, default=None, help="Days of history used for daily usage.")
+        parser.add_argument('--email', action='store_true', help="Email the low-stock digest to INVENTORY_ALERT_RECIPIENTS.")
+
+    def handle(self, *args, **options):
+        newly_low = compute_reorder_points(window_days=options['window_days'])
+        self.stdout.write(f"{len(newly_low)} products fell below their reorder point.")
+        if options['email']:
+            if send_low_stock_digest(newly_low):
+                self.stdout.write(self.style.SUCCESS("Low-stock digest sent."))
+            else:
+                self.stdout.write("Nothing to send.")
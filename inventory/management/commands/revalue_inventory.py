@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.costing import revalue_all
+
+
+class Command(BaseCommand):
+    help = "Rebuild cost layers, removal costs and average costs by replaying all stock history."
+
+    def handle(self, *args, **options):
+        events = revalue_all()
+        self.stdout.write(self.style.SUCCESS(f"Revalued inventory from {events} stock movements."))
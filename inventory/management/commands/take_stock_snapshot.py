@@ -0,0 +1,20 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.snapshots import last_month_end, take_snapshot
+
+
+class Command(BaseCommand):
+    help = "Store every product's stock balance at the end of a day (default: the last month end)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Snapshot date, YYYY-MM-DD.")
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['date']) if options['date'] else last_month_end()
+        except ValueError:
+            raise CommandError("Date must be in YYYY-MM-DD format.")
+        rows = take_snapshot(day)
+        self.stdout.write(self.style.SUCCESS(f"Stored {rows} product balances for {day}."))
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:19
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_removalrequest_stock_deducted'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(models.F('type'), django.db.models.functions.text.Lower('part_no'), name='inventory_product_part_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(models.F('type'), django.db.models.functions.text.Lower('product_name'), name='inventory_product_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['type', 'product_id'], name='inventory_product_pid_idx'),
+        ),
+    ]
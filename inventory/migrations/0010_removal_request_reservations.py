@@ -0,0 +1,38 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:21
+
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+def reserve_pending_requests(apps, schema_editor):
+    # Requests still awaiting approval start out holding their stock.
+    RemovalRequestItem = apps.get_model('inventory', 'RemovalRequestItem')
+    StockReservation = apps.get_model('inventory', 'StockReservation')
+    rejected = Q(request__accounts_status='rejected') | Q(request__gm_status='rejected') | Q(request__mgmt_status='rejected')
+    rows = (
+        RemovalRequestItem.objects.filter(request__stock_deducted=False).exclude(rejected)
+        .values('request_id', 'product_id').annotate(quantity=Sum('quantity'))
+    )
+    StockReservation.objects.bulk_create([
+        StockReservation(
+            product_id=row['product_id'], quantity=row['quantity'],
+            source_type='removal_request', source_id=row['request_id'],
+        )
+        for row in rows
+    ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_stock_reservations'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockreservation',
+            name='source_type',
+            field=models.CharField(choices=[('sales_order', 'Sales Order'), ('removal_request', 'Removal Request')], max_length=20),
+        ),
+        migrations.RunPython(reserve_pending_requests, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def locations_from_storage_text(apps, schema_editor):
+    # Each distinct free-text storage location becomes a Location holding that product's stock.
+    Product = apps.get_model('inventory', 'Product')
+    Location = apps.get_model('inventory', 'Location')
+    LocationStock = apps.get_model('inventory', 'LocationStock')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    names = (
+        Product.objects.exclude(storage_location='').order_by('storage_location')
+        .values_list('storage_location', flat=True).distinct()
+    )
+    locations = {}
+    for number, name in enumerate(names, start=1):
+        locations[name] = Location.objects.create(code=f"LOC-{number:04d}", name=name)
+    stock, movements = [], []
+    for product_id, name, quantity in (
+        Product.objects.filter(stock_count__gt=0).exclude(storage_location='')
+        .values_list('pk', 'storage_location', 'stock_count').iterator()
+    ):
+        location = locations[name]
+        stock.append(LocationStock(product_id=product_id, location=location, quantity=quantity))
+        movements.append(StockMovement(product_id=product_id, location=location, quantity=quantity, movement_type='adjustment'))
+    LocationStock.objects.bulk_create(stock, batch_size=1000)
+    StockMovement.objects.bulk_create(movements, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventory', '0012_costing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=50, unique=True)),
+                ('name', models.CharField(max_length=200)),
+                ('kind', models.CharField(choices=[('warehouse', 'Warehouse'), ('yard', 'Yard'), ('bin', 'Bin')], default='warehouse', max_length=20)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='children', to='inventory.location')),
+            ],
+            options={
+                'verbose_name_plural': 'Locations',
+            },
+        ),
+        migrations.CreateModel(
+            name='StockTransfer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('transferred_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('remarks', models.TextField(blank=True)),
+                ('from_location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='transfers_out', to='inventory.location')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transfers', to='inventory.product')),
+                ('to_location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='transfers_in', to='inventory.location')),
+                ('transferred_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_transfers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Stock Transfers',
+            },
+        ),
+        migrations.AddField(
+            model_name='removalrequestitem',
+            name='location',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='removal_items', to='inventory.location'),
+        ),
+        migrations.AddField(
+            model_name='stockhistory',
+            name='location',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='stock_additions', to='inventory.location'),
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField()),
+                ('movement_type', models.CharField(choices=[('receipt', 'Receipt'), ('removal', 'Removal'), ('transfer_out', 'Transfer Out'), ('transfer_in', 'Transfer In'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('created_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='movements', to='inventory.location')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='inventory.product')),
+                ('removal_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movements', to='inventory.removalrequestitem')),
+                ('stock_history', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movements', to='inventory.stockhistory')),
+                ('transfer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='inventory.stocktransfer')),
+            ],
+            options={
+                'verbose_name_plural': 'Stock Movements',
+                'indexes': [models.Index(fields=['location', 'created_on'], name='inventory_move_loc_idx'), models.Index(fields=['product', 'created_on'], name='inventory_move_product_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LocationStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock', to='inventory.location')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_stock', to='inventory.product')),
+            ],
+            options={
+                'verbose_name_plural': 'Location Stock',
+                'indexes': [models.Index(fields=['location', 'product', 'quantity'], name='inventory_locstock_loc_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='locationstock',
+            constraint=models.UniqueConstraint(fields=('product', 'location'), name='inventory_locstock_unique'),
+        ),
+        migrations.RunPython(locations_from_storage_text, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:30
+
+from django.db import migrations, models
+
+
+def fill_category_paths(apps, schema_editor):
+    Product = apps.get_model('inventory', 'Product')
+    Category = apps.get_model('inventory', 'Category')
+    SubCategory = apps.get_model('inventory', 'SubCategory')
+    categories = dict(Category.objects.values_list('pk', 'name'))
+    subcategories = dict(SubCategory.objects.values_list('pk', 'name'))
+    pairs = Product.objects.order_by().values_list('category_id', 'subcategory_id').distinct()
+    for category_id, subcategory_id in list(pairs):
+        path = ' / '.join(name for name in (categories.get(category_id), subcategories.get(subcategory_id)) if name)
+        Product.objects.filter(category_id=category_id, subcategory_id=subcategory_id).update(category_path=path)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_locations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='category_path',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_category_paths, migrations.RunPython.noop),
+    ]
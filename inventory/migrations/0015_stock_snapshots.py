@@ -0,0 +1,45 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import F
+import django.utils.timezone
+
+
+def backfill_deducted_on(apps, schema_editor):
+    # The deduction time was never stored; the request date is the closest we have.
+    RemovalRequest = apps.get_model('inventory', 'RemovalRequest')
+    RemovalRequest.objects.filter(stock_deducted=True, stock_deducted_on__isnull=True).update(stock_deducted_on=F('created_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_product_category_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='removalrequest',
+            name='stock_deducted_on',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField()),
+                ('stock_count', models.PositiveIntegerField()),
+                ('created_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.product')),
+            ],
+            options={
+                'verbose_name_plural': 'Stock Snapshots',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshot',
+            constraint=models.UniqueConstraint(fields=('snapshot_date', 'product'), name='inventory_snapshot_unique'),
+        ),
+        migrations.RunPython(backfill_deducted_on, migrations.RunPython.noop),
+    ]
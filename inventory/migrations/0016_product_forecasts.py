@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0015_stock_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('computed_on', models.DateTimeField()),
+                ('history_weeks', models.PositiveIntegerField()),
+                ('alpha', models.FloatField()),
+                ('weekly_demand', models.FloatField()),
+                ('error', models.FloatField()),
+                ('lead_time_demand', models.FloatField()),
+                ('suggested_order', models.PositiveIntegerField(default=0)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast', to='inventory.product')),
+            ],
+            options={
+                'verbose_name_plural': 'Product Forecasts',
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:34
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def barcodes_from_order_lines(apps, schema_editor):
+    # Adopt a barcode already typed on order lines when it points at exactly one product.
+    OrderService = apps.get_model('sales', 'OrderService')
+    Product = apps.get_model('inventory', 'Product')
+    lines = OrderService.objects.exclude(barcode='').filter(inventory_product__isnull=False)
+    single_product = (
+        lines.values('barcode').order_by().annotate(products=Count('inventory_product', distinct=True))
+        .filter(products=1).values_list('barcode', flat=True)
+    )
+    pairs = lines.filter(barcode__in=single_product).values_list('inventory_product_id', 'barcode').distinct()
+    barcodes = {}
+    for product_id, barcode in pairs:
+        barcodes.setdefault(product_id, []).append(barcode)
+    products = [Product(pk=pk, barcode=codes[0]) for pk, codes in barcodes.items() if len(codes) == 1]
+    Product.objects.bulk_update(products, ['barcode'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0016_product_forecasts'),
+        ('sales', '0029_line_inventory_products'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='barcode',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.RunPython(barcodes_from_order_lines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0029_line_inventory_products'),
+        ('inventory', '0017_product_barcode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='removalrequest',
+            name='job_card',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='removal_requests', to='sales.jobcard'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
 from django.utils import timezone
 import random
@@ -41,6 +43,10 @@ class Product(models.Model):
         ('used', 'Used'),
         ('refurbished', 'Refurbished'),
     ]
+    COSTING_CHOICES = [
+        ('fifo', 'FIFO'),
+        ('average', 'Weighted Average'),
+    ]
 
     product_id = models.CharField(max_length=5, unique=True, default=generate_product_id)
     type = models.CharField(max_length=10, choices=TYPE_CHOICES)
@@ -49,6 +55,7 @@ class Product(models.Model):
     product_name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     part_no = models.CharField(max_length=100, unique=True)
+    barcode = models.CharField(max_length=100, unique=True, null=True, blank=True)
     storage_location = models.CharField(max_length=200)
     remarks = models.TextField(blank=True)
     origin = models.CharField(max_length=100, blank=True, null=True)
@@ -58,12 +65,41 @@ class Product(models.Model):
     added_on = models.DateTimeField(auto_now_add=True)
     quantity_added = models.PositiveIntegerField(default=0)
     condition = models.CharField(max_length=20, choices=CONDITION_CHOICES, default='new')
+    # "Category / Subcategory", kept in step by save() and by inventory.categories on renames.
+    category_path = models.CharField(max_length=255, blank=True, editable=False)
+    costing_method = models.CharField(max_length=10, choices=COSTING_CHOICES, default='fifo')
+    # Moving weighted-average unit cost, maintained by inventory.costing for every product.
+    average_cost = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    reorder_point = models.PositiveIntegerField(default=0)
+    lead_time_days = models.PositiveIntegerField(default=7)
+    # Filled in by the `compute_reorder_points` job; see inventory.replenishment.
+    daily_usage = models.FloatField(default=0)
+    suggested_reorder_point = models.PositiveIntegerField(default=0)
+    days_of_cover = models.FloatField(null=True, blank=True)
+    low_stock = models.BooleanField(default=False)
+    stock_checked_on = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.product_name} ({self.product_id})"
 
+    def save(self, *args, **kwargs):
+        from .categories import category_path
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'category', 'subcategory'} & set(update_fields):
+            self.category_path = category_path(self.category_id, self.subcategory_id)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'category_path'}
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name_plural = "Products"
+        indexes = [
+            # Case-insensitive prefix lookups for the product autocomplete.
+            models.Index(F('type'), Lower('part_no'), name='inventory_product_part_idx'),
+            models.Index(F('type'), Lower('product_name'), name='inventory_product_name_idx'),
+            models.Index(fields=['type', 'product_id'], name='inventory_product_pid_idx'),
+            models.Index(fields=['type', 'low_stock', 'days_of_cover'], name='inventory_product_low_idx'),
+        ]
 
 class StockHistory(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="stock_history")
@@ -71,6 +107,8 @@ class StockHistory(models.Model):
     added_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="stock_additions")
     added_on = models.DateTimeField(default=timezone.now)
     remarks = models.TextField(blank=True)
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    location = models.ForeignKey('Location', on_delete=models.PROTECT, null=True, blank=True, related_name="stock_additions")
 
     def __str__(self):
         return f"{self.product.product_name} - {self.quantity_added} added on {self.added_on}"
@@ -110,10 +148,91 @@ class RemovalRequest(models.Model):
     gm_remarks = models.TextField(blank=True)
     mgmt_remarks = models.TextField(blank=True)
     stock_deducted = models.BooleanField(default=False)  # Flag to prevent duplicate deductions
+    stock_deducted_on = models.DateTimeField(null=True, blank=True, db_index=True)
+    # Set for requests raised from a job card's material lines.
+    job_card = models.ForeignKey('sales.JobCard', on_delete=models.SET_NULL, null=True, blank=True, related_name="removal_requests")
 
     def __str__(self):
         return f"Removal Request {self.request_no} ({self.type}, {self.removal_type})"
 
+    @property
+    def is_approved(self):
+        return self.accounts_status == self.gm_status == self.mgmt_status == 'approved'
+
+    @property
+    def is_rejected(self):
+        return 'rejected' in (self.accounts_status, self.gm_status, self.mgmt_status)
+
+    def fulfilled_order(self):
+        """The sales order this request fulfils through its job card, if any."""
+        if self.job_card_id is None:
+            return None
+        from sales.models import SalesOrder
+        return SalesOrder.objects.filter(job_cards=self.job_card_id).first()
+
+    def sync_reservations(self, check=True):
+        """
+        Hold the requested stock while the request is pending; release it once rejected or deducted.
+        For a job card's request, the order's own reservation shrinks (or grows back) first, so
+        stock the order held passes to the request instead of being counted twice.
+        """
+        from .reservations import quantities_by_product, release, reserve
+        order = self.fulfilled_order()
+        if order is not None:
+            order.sync_reservations(check=False)
+        if self.is_rejected or self.stock_deducted:
+            release('removal_request', self.pk)
+        else:
+            lines = self.items.values_list('product_id', 'quantity')
+            reserve('removal_request', self.pk, quantities_by_product(lines), check=check)
+
+    def deduct_stock(self):
+        """
+        Take the requested quantities out of stock once, and drop the
+        reservation that was holding them. Raises ValueError, undoing every
+        deduction, if a product no longer has enough.
+        """
+        from .costing import consume
+        from .locations import move, settle_unlocated
+        from . import autocomplete
+        from .reservations import release
+        from .scan import invalidate_scans_on_commit
+        with transaction.atomic():
+            # Claim the deduction first so two concurrent approvals cannot both apply it.
+            deducted_on = timezone.now()
+            if not RemovalRequest.objects.filter(pk=self.pk, stock_deducted=False).update(
+                stock_deducted=True, stock_deducted_on=deducted_on,
+            ):
+                self.stock_deducted = True
+                return False
+            for item in self.items.select_related('product'):
+                deducted = Product.objects.filter(
+                    pk=item.product_id, stock_count__gte=item.quantity, quantity_added__gte=item.quantity,
+                ).update(
+                    stock_count=F('stock_count') - item.quantity,
+                    quantity_added=F('quantity_added') - item.quantity,
+                )
+                if not deducted:
+                    product = Product.objects.get(pk=item.product_id)
+                    raise ValueError(
+                        f"Insufficient values for {product.product_name}: "
+                        f"Requested {item.quantity}, "
+                        f"Available stock_count: {product.stock_count}, "
+                        f"Available quantity_added: {product.quantity_added}"
+                    )
+                if item.location_id:
+                    move(item.product_id, item.location_id, -item.quantity, 'removal', removal_item=item)
+                else:
+                    settle_unlocated(item.product_id, 'removal', removal_item=item)
+            consume(self, deducted_on)
+            release('removal_request', self.pk)
+            invalidate_scans_on_commit(self.items.values_list('product_id', flat=True))
+            # Autocomplete results carry stock_count too, and the UPDATE above skips post_save.
+            transaction.on_commit(autocomplete.invalidate)
+        self.stock_deducted = True
+        self.stock_deducted_on = deducted_on
+        return True
+
     class Meta:
         verbose_name_plural = "Removal Requests"
 
@@ -121,9 +240,201 @@ class RemovalRequestItem(models.Model):
     request = models.ForeignKey(RemovalRequest, on_delete=models.CASCADE, related_name="items")
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="removal_request_items")
     quantity = models.PositiveIntegerField()
+    # The bin the stock is picked from; items without one only come off the product total.
+    location = models.ForeignKey('Location', on_delete=models.PROTECT, null=True, blank=True, related_name="removal_items")
 
     def __str__(self):
         return f"{self.product.product_name} - {self.quantity} (Request {self.request.request_no})"
 
     class Meta:
         verbose_name_plural = "Removal Request Items"
+
+class StockReservation(models.Model):
+    """
+    Stock held for a document that has not consumed it yet, e.g. an open
+    sales order. Available-to-promise is stock_count minus the sum of these.
+    """
+    SOURCE_CHOICES = [
+        ('sales_order', 'Sales Order'),
+        ('removal_request', 'Removal Request'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="reservations")
+    quantity = models.PositiveIntegerField()
+    source_type = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    source_id = models.BigIntegerField()
+    created_on = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product.product_name} for {self.source_type} {self.source_id}"
+
+    class Meta:
+        verbose_name_plural = "Stock Reservations"
+        constraints = [
+            models.UniqueConstraint(fields=['source_type', 'source_id', 'product'], name='inventory_reservation_unique_line'),
+        ]
+        indexes = [
+            # Covers SUM(quantity) per product without touching the table.
+            models.Index(fields=['product', 'quantity'], name='inventory_resv_product_idx'),
+        ]
+
+class CostLayer(models.Model):
+    """A batch of stock received at one unit cost; `remaining` is consumed oldest first."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="cost_layers")
+    stock_history = models.ForeignKey(StockHistory, on_delete=models.SET_NULL, null=True, blank=True, related_name="cost_layers")
+    received_on = models.DateTimeField(default=timezone.now)
+    quantity = models.PositiveIntegerField()
+    remaining = models.PositiveIntegerField()
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4)
+
+    def __str__(self):
+        return f"{self.product.product_name}: {self.remaining}/{self.quantity} at {self.unit_cost}"
+
+    class Meta:
+        verbose_name_plural = "Cost Layers"
+        indexes = [
+            models.Index(
+                fields=['product', 'received_on', 'id'], condition=models.Q(remaining__gt=0),
+                name='inventory_layer_open_idx',
+            ),
+        ]
+
+class CostConsumption(models.Model):
+    """The cost taken out of stock by one removal request line, per layer it drew from."""
+    removal_item = models.ForeignKey(RemovalRequestItem, on_delete=models.CASCADE, related_name="cost_consumptions")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="cost_consumptions")
+    layer = models.ForeignKey(CostLayer, on_delete=models.SET_NULL, null=True, blank=True, related_name="consumptions")
+    quantity = models.PositiveIntegerField()
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4)
+    consumed_on = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product.product_name} at {self.unit_cost}"
+
+    class Meta:
+        verbose_name_plural = "Cost Consumptions"
+
+class Location(models.Model):
+    """A warehouse, yard or bin that holds stock. Bins sit under the warehouse or yard they belong to."""
+    KIND_CHOICES = [
+        ('warehouse', 'Warehouse'),
+        ('yard', 'Yard'),
+        ('bin', 'Bin'),
+    ]
+
+    code = models.CharField(max_length=50, unique=True)
+    name = models.CharField(max_length=200)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='warehouse')
+    parent = models.ForeignKey('self', on_delete=models.PROTECT, null=True, blank=True, related_name="children")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.code} - {self.name}"
+
+    class Meta:
+        verbose_name_plural = "Locations"
+
+class LocationStock(models.Model):
+    """
+    How much of a product sits in one location. The located quantities never
+    exceed Product.stock_count: stock removed without a location comes off
+    unlocated stock first, then off the fullest locations (locations.settle_unlocated).
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="location_stock")
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name="stock")
+    quantity = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product.product_name} at {self.location.code}"
+
+    class Meta:
+        verbose_name_plural = "Location Stock"
+        constraints = [
+            # Also serves "where is this part": (product, location) lookups.
+            models.UniqueConstraint(fields=['product', 'location'], name='inventory_locstock_unique'),
+        ]
+        indexes = [
+            # Stock by location, read from the index alone.
+            models.Index(fields=['location', 'product', 'quantity'], name='inventory_locstock_loc_idx'),
+        ]
+
+class StockTransfer(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="transfers")
+    from_location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name="transfers_out")
+    to_location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name="transfers_in")
+    quantity = models.PositiveIntegerField()
+    transferred_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="stock_transfers")
+    transferred_on = models.DateTimeField(default=timezone.now)
+    remarks = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product.product_name}: {self.from_location.code} -> {self.to_location.code}"
+
+    class Meta:
+        verbose_name_plural = "Stock Transfers"
+
+class StockMovement(models.Model):
+    """One signed change to a product's stock in one location. A transfer is a paired out/in movement."""
+    MOVEMENT_CHOICES = [
+        ('receipt', 'Receipt'),
+        ('removal', 'Removal'),
+        ('transfer_out', 'Transfer Out'),
+        ('transfer_in', 'Transfer In'),
+        ('adjustment', 'Adjustment'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="movements")
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name="movements")
+    quantity = models.IntegerField()
+    movement_type = models.CharField(max_length=20, choices=MOVEMENT_CHOICES)
+    transfer = models.ForeignKey(StockTransfer, on_delete=models.CASCADE, null=True, blank=True, related_name="movements")
+    stock_history = models.ForeignKey(StockHistory, on_delete=models.SET_NULL, null=True, blank=True, related_name="movements")
+    removal_item = models.ForeignKey(RemovalRequestItem, on_delete=models.SET_NULL, null=True, blank=True, related_name="movements")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="stock_movements")
+    created_on = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.movement_type} {self.quantity} x {self.product.product_name} at {self.location.code}"
+
+    class Meta:
+        verbose_name_plural = "Stock Movements"
+        indexes = [
+            models.Index(fields=['location', 'created_on'], name='inventory_move_loc_idx'),
+            models.Index(fields=['product', 'created_on'], name='inventory_move_product_idx'),
+        ]
+
+class StockSnapshot(models.Model):
+    """A product's stock_count at the end of `snapshot_date`. Products with no stock get no row."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="snapshots")
+    snapshot_date = models.DateField()
+    stock_count = models.PositiveIntegerField()
+    created_on = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.product.product_name}: {self.stock_count} on {self.snapshot_date}"
+
+    class Meta:
+        verbose_name_plural = "Stock Snapshots"
+        constraints = [
+            # Leading on the date: reading one snapshot is a range scan of this index.
+            models.UniqueConstraint(fields=['snapshot_date', 'product'], name='inventory_snapshot_unique'),
+        ]
+
+class ProductForecast(models.Model):
+    """Latest demand forecast for a product, written by the `compute_forecasts` job; see inventory.forecasting."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name="forecast")
+    computed_on = models.DateTimeField()
+    history_weeks = models.PositiveIntegerField()
+    alpha = models.FloatField()
+    weekly_demand = models.FloatField()
+    # Root mean squared one-week-ahead error over the history.
+    error = models.FloatField()
+    lead_time_demand = models.FloatField()
+    suggested_order = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.product.product_name}: {self.weekly_demand:.2f} per week"
+
+    class Meta:
+        verbose_name_plural = "Product Forecasts"
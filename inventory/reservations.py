@@ -0,0 +1,87 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from rest_framework import serializers
+
+from .models import Product, StockReservation
+from .scan import invalidate_scans_on_commit
+
+
+def availability(product_ids, exclude_source=None):
+    """
+    {product id: {'on_hand', 'reserved', 'available'}} for the given products in
+    one aggregate query. `exclude_source` is a (source_type, source_id) whose own
+    reservations are not counted, for re-checking a document that already holds stock.
+    """
+    product_ids = {pk for pk in product_ids if pk is not None}
+    if not product_ids:
+        return {}
+    reserved = Coalesce(Sum('reservations__quantity'), 0)
+    if exclude_source:
+        source_type, source_id = exclude_source
+        own = Q(reservations__source_type=source_type, reservations__source_id=source_id)
+        reserved = reserved - Coalesce(Sum('reservations__quantity', filter=own), 0)
+    rows = (
+        Product.objects.filter(pk__in=product_ids)
+        .annotate(reserved=reserved)
+        .values_list('pk', 'stock_count', 'reserved')
+    )
+    return {
+        pk: {'on_hand': on_hand, 'reserved': reserved, 'available': on_hand - reserved}
+        for pk, on_hand, reserved in rows
+    }
+
+
+def quantities_by_product(lines):
+    """Sum (product id, quantity) pairs per product, skipping lines without a product."""
+    totals = defaultdict(int)
+    for product_id, quantity in lines:
+        if product_id is not None:
+            totals[product_id] += quantity
+    return dict(totals)
+
+
+@transaction.atomic
+def reserve(source_type, source_id, quantities, check=True):
+    """
+    Make the reservations held by a source exactly `quantities` ({product id: qty}).
+    With `check`, raises a ValidationError if a product whose reserved quantity
+    grows lacks the stock, counting reservations held by other sources only.
+    """
+    held = dict(
+        StockReservation.objects.filter(source_type=source_type, source_id=source_id)
+        .values_list('product_id', 'quantity')
+    )
+    growing = [pk for pk, quantity in quantities.items() if quantity > held.get(pk, 0)]
+    if check and growing:
+        # Lock the product rows so concurrent reservations are checked one after another.
+        list(Product.objects.select_for_update().filter(pk__in=growing).values_list('pk'))
+        available = availability(growing, exclude_source=(source_type, source_id))
+        short = {
+            pk: available.get(pk, {}).get('available', 0)
+            for pk in growing
+            if quantities[pk] > available.get(pk, {}).get('available', 0)
+        }
+        if short:
+            names = dict(Product.objects.filter(pk__in=list(short)).values_list('pk', 'product_name'))
+            raise serializers.ValidationError({
+                'stock': [
+                    f"Only {count} of {names.get(pk, pk)} available; {quantities[pk]} requested."
+                    for pk, count in short.items()
+                ]
+            })
+
+    release(source_type, source_id)
+    invalidate_scans_on_commit(quantities)
+    StockReservation.objects.bulk_create([
+        StockReservation(product_id=pk, quantity=quantity, source_type=source_type, source_id=source_id)
+        for pk, quantity in quantities.items() if quantity > 0
+    ])
+
+
+def release(source_type, source_id):
+    reservations = StockReservation.objects.filter(source_type=source_type, source_id=source_id)
+    invalidate_scans_on_commit(reservations.values_list('product_id', flat=True))
+    return reservations.delete()[0]
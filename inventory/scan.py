@@ -0,0 +1,137 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Product, StockReservation
+from .versions import shared_cache
+
+SCAN_FIELDS = (
+    'id', 'product_id', 'product_name', 'part_no', 'barcode', 'type',
+    'measurement_unit', 'category_path', 'stock_count',
+)
+# Checked in this order; a later match on the same code wins.
+MATCH_FIELDS = ('product_id', 'part_no', 'barcode')
+MAX_BATCH_SIZE = 500
+
+
+class LRUCache:
+    """A small thread-safe least-recently-used map."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# code -> {'version', 'expires', 'product'}; an entry is good while its product's version in the
+# shared cache (seen by every worker) is unchanged.
+_entries = LRUCache(settings.INVENTORY_SCAN_CACHE_SIZE)
+
+
+def _version_key(product_id):
+    return f'inventory:scan:product:{product_id}'
+
+
+def invalidate_scans(product_ids):
+    """Make every process drop its cached scans of these products."""
+    shared_cache().set_many({_version_key(pk): uuid.uuid4().hex for pk in set(product_ids)}, None)
+
+
+def invalidate_scans_on_commit(product_ids):
+    product_ids = list(product_ids)
+    if product_ids:
+        transaction.on_commit(lambda: invalidate_scans(product_ids))
+
+
+def _matches(codes):
+    return Q(barcode__in=codes) | Q(part_no__in=codes) | Q(product_id__in=codes)
+
+
+def _lookup(codes):
+    """Resolve codes against barcode, part number and product id in one query."""
+    reserved = (
+        StockReservation.objects.filter(product=OuterRef('pk'))
+        .values('product').annotate(total=Sum('quantity')).values('total')
+    )
+    rows = list(
+        Product.objects.filter(_matches(codes))
+        .annotate(reserved=Coalesce(Subquery(reserved), 0))
+        .values(*SCAN_FIELDS, 'reserved')
+    )
+    found = {}
+    for field in MATCH_FIELDS:
+        for row in rows:
+            if row[field] in codes:
+                found[row[field]] = dict(row, available=row['stock_count'] - row['reserved'], matched_on=field)
+    return found
+
+
+def _versions(product_ids):
+    keys = {pk: _version_key(pk) for pk in product_ids}
+    versions = shared_cache().get_many(list(keys.values()))
+    missing = {key: uuid.uuid4().hex for key in keys.values() if key not in versions}
+    if missing:
+        shared_cache().set_many(missing, None)
+        versions.update(missing)
+    return {pk: versions[key] for pk, key in keys.items()}
+
+
+def scan(codes):
+    """{code: product with stock, or None} for scanned barcodes, part numbers or product ids."""
+    codes = {code.strip() for code in codes if code and code.strip()}
+    now = time.monotonic()
+    results, misses = {}, []
+    hits = {code: entry for code in codes if (entry := _entries.get(code)) and entry['expires'] > now}
+    current = _versions({entry['product']['id'] for entry in hits.values()}) if hits else {}
+    for code in codes:
+        entry = hits.get(code)
+        if entry and current.get(entry['product']['id']) == entry['version']:
+            results[code] = entry['product']
+        else:
+            misses.append(code)
+
+    if misses:
+        # Versions are read before the products: an invalidation landing in between
+        # then leaves the new entry stale instead of tagging stale stock as current.
+        versions = _versions(Product.objects.filter(_matches(misses)).values_list('pk', flat=True))
+        found = _lookup(misses)
+        expires = now + settings.INVENTORY_SCAN_CACHE_SECONDS
+        for code in misses:
+            product = found.get(code)
+            results[code] = product
+            # Unknown codes are not cached, so a product added a moment later scans straight away.
+            if product and product['id'] in versions:
+                _entries.set(code, {'version': versions[product['id']], 'expires': expires, 'product': product})
+    return results
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_scans(sender, instance, **kwargs):
+    invalidate_scans_on_commit([instance.pk])
@@ -1,6 +1,12 @@
 from rest_framework import serializers
-from .models import Category, SubCategory, Product, StockHistory, RemovalRequest, RemovalRequestItem
+from .models import (
+    Category, SubCategory, Product, StockHistory, RemovalRequest, RemovalRequestItem,
+    Location, LocationStock, StockTransfer
+)
+from .locations import transfer
+from .categories import category_tree
 from django.contrib.auth.models import User
+from django.db import transaction
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -18,17 +24,34 @@ class SubCategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'category', 'category_id', 'created_at']
 
 class ProductSerializer(serializers.ModelSerializer):
-    category = CategorySerializer(read_only=True)
+    # Rendered from the cached category tree, so product lists need no category joins.
+    category = serializers.SerializerMethodField()
     category_id = serializers.PrimaryKeyRelatedField(
         queryset=Category.objects.all(), source='category', write_only=True
     )
-    subcategory = SubCategorySerializer(read_only=True)
+    subcategory = serializers.SerializerMethodField()
     subcategory_id = serializers.PrimaryKeyRelatedField(
         queryset=SubCategory.objects.all(), source='subcategory', write_only=True
     )
     measurement_unit = serializers.CharField(max_length=50)
     added_by = serializers.StringRelatedField(read_only=True)
 
+    def validate_barcode(self, value):
+        # Blank means no barcode; only real barcodes are held unique.
+        return value or None
+
+    def _category_tree(self):
+        # Once per serialization: every row of a list shares the root serializer's context.
+        if 'category_tree' not in self.context:
+            self.context['category_tree'] = category_tree()
+        return self.context['category_tree']
+
+    def get_category(self, obj):
+        return self._category_tree().categories.get(obj.category_id)
+
+    def get_subcategory(self, obj):
+        return self._category_tree().subcategories.get(obj.subcategory_id)
+
     def validate(self, data):
         if data['type'] == 'imported' and not data.get('origin'):
             raise serializers.ValidationError({"origin": "Origin is required for imported products."})
@@ -40,9 +63,12 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = [
             'id', 'product_id', 'type', 'origin', 'category', 'category_id', 'subcategory', 'subcategory_id',
-            'product_name', 'description', 'part_no', 'storage_location', 'remarks',
-            'measurement_unit', 'stock_count', 'added_by', 'added_on', 'quantity_added', 'condition'
+            'product_name', 'description', 'part_no', 'barcode', 'storage_location', 'remarks',
+            'measurement_unit', 'stock_count', 'added_by', 'added_on', 'quantity_added', 'condition',
+            'reorder_point', 'lead_time_days', 'daily_usage', 'suggested_reorder_point', 'days_of_cover', 'low_stock',
+            'costing_method', 'average_cost', 'category_path',
         ]
+        read_only_fields = ['daily_usage', 'suggested_reorder_point', 'days_of_cover', 'low_stock', 'average_cost']
 
 class StockHistorySerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
@@ -55,12 +81,13 @@ class StockHistorySerializer(serializers.ModelSerializer):
         model = StockHistory
         fields = [
             'id', 'product', 'product_id', 'quantity_added', 'added_by',
-            'added_on', 'remarks'
+            'added_on', 'remarks', 'unit_cost', 'location'
         ]
 
 class RemovalRequestItemSerializer(serializers.Serializer):
     product_id = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
     quantity = serializers.IntegerField(min_value=1)
+    location_id = serializers.PrimaryKeyRelatedField(queryset=Location.objects.all(), required=False, allow_null=True)
 
     def validate(self, data):
         product = data['product_id']
@@ -69,6 +96,16 @@ class RemovalRequestItemSerializer(serializers.Serializer):
             raise serializers.ValidationError({
                 'quantity': f"Quantity ({quantity}) exceeds available stock ({product.stock_count}) for product {product.product_name}."
             })
+        location = data.get('location_id')
+        if location:
+            in_location = (
+                LocationStock.objects.filter(product=product, location=location)
+                .values_list('quantity', flat=True).first() or 0
+            )
+            if quantity > in_location:
+                raise serializers.ValidationError({
+                    'location_id': f"Only {in_location} of {product.product_name} in {location.code}."
+                })
         return data
 
 class RemovalRequestSerializer(serializers.ModelSerializer):
@@ -82,6 +119,8 @@ class RemovalRequestSerializer(serializers.ModelSerializer):
     mgmt_status = serializers.ChoiceField(choices=RemovalRequest.STATUS_CHOICES, default='pending')
 
     def validate(self, data):
+        if self.instance is not None and 'job_card' in data and data['job_card'] != self.instance.job_card:
+            raise serializers.ValidationError({'job_card': "The job card of a removal request cannot be changed."})
         type_value = data.get('type')
         product_items = data.get('product_items', [])
         for item in product_items:
@@ -92,15 +131,18 @@ class RemovalRequestSerializer(serializers.ModelSerializer):
                 })
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         product_items = validated_data.pop('product_items', [])
         request = RemovalRequest.objects.create(**validated_data)
-        for item in product_items:
-            RemovalRequestItem.objects.create(
-                request=request,
-                product=item['product_id'],
-                quantity=item['quantity']
+        RemovalRequestItem.objects.bulk_create([
+            RemovalRequestItem(
+                request=request, product=item['product_id'], quantity=item['quantity'], location=item.get('location_id'),
             )
+            for item in product_items
+        ])
+        # Hold the stock until the approvals land, so pending requests cannot promise the same units.
+        request.sync_reservations()
         return request
 
     def to_representation(self, instance):
@@ -109,7 +151,7 @@ class RemovalRequestSerializer(serializers.ModelSerializer):
             [item.product for item in instance.items.all()], many=True
         ).data
         representation['product_items'] = [
-            {'product_id': item.product.id, 'quantity': item.quantity}
+            {'product_id': item.product.id, 'quantity': item.quantity, 'location_id': item.location_id}
             for item in instance.items.all()
         ]
         return representation
@@ -119,5 +161,35 @@ class RemovalRequestSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'request_no', 'products', 'product_items', 'remarks', 'type', 'removal_type',
             'accounts_status', 'gm_status', 'mgmt_status', 'requested_by', 'created_date',
-            'gm_remarks', 'mgmt_remarks'
-        ]
\ No newline at end of file
+            'gm_remarks', 'mgmt_remarks', 'stock_deducted_on', 'job_card'
+        ]
+        read_only_fields = ['stock_deducted_on']
+        # A request raised for a job card takes over the stock its sales order holds.
+        extra_kwargs = {'job_card': {'required': False}}
+
+class LocationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Location
+        fields = ['id', 'code', 'name', 'kind', 'parent', 'is_active', 'created_at']
+
+class StockTransferSerializer(serializers.ModelSerializer):
+    transferred_by = serializers.StringRelatedField(read_only=True)
+
+    class Meta:
+        model = StockTransfer
+        fields = [
+            'id', 'product', 'from_location', 'to_location', 'quantity',
+            'transferred_by', 'transferred_on', 'remarks'
+        ]
+        read_only_fields = ['transferred_on']
+        extra_kwargs = {'quantity': {'min_value': 1}}
+
+    def create(self, validated_data):
+        try:
+            return transfer(
+                validated_data['product'], validated_data['from_location'], validated_data['to_location'],
+                validated_data['quantity'], user=validated_data.get('transferred_by'),
+                remarks=validated_data.get('remarks', ''),
+            )
+        except ValueError as e:
+            raise serializers.ValidationError({'quantity': str(e)})
@@ -0,0 +1,47 @@
+"""
+Vectorised simple exponential smoothing. Kept free of Django imports so
+process-pool workers can load it without setting Django up.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Smoothing factors tried for every series; each series keeps the one with the lowest one-step error.
+ALPHAS = np.round(np.linspace(0.05, 0.95, 19), 2)
+INITIAL_PERIODS = 4
+# Below this many series a pool costs more than it saves.
+MIN_SERIES_PER_WORKER = 500
+
+
+def smooth(series, alphas=ALPHAS):
+    """
+    Fit every row of `series` (products x periods) for every alpha at once.
+    Returns per row the chosen alpha, the final level (the forecast for each
+    coming period) and the root mean squared one-step-ahead error.
+    """
+    series = np.asarray(series, dtype=np.float64)
+    count, periods = series.shape
+    if not count or not periods:
+        return np.zeros(count), np.zeros(count), np.zeros(count)
+    alpha = np.asarray(alphas, dtype=np.float64)[:, None]
+    start = min(INITIAL_PERIODS, periods)
+    level = np.repeat(series[:, :start].mean(axis=1)[None, :], len(alphas), axis=0)
+    sse = np.zeros_like(level)
+    for t in range(start, periods):
+        error = series[:, t] - level
+        sse += error * error
+        level += alpha * error
+    best = sse.argmin(axis=0)
+    rows = np.arange(count)
+    rmse = np.sqrt(sse[best, rows] / max(periods - start, 1))
+    return alpha[best, 0], level[best, rows], rmse
+
+
+def smooth_parallel(series, workers=1):
+    """`smooth`, with the rows split across `workers` processes when there are enough of them."""
+    workers = max(1, min(workers, len(series) // MIN_SERIES_PER_WORKER))
+    if workers == 1:
+        return smooth(series)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(smooth, np.array_split(series, workers)))
+    return tuple(np.concatenate(column) for column in zip(*parts))
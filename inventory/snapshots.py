@@ -0,0 +1,108 @@
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Max, Min, Sum
+from django.utils import timezone
+
+from .models import Product, RemovalRequestItem, StockHistory, StockSnapshot
+
+BATCH_SIZE = 1000
+
+
+def end_of_day(day):
+    """The first instant after `day`, in the current time zone."""
+    return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def last_month_end(today=None):
+    today = today or timezone.localdate()
+    return today.replace(day=1) - timedelta(days=1)
+
+
+def stock_changes(start, end):
+    """
+    Net stock change per product between two instants: additions minus
+    deducted removals. Negative if `end` is before `start`.
+    """
+    sign = 1
+    if end < start:
+        start, end, sign = end, start, -1
+    changes = {}
+    added = (
+        StockHistory.objects.filter(added_on__gte=start, added_on__lt=end)
+        .values('product_id').order_by().annotate(total=Sum('quantity_added'))
+        .values_list('product_id', 'total')
+    )
+    removed = (
+        RemovalRequestItem.objects.filter(request__stock_deducted_on__gte=start, request__stock_deducted_on__lt=end)
+        .values('product_id').order_by().annotate(total=Sum('quantity'))
+        .values_list('product_id', 'total')
+    )
+    for product_id, total in added:
+        changes[product_id] = changes.get(product_id, 0) + sign * total
+    for product_id, total in removed:
+        changes[product_id] = changes.get(product_id, 0) - sign * total
+    return changes
+
+
+@transaction.atomic
+def take_snapshot(day=None):
+    """
+    Write every product's balance at the end of `day` (default: last month end),
+    worked back from the live stock_count. Re-running for the same day
+    overwrites it. Returns the number of rows written.
+    """
+    day = day or last_month_end()
+    boundary = end_of_day(day)
+    changes = stock_changes(timezone.now(), boundary)
+    # Products added after the day did not exist yet, whatever their history works back to.
+    products = Product.objects.filter(added_on__lt=boundary).order_by('pk').values_list('pk', 'stock_count')
+    rows = []
+    for product_id, stock_count in products.iterator(chunk_size=BATCH_SIZE):
+        balance = stock_count + changes.get(product_id, 0)
+        if balance > 0:
+            rows.append(StockSnapshot(product_id=product_id, snapshot_date=day, stock_count=balance))
+    StockSnapshot.objects.filter(snapshot_date=day).delete()
+    StockSnapshot.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def _nearest_base(day):
+    """The closest known balance to the end of `day`: a snapshot on either side, or the live stock."""
+    boundary = end_of_day(day)
+    now = timezone.now()
+    candidates = [(abs(now - boundary), None, now)]
+    before = StockSnapshot.objects.filter(snapshot_date__lte=day).aggregate(day=Max('snapshot_date'))['day']
+    after = StockSnapshot.objects.filter(snapshot_date__gt=day).aggregate(day=Min('snapshot_date'))['day']
+    for snapshot_date in (before, after):
+        if snapshot_date:
+            taken_at = end_of_day(snapshot_date)
+            candidates.append((abs(boundary - taken_at), snapshot_date, taken_at))
+    _, snapshot_date, taken_at = min(candidates, key=lambda candidate: candidate[0])
+    return snapshot_date, taken_at
+
+
+def stock_as_of(day, product_type=None):
+    """
+    Every product's stock at the end of `day`, from the nearest snapshot (or
+    the live stock) plus the additions and removals in between. Returns the
+    snapshot date used (None for live stock) and the rows.
+    """
+    boundary = end_of_day(day)
+    snapshot_date, taken_at = _nearest_base(day)
+    if snapshot_date:
+        base = dict(StockSnapshot.objects.filter(snapshot_date=snapshot_date).values_list('product_id', 'stock_count'))
+    else:
+        base = None
+    changes = stock_changes(taken_at, boundary)
+
+    products = Product.objects.filter(added_on__lt=boundary).order_by('product_name', 'pk')
+    if product_type:
+        products = products.filter(type=product_type)
+    rows = []
+    for product in products.values('id', 'product_id', 'product_name', 'part_no', 'type', 'category_path', 'stock_count').iterator(chunk_size=BATCH_SIZE):
+        current = product.pop('stock_count')
+        balance = (current if base is None else base.get(product['id'], 0)) + changes.get(product['id'], 0)
+        product['stock_count'] = max(balance, 0)
+        rows.append(product)
+    return snapshot_date, rows
@@ -1,3 +1,145 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .autocomplete import autocomplete
+from .locations import move
+from .models import Category, Location, LocationStock, Product, RemovalRequest, RemovalRequestItem, SubCategory
+from .scan import _entries, invalidate_scans, scan
+from .snapshots import take_snapshot
+
+
+class UnlocatedRemovalTests(TestCase):
+
+    def setUp(self):
+        self.product = Product.objects.create(
+            type='local', product_name='Bolt', part_no='B-1', storage_location='A1', measurement_unit='pcs',
+            stock_count=10, quantity_added=10,
+        )
+        self.big = Location.objects.create(code='A1', name='Aisle 1')
+        self.small = Location.objects.create(code='A2', name='Aisle 2')
+        # 8 of the 10 are located: 5 in A1, 3 in A2, 2 unlocated.
+        move(self.product.pk, self.big.pk, 5, 'receipt')
+        move(self.product.pk, self.small.pk, 3, 'receipt')
+
+    def remove(self, quantity):
+        request = RemovalRequest.objects.create(type='local', removal_type='sales')
+        RemovalRequestItem.objects.create(request=request, product=self.product, quantity=quantity)
+        request.deduct_stock()
+
+    def located(self):
+        return dict(LocationStock.objects.filter(product=self.product).values_list('location__code', 'quantity'))
+
+    def test_unlocated_stock_goes_first(self):
+        self.remove(2)
+        self.assertEqual(self.located(), {'A1': 5, 'A2': 3})
+
+    def test_excess_comes_off_the_fullest_locations(self):
+        self.remove(6)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_count, 4)
+        self.assertEqual(self.located(), {'A1': 1, 'A2': 3})
+        self.assertLessEqual(sum(self.located().values()), self.product.stock_count)
+
+    def test_deleting_a_location_with_stock_is_a_bad_request(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='store'))
+        response = client.delete(f'/inventory/locations/{self.big.pk}/')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Location.objects.filter(pk=self.big.pk).exists())
+
+
+class ScanCacheTests(TestCase):
+
+    def setUp(self):
+        _entries.clear()
+        self.product = Product.objects.create(
+            type='local', product_name='Bolt', part_no='B-1', barcode='4006381333931', storage_location='A1',
+            measurement_unit='pcs', stock_count=10, quantity_added=10,
+        )
+
+    def test_cached_scan_is_dropped_once_the_product_is_invalidated(self):
+        self.assertEqual(scan(['4006381333931'])['4006381333931']['stock_count'], 10)
+        Product.objects.filter(pk=self.product.pk).update(stock_count=4)
+        # Still served from the cache until the product's shared version moves on.
+        self.assertEqual(scan(['4006381333931'])['4006381333931']['stock_count'], 10)
+        invalidate_scans([self.product.pk])
+        self.assertEqual(scan(['4006381333931'])['4006381333931']['stock_count'], 4)
+
+    def test_all_code_kinds_resolve(self):
+        results = scan(['B-1', self.product.product_id, 'missing'])
+        self.assertEqual(results['B-1']['matched_on'], 'part_no')
+        self.assertEqual(results[self.product.product_id]['matched_on'], 'product_id')
+        self.assertIsNone(results['missing'])
+
+
+class AutocompleteCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(
+            type='local', product_name='Bolt', part_no='B-1', storage_location='A1', measurement_unit='pcs',
+            stock_count=10, quantity_added=10,
+        )
+
+    def test_deduction_refreshes_cached_stock_once_committed(self):
+        self.assertEqual(autocomplete('local', 'bolt')[0]['stock_count'], 10)
+        request = RemovalRequest.objects.create(type='local', removal_type='sales')
+        RemovalRequestItem.objects.create(request=request, product=self.product, quantity=4)
+        with self.captureOnCommitCallbacks(execute=True):
+            request.deduct_stock()
+            self.assertEqual(autocomplete('local', 'bolt')[0]['stock_count'], 10)
+        self.assertEqual(autocomplete('local', 'bolt')[0]['stock_count'], 6)
+
+
+class SnapshotTests(TestCase):
+
+    def test_products_added_after_the_day_are_left_out(self):
+        Product.objects.create(
+            type='local', product_name='Bolt', part_no='B-1', storage_location='A1', measurement_unit='pcs',
+            stock_count=10, quantity_added=10,
+        )
+        self.assertEqual(take_snapshot(timezone.localdate() - timedelta(days=1)), 0)
+        self.assertEqual(take_snapshot(timezone.localdate()), 1)
+
+
+class CategoryPathTests(TestCase):
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Fasteners')
+        self.subcategory = SubCategory.objects.create(name='Bolts', category=self.category)
+        self.product = Product.objects.create(
+            type='local', product_name='Bolt', part_no='B-1', storage_location='A1', measurement_unit='pcs',
+            category=self.category, subcategory=self.subcategory,
+        )
+
+    def path(self):
+        self.product.refresh_from_db()
+        return self.product.category_path
+
+    def test_rename_and_deletes_refresh_stored_paths(self):
+        self.assertEqual(self.path(), 'Fasteners / Bolts')
+        self.category.name = 'Hardware'
+        self.category.save()
+        self.assertEqual(self.path(), 'Hardware / Bolts')
+        self.subcategory.delete()
+        self.assertEqual(self.path(), 'Hardware')
+        self.category.delete()
+        self.assertEqual(self.path(), '')
 
-# Create your tests here.
+    def test_product_list_reads_the_category_tree_once(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='store'))
+        for number in range(2, 6):
+            Product.objects.create(
+                type='local', product_name='Bolt', part_no=f'B-{number}', storage_location='A1', measurement_unit='pcs',
+                category=self.category, subcategory=self.subcategory,
+            )
+        client.get('/inventory/local/products/')
+        with self.assertNumQueries(1):
+            response = client.get('/inventory/local/products/')
+        self.assertEqual(response.json()[0]['subcategory']['category']['name'], 'Fasteners')
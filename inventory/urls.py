@@ -2,9 +2,12 @@ from django.urls import path
 from .views import (
     CategoryListCreateView, CategoryDetailView,
     SubCategoryListCreateView, SubCategoryDetailView,
-    ProductListCreateView, ProductDetailView,
+    ProductListCreateView, ProductDetailView, ProductAutocompleteView, LowStockProductListView,
+    ProductForecastListView, ScanLookupView,
     StockHistoryListCreateView, StockHistoryDetailView,
-    RemovalRequestListCreateView, RemovalRequestDetailView
+    RemovalRequestListCreateView, RemovalRequestDetailView,
+    InventoryValuationView, StockAsOfView, ProductLocationsView,
+    LocationListCreateView, LocationDetailView, LocationStockView, StockTransferListCreateView
 )
 
 urlpatterns = [
@@ -12,8 +15,19 @@ urlpatterns = [
     path('categories/<int:pk>/', CategoryDetailView.as_view(), name='category-detail'),
     path('subcategories/', SubCategoryListCreateView.as_view(), name='subcategory-list-create'),
     path('subcategories/<int:pk>/', SubCategoryDetailView.as_view(), name='subcategory-detail'),
+    path('locations/', LocationListCreateView.as_view(), name='location-list-create'),
+    path('locations/<int:pk>/', LocationDetailView.as_view(), name='location-detail'),
+    path('locations/<int:pk>/stock/', LocationStockView.as_view(), name='location-stock'),
+    path('transfers/', StockTransferListCreateView.as_view(), name='stock-transfer-list-create'),
+    path('scan/', ScanLookupView.as_view(), name='scan-lookup'),
+    path('stock-as-of/', StockAsOfView.as_view(), name='stock-as-of'),
+    path('valuation/', InventoryValuationView.as_view(), name='inventory-valuation'),
     path('<str:type>/products/', ProductListCreateView.as_view(), name='product-list-create'),
+    path('<str:type>/products/autocomplete/', ProductAutocompleteView.as_view(), name='product-autocomplete'),
+    path('<str:type>/products/low-stock/', LowStockProductListView.as_view(), name='product-low-stock'),
+    path('<str:type>/products/forecasts/', ProductForecastListView.as_view(), name='product-forecasts'),
     path('<str:type>/products/<int:pk>/', ProductDetailView.as_view(), name='product-detail'),
+    path('<str:type>/products/<int:pk>/locations/', ProductLocationsView.as_view(), name='product-locations'),
     path('<str:type>/stock-history/', StockHistoryListCreateView.as_view(), name='stock-history-list-create'),
     path('<str:type>/stock-history/<int:pk>/', StockHistoryDetailView.as_view(), name='stock-history-detail'),
     path('<str:type>/removal-requests/', RemovalRequestListCreateView.as_view(), name='removal-request-list-create'),
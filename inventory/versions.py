@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def shared_cache():
+    """The cache every worker process sees. It holds only the version keys of the per-process caches."""
+    return caches['shared']
+
+
+class SharedVersion:
+    """
+    A counter in the shared cache that a per-process cache is checked against. Each process
+    re-reads it at most every CACHE_VERSION_CHECK_SECONDS, so a bump from another process is
+    seen within that interval; a bump from this process is seen on the next read.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.value = None
+        self.read_at = 0
+
+    def get(self):
+        if self.value is None or time.monotonic() - self.read_at > settings.CACHE_VERSION_CHECK_SECONDS:
+            self.value = shared_cache().get_or_set(self.key, 1, None)
+            self.read_at = time.monotonic()
+        return self.value
+
+    def bump(self):
+        try:
+            shared_cache().incr(self.key)
+        except ValueError:
+            shared_cache().set(self.key, 1, None)
+        self.value = None
@@ -1,16 +1,31 @@
 from rest_framework import generics
-from rest_framework.exceptions import ValidationError
-from .models import Category, SubCategory, Product, StockHistory, RemovalRequest, RemovalRequestItem
+from rest_framework.exceptions import NotFound, ValidationError
+from .models import Category, SubCategory, Product, StockHistory, RemovalRequest, RemovalRequestItem, Location, StockTransfer
 from .serializers import (
     CategorySerializer, SubCategorySerializer, ProductSerializer,
-    StockHistorySerializer, RemovalRequestSerializer
+    StockHistorySerializer, RemovalRequestSerializer, LocationSerializer, StockTransferSerializer
 )
 from django.db import transaction
+from django.db.models import ProtectedError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .autocomplete import autocomplete
+from .categories import category_tree
+from .replenishment import low_stock_products
+from .forecasting import purchasing_forecasts
+from .scan import MAX_BATCH_SIZE as MAX_SCAN_BATCH_SIZE, scan
+from .costing import receive, valuation_report, write_off_report
+from .locations import move, stock_by_location, product_locations
+from .snapshots import stock_as_of
+from datetime import date
 
 class CategoryListCreateView(generics.ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
+    def list(self, request, *args, **kwargs):
+        return Response(list(category_tree().categories.values()))
+
 class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -19,6 +34,9 @@ class SubCategoryListCreateView(generics.ListCreateAPIView):
     queryset = SubCategory.objects.all()
     serializer_class = SubCategorySerializer
 
+    def list(self, request, *args, **kwargs):
+        return Response(list(category_tree().subcategories.values()))
+
 class SubCategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = SubCategory.objects.all()
     serializer_class = SubCategorySerializer
@@ -30,11 +48,97 @@ class ProductListCreateView(generics.ListCreateAPIView):
         type_param = self.kwargs['type']
         if type_param not in ['local', 'imported']:
             raise ValidationError({'type': 'Invalid type. Must be "local" or "imported".'})
-        return Product.objects.filter(type=type_param)
+        return Product.objects.filter(type=type_param).select_related('added_by')
 
     def perform_create(self, serializer):
         serializer.save(added_by=self.request.user)
 
+class ProductAutocompleteView(APIView):
+    """Lightweight product picker lookup: ?q=<prefix>[&limit=10]."""
+
+    def get(self, request, type):
+        if type not in ['local', 'imported']:
+            raise ValidationError({'type': 'Invalid type. Must be "local" or "imported".'})
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            raise ValidationError({'limit': 'Limit must be an integer.'})
+        return Response(autocomplete(type, request.query_params.get('q', ''), limit))
+
+class ScanLookupView(APIView):
+    """
+    Resolve scanned barcodes, part numbers or product ids to products with stock.
+    GET ?code=<code> for one scan; POST {"codes": [...]} for a pallet.
+    """
+
+    def get(self, request):
+        code = request.query_params.get('code', '').strip()
+        if not code:
+            raise ValidationError({'code': 'A code is required.'})
+        product = scan([code])[code]
+        if product is None:
+            raise NotFound(f"No product with barcode, part number or product id {code}.")
+        return Response(product)
+
+    def post(self, request):
+        codes = request.data.get('codes')
+        if not isinstance(codes, list) or not all(isinstance(code, str) for code in codes):
+            raise ValidationError({'codes': 'Provide a list of codes.'})
+        if len(codes) > MAX_SCAN_BATCH_SIZE:
+            raise ValidationError({'codes': f'At most {MAX_SCAN_BATCH_SIZE} codes per request.'})
+        results = scan(codes)
+        # Scans come back in the order given, repeats included, so the caller can count a pallet.
+        return Response({
+            'results': [{'code': code, 'product': results.get(code.strip())} for code in codes],
+            'not_found': sorted({code.strip() for code in codes if code.strip() and results.get(code.strip()) is None}),
+        })
+
+class LowStockProductListView(APIView):
+    """Products below their reorder point, as last computed by `compute_reorder_points`."""
+
+    def get(self, request, type):
+        if type not in ['local', 'imported']:
+            raise ValidationError({'type': 'Invalid type. Must be "local" or "imported".'})
+        return Response(list(low_stock_products(type)))
+
+class InventoryValuationView(APIView):
+    """Stock value and deadstock write-offs per type and category: ?start=&end= (YYYY-MM-DD) bound the write-offs."""
+
+    def get(self, request):
+        try:
+            start = request.query_params.get('start')
+            end = request.query_params.get('end')
+            start = date.fromisoformat(start) if start else None
+            end = date.fromisoformat(end) if end else None
+        except ValueError:
+            raise ValidationError({"detail": "Dates must be in YYYY-MM-DD format."})
+        return Response({
+            'valuation': valuation_report(),
+            'write_offs': write_off_report(start, end),
+        })
+
+class StockAsOfView(APIView):
+    """Stock per product at the end of ?date=YYYY-MM-DD, optionally for one &type=."""
+
+    def get(self, request):
+        product_type = request.query_params.get('type')
+        if product_type and product_type not in ['local', 'imported']:
+            raise ValidationError({'type': 'Invalid type. Must be "local" or "imported".'})
+        try:
+            day = date.fromisoformat(request.query_params.get('date', ''))
+        except ValueError:
+            raise ValidationError({"date": "Date must be in YYYY-MM-DD format."})
+        snapshot_date, rows = stock_as_of(day, product_type)
+        return Response({'date': day, 'snapshot_date': snapshot_date, 'products': rows})
+
+class ProductForecastListView(APIView):
+    """Stored demand forecasts and suggested order quantities, as last computed by `compute_forecasts`."""
+
+    def get(self, request, type):
+        if type not in ['local', 'imported']:
+            raise ValidationError({'type': 'Invalid type. Must be "local" or "imported".'})
+        return Response(list(purchasing_forecasts(type)))
+
 class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProductSerializer
 
@@ -44,6 +148,14 @@ class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
             raise ValidationError({'type': 'Invalid type. Must be "local" or "imported".'})
         return Product.objects.filter(type=type_param)
 
+class ProductLocationsView(APIView):
+    """Where a product is held, per location."""
+
+    def get(self, request, type, pk):
+        if type not in ['local', 'imported']:
+            raise ValidationError({'type': 'Invalid type. Must be "local" or "imported".'})
+        return Response(list(product_locations(pk)))
+
 class StockHistoryListCreateView(generics.ListCreateAPIView):
     serializer_class = StockHistorySerializer
 
@@ -57,10 +169,14 @@ class StockHistoryListCreateView(generics.ListCreateAPIView):
         with transaction.atomic():
             product = serializer.validated_data['product']
             quantity_added = serializer.validated_data['quantity_added']
+            on_hand_before = product.stock_count
             product.stock_count += quantity_added
             product.quantity_added += quantity_added
             product.save()
-            serializer.save(added_by=self.request.user)
+            stock_history = serializer.save(added_by=self.request.user)
+            receive(stock_history, on_hand_before)
+            if stock_history.location_id:
+                move(product.pk, stock_history.location_id, quantity_added, 'receipt', self.request.user, stock_history=stock_history)
 
 class StockHistoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = StockHistorySerializer
@@ -92,44 +208,21 @@ class RemovalRequestDetailView(generics.RetrieveUpdateDestroyAPIView):
             raise ValidationError({'type': 'Invalid type. Must be "local" or "imported".'})
         return RemovalRequest.objects.filter(type=type_param)
 
+    @transaction.atomic
     def perform_update(self, serializer):
         instance = serializer.save()
         print(f"Updated RemovalRequest {instance.request_no}")
-        if (
-            instance.accounts_status == "approved"
-            and instance.gm_status == "approved"
-            and instance.mgmt_status == "approved"
-            and not instance.stock_deducted
-        ):
+        if instance.is_approved and not instance.stock_deducted:
             print(f"All statuses approved for RemovalRequest {instance.request_no}, deducting stock")
             try:
-                with transaction.atomic():
-                    for item in instance.items.select_related('product').all():
-                        product = item.product
-                        if product.stock_count >= item.quantity and product.quantity_added >= item.quantity:
-                            print(
-                                f"Deducting {item.quantity} from {product.product_name} "
-                                f"(current stock_count: {product.stock_count}, quantity_added: {product.quantity_added})"
-                            )
-                            product.stock_count -= item.quantity
-                            product.quantity_added -= item.quantity
-                            product.save()
-                        else:
-                            error_message = (
-                                f"Insufficient values for {product.product_name}: "
-                                f"Requested {item.quantity}, "
-                                f"Available stock_count: {product.stock_count}, "
-                                f"Available quantity_added: {product.quantity_added}"
-                            )
-                            print(error_message)
-                            raise ValueError(error_message)
-                    instance.stock_deducted = True
-                    instance.save()
-                    print(f"Stock deducted and stock_deducted set to True for RemovalRequest {instance.request_no}")
-            except Exception as e:
+                instance.deduct_stock()
+            except ValueError as e:
                 print(f"Error deducting stock for RemovalRequest {instance.request_no}: {str(e)}")
-                raise
+                raise ValidationError({'stock': str(e)})
+            print(f"Stock deducted and stock_deducted set to True for RemovalRequest {instance.request_no}")
         else:
+            # Rejection releases the held stock; moving back to pending holds it again.
+            instance.sync_reservations()
             print(
                 f"Conditions not met for stock deduction: "
                 f"accounts_status={instance.accounts_status}, "
@@ -137,3 +230,30 @@ class RemovalRequestDetailView(generics.RetrieveUpdateDestroyAPIView):
                 f"mgmt_status={instance.mgmt_status}, "
                 f"stock_deducted={instance.stock_deducted}"
             )
+
+class LocationListCreateView(generics.ListCreateAPIView):
+    queryset = Location.objects.all().order_by('code')
+    serializer_class = LocationSerializer
+
+class LocationDetailView(generics.RetrieveUpdateDestroyAPIView):
+    queryset = Location.objects.all()
+    serializer_class = LocationSerializer
+
+    def perform_destroy(self, instance):
+        try:
+            instance.delete()
+        except ProtectedError:
+            raise ValidationError({'location': f"Location {instance.code} still has stock, movements or child locations; deactivate it instead."})
+
+class LocationStockView(APIView):
+    """Every product held in a location."""
+
+    def get(self, request, pk):
+        return Response(list(stock_by_location(pk)))
+
+class StockTransferListCreateView(generics.ListCreateAPIView):
+    queryset = StockTransfer.objects.select_related('transferred_by').order_by('-transferred_on')
+    serializer_class = StockTransferSerializer
+
+    def perform_create(self, serializer):
+        serializer.save(transferred_by=self.request.user)
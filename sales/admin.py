@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Contact, Inquiry, Quote, QuoteProduct, OutgoingMail, OrderService, SalesOrder, JobCard
+from .models import Contact, Inquiry, Quote, QuoteProduct, QuoteRevision, OutgoingMail, OrderService, SalesOrder, JobCard, JobCardMaterial
 
 
 admin.site.register([
@@ -7,8 +7,10 @@ admin.site.register([
     Inquiry,
     Quote,
     QuoteProduct,
+    QuoteRevision,
     OutgoingMail,
     OrderService,
     SalesOrder,
     JobCard,
+    JobCardMaterial,
 ])
\ No newline at end of file
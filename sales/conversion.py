@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Quote, SalesOrder
+from .serializers import SalesOrderSerializer
+
+MAX_BATCH_SIZE = 100
+# Order fields the quote does not carry; the caller supplies them (lpo_no, address and terms are required).
+ORDER_FIELDS = (
+    'lpo_no', 'address', 'subject', 'issue_date', 'currency', 'payment_terms', 'delivery_terms',
+    'cust_ref', 'terms_and_conditions', 'remarks', 'advance_amount', 'company_email',
+)
+
+
+def order_data(quote, fields):
+    """SalesOrderSerializer input for `quote`, with its products as order lines."""
+    data = {
+        'company': quote.company_id,
+        'company_name': quote.company_name,
+        'contact_email': quote.contact_email,
+        'company_email': quote.company_email,
+        'subject': quote.quote_title,
+        'our_ref': quote.quote_no,
+        'remarks': quote.notes_remarks,
+        'issue_date': timezone.localdate(),
+        'currency': SalesOrder._meta.get_field('currency').default,
+        'vat_percentage': quote.vat_percentage if quote.vat_applicable else 0,
+        'order_services': [
+            {
+                'inventory_product': line.inventory_product_id,
+                'service_title': line.product,
+                'qty': line.qty,
+                'rate': line.unit_price,
+                'unit': line.inventory_product.measurement_unit if line.inventory_product else '',
+                'barcode': (line.inventory_product.barcode or '') if line.inventory_product else '',
+            }
+            for line in quote.products.all()
+        ],
+    }
+    data.update({field: fields[field] for field in ORDER_FIELDS if field in fields})
+    return data
+
+
+@transaction.atomic
+def convert_quote(quote_id, fields, request):
+    """
+    Create a sales order from a quote and its products, link it to the quote
+    and close the quote. Raises a ValidationError if the quote was converted already.
+    """
+    try:
+        quote = (
+            Quote.objects.select_for_update()
+            .prefetch_related('products__inventory_product')
+            .get(pk=quote_id)
+        )
+    except (Quote.DoesNotExist, TypeError, ValueError):
+        raise serializers.ValidationError({"quote": f"Quote {quote_id} does not exist."})
+    existing = SalesOrder.objects.filter(source_quote=quote).values_list('order_no', flat=True).first()
+    if existing:
+        raise serializers.ValidationError({"quote": f"Quote {quote.quote_no} is already converted to sales order {existing}."})
+    if not quote.products.all():
+        raise serializers.ValidationError({"quote": f"Quote {quote.quote_no} has no products to order."})
+
+    serializer = SalesOrderSerializer(data=order_data(quote, fields), context={'request': request})
+    serializer.is_valid(raise_exception=True)
+    sales_order = serializer.save(created_by=request.user, source_quote=quote)
+    quote.status = 'closed'
+    quote.save(update_fields=['status'])
+    return sales_order
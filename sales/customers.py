@@ -0,0 +1,108 @@
+from django.db.models import Count, F, Max, Q, Sum, Window
+from django.db.models.functions import RowNumber
+
+from .models import Contact, Inquiry, JobCard, OutgoingMail, Quote, SalesOrder
+from .pricing import ZERO
+
+LATEST_ITEMS = 5
+MAX_BATCH_SIZE = 100
+
+# For each document type: its model, date field, the statuses that still count as
+# open, the money field that is summed (if any) and the fields listed as latest items.
+SECTIONS = {
+    'inquiries': {
+        'model': Inquiry, 'date_field': 'created_on', 'open_statuses': ('new', 'open'),
+        'value_field': None, 'fields': ('id', 'status', 'inquiry', 'created_on'),
+    },
+    'quotes': {
+        'model': Quote, 'date_field': 'create_date', 'open_statuses': ('new', 'open'),
+        'value_field': 'grand_total', 'fields': ('id', 'quote_no', 'quote_title', 'status', 'grand_total', 'create_date'),
+    },
+    'outgoing_mails': {
+        'model': OutgoingMail, 'date_field': 'created_on', 'open_statuses': ('new', 'open'),
+        'value_field': None, 'fields': ('id', 'mail_subject', 'status', 'created_on'),
+    },
+    'sales_orders': {
+        'model': SalesOrder, 'date_field': 'created_on', 'open_statuses': ('new', 'job_card_created'),
+        'value_field': 'net_total', 'fields': ('id', 'order_no', 'lpo_no', 'status', 'net_total', 'created_on'),
+    },
+    'job_cards': {
+        'model': JobCard, 'date_field': 'created_on', 'open_statuses': ('in_progress',),
+        'value_field': None, 'fields': ('id', 'job_card_no', 'sales_order', 'sales_order_number', 'status', 'created_on'),
+    },
+}
+
+
+def _aggregates(section, contact_ids):
+    open_filter = Q(status__in=section['open_statuses'])
+    annotations = {
+        'count': Count('pk'),
+        'open_count': Count('pk', filter=open_filter),
+        'last_activity': Max(section['date_field']),
+    }
+    if section['value_field']:
+        annotations['total_value'] = Sum(section['value_field'])
+        annotations['open_value'] = Sum(section['value_field'], filter=open_filter)
+    rows = (
+        section['model'].objects.filter(company__in=contact_ids)
+        .values('company').order_by('company').annotate(**annotations)
+    )
+    return {row.pop('company'): row for row in rows}
+
+
+def _latest(section, contact_ids, limit):
+    # Top-N per company in one query, ranked by a window over (company, date).
+    date_field = section['date_field']
+    rows = (
+        section['model'].objects.filter(company__in=contact_ids)
+        .annotate(rank=Window(RowNumber(), partition_by=F('company'), order_by=[F(date_field).desc(), F('pk').desc()]))
+        .filter(rank__lte=limit)
+        .order_by('company', 'rank')
+        .values('company', *section['fields'])
+    )
+    latest = {}
+    for row in rows:
+        latest.setdefault(row.pop('company'), []).append(row)
+    return latest
+
+
+def _empty_section(section):
+    summary = {'count': 0, 'open_count': 0, 'last_activity': None}
+    if section['value_field']:
+        summary.update(total_value=ZERO, open_value=ZERO)
+    return summary
+
+
+def customer_summaries(contacts, limit=LATEST_ITEMS):
+    """
+    Build the customer-360 summary for each contact: per document type the
+    count, open count, last activity, money totals and the latest few items,
+    plus the open pipeline value (open quotes and sales orders).
+
+    Runs two grouped queries per document type however many contacts are
+    asked for. Returns {contact pk: summary} in the order given.
+    """
+    contacts = list(contacts)
+    contact_ids = [contact.pk for contact in contacts]
+    results = {
+        contact.pk: {'id': contact.pk, 'company_name': contact.company_name, 'contact_name': contact.contact_name}
+        for contact in contacts
+    }
+    for contact_id in contact_ids:
+        results[contact_id]['open_pipeline_value'] = ZERO
+
+    for name, section in SECTIONS.items():
+        aggregates = _aggregates(section, contact_ids)
+        latest = _latest(section, contact_ids, limit)
+        for contact_id in contact_ids:
+            summary = _empty_section(section)
+            summary.update({key: value for key, value in aggregates.get(contact_id, {}).items() if value is not None})
+            summary['latest'] = latest.get(contact_id, [])
+            results[contact_id][name] = summary
+            if section['value_field']:
+                results[contact_id]['open_pipeline_value'] += summary['open_value']
+    return results
+
+
+def customer_summary(contact, limit=LATEST_ITEMS):
+    return customer_summaries([contact], limit)[contact.pk]
@@ -0,0 +1,434 @@
+from functools import lru_cache
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from reportlab.lib.colors import HexColor
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, HRFlowable
+
+from backend.tasks import enqueue
+
+COMPANY_NAME = "Your Company Name"
+FOOTER_CONTACT = "Contact: info@yourcompany.com | +1-123-456-7890"
+
+
+@lru_cache(maxsize=None)
+def get_styles():
+    """Colors, paragraph styles and base table commands, built once per process."""
+    colors = {
+        'text': HexColor("#333333"),
+        'header': HexColor("#000000"),
+        'accent': HexColor("#22c55e"),
+        'error': HexColor("#dc2626"),
+        'table_header': HexColor("#d1d5db"),
+        'table_row1': HexColor("#ffffff"),
+        'table_row2': HexColor("#f5f5f4"),
+        'background': HexColor("#f3f4f6"),
+    }
+    paragraphs = {
+        'title': ParagraphStyle(
+            name='Title', fontName='Helvetica-Bold', fontSize=16, textColor=colors['header'],
+            leading=20, alignment=1, spaceAfter=12,
+        ),
+        'subtitle': ParagraphStyle(
+            name='Subtitle', fontName='Helvetica-Bold', fontSize=12, textColor=colors['text'],
+            leading=15, spaceAfter=8,
+        ),
+        'normal': ParagraphStyle(
+            name='Normal', fontName='Helvetica', fontSize=10, textColor=colors['text'],
+            leading=12, spaceAfter=6,
+        ),
+        'total': ParagraphStyle(
+            name='Total', fontName='Helvetica-Bold', fontSize=11, textColor=colors['accent'],
+            leading=14, spaceAfter=6,
+        ),
+        'notes': ParagraphStyle(
+            name='Notes', fontName='Helvetica', fontSize=10, textColor=colors['text'],
+            leading=12, spaceAfter=6, leftIndent=6, rightIndent=6,
+            borderWidth=1, borderColor=colors['text'], borderPadding=6,
+        ),
+    }
+    table_commands = (
+        ('BACKGROUND', (0, 0), (-1, 0), colors['table_header']),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors['text']),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors['text']),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    )
+    return {'colors': colors, 'paragraphs': paragraphs, 'table': table_commands}
+
+
+# Reusable components. Each returns a list of flowables.
+
+def divider(styles):
+    return [HRFlowable(width="100%", thickness=1, color=styles['colors']['text'], spaceAfter=0.1*inch)]
+
+
+def header(styles, title, subtitle_lines):
+    p = styles['paragraphs']
+    elements = [
+        Paragraph(COMPANY_NAME, p['title']),
+        Paragraph(title, p['title']),
+    ]
+    elements += divider(styles)
+    elements += [Paragraph(line, p['subtitle']) for line in subtitle_lines]
+    elements.append(Spacer(1, 0.25*inch))
+    return elements
+
+
+def info_block(styles, heading, lines):
+    p = styles['paragraphs']
+    elements = [Paragraph(heading, p['subtitle'])] if heading else []
+    elements += [Paragraph(line, p['normal']) for line in lines]
+    elements.append(Spacer(1, 0.25*inch))
+    elements += divider(styles)
+    return elements
+
+
+def line_table(styles, columns, rows, col_widths):
+    data = [columns] + rows
+    commands = list(styles['table'])
+    for i in range(1, len(data)):
+        bg_color = styles['colors']['table_row1'] if i % 2 == 0 else styles['colors']['table_row2']
+        commands.append(('BACKGROUND', (0, i), (-1, i), bg_color))
+    table = Table(data, colWidths=[w*inch for w in col_widths])
+    table.setStyle(TableStyle(commands))
+    return [table, Spacer(1, 0.25*inch)]
+
+
+def totals_block(styles, lines, grand_total_line):
+    p = styles['paragraphs']
+    elements = [Paragraph(line, p['normal']) for line in lines]
+    elements.append(Paragraph(grand_total_line, p['total']))
+    elements.append(Spacer(1, 0.25*inch))
+    elements += divider(styles)
+    return elements
+
+
+def notes_block(styles, heading, text):
+    if not text:
+        return []
+    p = styles['paragraphs']
+    return [Paragraph(heading, p['subtitle']), Paragraph(text, p['notes']), Spacer(1, 0.25*inch)]
+
+
+def footer(styles, text=FOOTER_CONTACT):
+    def draw(canvas, doc):
+        canvas.saveState()
+        canvas.setFont('Helvetica', 9)
+        canvas.setFillColor(styles['colors']['text'])
+        canvas.drawString(0.5*inch, 0.3*inch, f"Page {doc.page}")
+        canvas.drawRightString(doc.rightMargin + doc.width, 0.3*inch, text)
+        canvas.restoreState()
+    return draw
+
+
+# Document definitions. `context` turns a model instance into plain data and
+# `build` turns that data into flowables, so a document can also be rendered
+# from stored data rather than a live instance.
+
+class QuoteDocument:
+    field_name = 'invoice_pdf'
+
+    @staticmethod
+    def filename(quote):
+        return f"invoice_{quote.quote_no}_{quote.id}.pdf"
+
+    @staticmethod
+    def context(quote):
+        return {
+            'quote_no': quote.quote_no,
+            'create_date': quote.create_date.strftime('%B %d, %Y'),
+            'company_name': quote.company_name,
+            'contact_name': quote.contact_name,
+            'contact_email': quote.contact_email,
+            'contact_number': quote.contact_number,
+            'company_email': quote.company_email,
+            'quote_title': quote.quote_title,
+            'year': quote.year,
+            'status': quote.get_status_display(),
+            'assign_to': quote.assign_to.username if quote.assign_to else None,
+            'created_by': quote.created_by.username if quote.created_by else None,
+            'products': [
+                {
+                    'product': product.product,
+                    'specification': product.specification,
+                    'qty': product.qty,
+                    'unit_price': float(product.unit_price),
+                    'total_price': float(product.total_price),
+                }
+                for product in quote.products.all()
+            ],
+            'subtotal': float(quote.subtotal),
+            'vat_applicable': quote.vat_applicable,
+            'vat_percentage': float(quote.vat_percentage),
+            'vat_amount': float(quote.vat_amount),
+            'grand_total': float(quote.grand_total),
+            'notes_remarks': quote.notes_remarks,
+        }
+
+    @staticmethod
+    def build(ctx, styles):
+        elements = header(styles, "Invoice", [f"Quote No: {ctx['quote_no']}", f"Date: {ctx['create_date']}"])
+        elements += info_block(styles, "Bill To:", [
+            ctx['company_name'],
+            f"Contact: {ctx['contact_name'] or '-'}",
+            f"Email: {ctx['contact_email']}",
+            f"Phone: {ctx['contact_number'] or '-'}",
+            f"Company Email: {ctx['company_email'] or '-'}",
+        ])
+        elements += [Paragraph(f"Quote Title: {ctx['quote_title']}", styles['paragraphs']['subtitle'])]
+        elements += info_block(styles, None, [
+            f"Year: {ctx['year']}",
+            f"Status: {ctx['status']}",
+            f"Assigned To: {ctx['assign_to'] or '-'}",
+            f"Created By: {ctx['created_by'] or '-'}",
+        ])
+        elements += line_table(
+            styles,
+            ['Product', 'Specification', 'Quantity', 'Unit Price', 'Total'],
+            [
+                [p['product'], p['specification'] or '-', str(p['qty']), f"${p['unit_price']:.2f}", f"${p['total_price']:.2f}"]
+                for p in ctx['products']
+            ],
+            [2, 2, 0.8, 1, 1],
+        )
+        elements += totals_block(
+            styles,
+            [
+                f"Subtotal: ${ctx['subtotal']:.2f}",
+                f"VAT ({ctx['vat_percentage']}%): ${ctx['vat_amount']:.2f}" if ctx['vat_applicable'] else "VAT: $0.00",
+            ],
+            f"Grand Total: ${ctx['grand_total']:.2f}",
+        )
+        elements += notes_block(styles, "Notes/Remarks:", ctx['notes_remarks'])
+        return elements
+
+
+class SalesOrderDocument:
+    field_name = 'order_pdf'
+
+    @staticmethod
+    def filename(order):
+        return f"sales_order_{order.order_no}_{order.id}.pdf"
+
+    @staticmethod
+    def context(order):
+        return {
+            'order_no': order.order_no,
+            'lpo_no': order.lpo_no,
+            'issue_date': order.issue_date.strftime('%B %d, %Y'),
+            'currency': order.currency,
+            'company_name': order.company_name,
+            'contact_name': order.contact_name,
+            'contact_email': order.contact_email,
+            'contact_number': order.contact_number,
+            'company_email': order.company_email,
+            'address': order.address,
+            'subject': order.subject,
+            'cust_ref': order.cust_ref,
+            'our_ref': order.our_ref,
+            'payment_terms': order.payment_terms,
+            'delivery_terms': order.delivery_terms,
+            'services': [
+                {
+                    'sorp': service.sorp,
+                    'barcode': service.barcode,
+                    'service_title': service.service_title,
+                    'qty': service.qty,
+                    'unit': service.unit,
+                    'rate': float(service.rate),
+                    'amount': float(service.amount),
+                }
+                for service in order.order_services.all()
+            ],
+            'subtotal': float(order.subtotal),
+            'vat': float(order.vat),
+            'net_total': float(order.net_total),
+            'advance_amount': float(order.advance_amount),
+            'remarks': order.remarks,
+            'terms_and_conditions': order.terms_and_conditions,
+        }
+
+    @staticmethod
+    def build(ctx, styles):
+        currency = ctx['currency']
+        elements = header(styles, "Sales Order", [
+            f"Order No: {ctx['order_no']}",
+            f"LPO No: {ctx['lpo_no']}",
+            f"Issue Date: {ctx['issue_date']}",
+        ])
+        elements += info_block(styles, "Customer:", [
+            ctx['company_name'],
+            f"Contact: {ctx['contact_name'] or '-'}",
+            f"Email: {ctx['contact_email']}",
+            f"Phone: {ctx['contact_number'] or '-'}",
+            f"Company Email: {ctx['company_email'] or '-'}",
+            f"Address: {ctx['address']}",
+        ])
+        elements += [Paragraph(f"Subject: {ctx['subject']}", styles['paragraphs']['subtitle'])]
+        elements += info_block(styles, None, [
+            f"Customer Ref: {ctx['cust_ref'] or '-'}",
+            f"Our Ref: {ctx['our_ref'] or '-'}",
+            f"Payment Terms: {ctx['payment_terms']}",
+            f"Delivery Terms: {ctx['delivery_terms']}",
+        ])
+        elements += line_table(
+            styles,
+            ['S/P', 'Barcode', 'Service', 'Qty', 'Unit', 'Rate', 'Amount'],
+            [
+                [
+                    s['sorp'] or '-', s['barcode'] or '-', s['service_title'], str(s['qty']),
+                    s['unit'] or '-', f"{s['rate']:.2f}", f"{s['amount']:.2f}",
+                ]
+                for s in ctx['services']
+            ],
+            [0.6, 1, 2.2, 0.6, 0.6, 0.8, 1],
+        )
+        elements += totals_block(
+            styles,
+            [
+                f"Subtotal: {currency} {ctx['subtotal']:.2f}",
+                f"VAT: {currency} {ctx['vat']:.2f}",
+                f"Advance: {currency} {ctx['advance_amount']:.2f}",
+            ],
+            f"Net Total: {currency} {ctx['net_total']:.2f}",
+        )
+        elements += notes_block(styles, "Remarks:", ctx['remarks'])
+        elements += notes_block(styles, "Terms and Conditions:", ctx['terms_and_conditions'])
+        return elements
+
+
+class JobCardDocument:
+    field_name = 'job_card_pdf'
+
+    @staticmethod
+    def filename(job_card):
+        return f"job_card_{job_card.job_card_no}_{job_card.id}.pdf"
+
+    @staticmethod
+    def context(job_card):
+        return {
+            'job_card_no': job_card.job_card_no,
+            'sales_order_number': job_card.sales_order_number,
+            'created_on': job_card.created_on.strftime('%B %d, %Y'),
+            'company_name': job_card.company_name,
+            'contact_name': job_card.contact_name,
+            'contact_email': job_card.contact_email,
+            'contact_number': job_card.contact_number,
+            'quantity': job_card.quantity,
+            'status': job_card.get_status_display(),
+            'created_by': job_card.created_by.username if job_card.created_by else None,
+            'vehicles': [
+                {
+                    'chassis_number': vehicle.chassis_number,
+                    'vehicle_make': vehicle.vehicle_make,
+                    'vehicle_type': vehicle.vehicle_type,
+                    'specification': vehicle.specification,
+                    'remarks': vehicle.remarks,
+                }
+                for vehicle in job_card.vehicles.all()
+            ],
+            'remarks': job_card.remarks,
+        }
+
+    @staticmethod
+    def build(ctx, styles):
+        elements = header(styles, "Job Card", [
+            f"Job Card No: {ctx['job_card_no']}",
+            f"Sales Order No: {ctx['sales_order_number']}",
+            f"Date: {ctx['created_on']}",
+        ])
+        elements += info_block(styles, "Customer:", [
+            ctx['company_name'],
+            f"Contact: {ctx['contact_name'] or '-'}",
+            f"Email: {ctx['contact_email']}",
+            f"Phone: {ctx['contact_number'] or '-'}",
+        ])
+        elements += info_block(styles, None, [
+            f"Quantity: {ctx['quantity']}",
+            f"Status: {ctx['status']}",
+            f"Created By: {ctx['created_by'] or '-'}",
+        ])
+        elements += line_table(
+            styles,
+            ['Chassis No', 'Make', 'Type', 'Specification', 'Remarks'],
+            [
+                [
+                    v['chassis_number'], v['vehicle_make'] or '-', v['vehicle_type'] or '-',
+                    v['specification'] or '-', v['remarks'] or '-',
+                ]
+                for v in ctx['vehicles']
+            ],
+            [1.6, 1.1, 1.1, 1.7, 1.5],
+        )
+        elements += notes_block(styles, "Remarks:", ctx['remarks'])
+        return elements
+
+
+DOCUMENTS = {
+    'quote': QuoteDocument,
+    'sales_order': SalesOrderDocument,
+    'job_card': JobCardDocument,
+}
+
+
+def render_context(kind, ctx, output):
+    """Render a document context into `output` (a path or a writable file object)."""
+    styles = get_styles()
+    doc = SimpleDocTemplate(
+        output, pagesize=letter,
+        leftMargin=0.5*inch, rightMargin=0.5*inch, topMargin=0.5*inch, bottomMargin=0.5*inch,
+    )
+    draw_footer = footer(styles)
+    doc.build(DOCUMENTS[kind].build(ctx, styles), onFirstPage=draw_footer, onLaterPages=draw_footer)
+
+
+def render_document(kind, instance, output):
+    render_context(kind, DOCUMENTS[kind].context(instance), output)
+
+
+def _document_model(kind):
+    from .models import Quote, SalesOrder, JobCard
+    return {
+        'quote': Quote.objects.select_related('assign_to', 'created_by').prefetch_related('products'),
+        'sales_order': SalesOrder.objects.prefetch_related('order_services'),
+        'job_card': JobCard.objects.select_related('created_by').prefetch_related('vehicles'),
+    }[kind]
+
+
+def render_and_store(kind, pk):
+    """Render the document for one instance and store it on its PDF field."""
+    instance = _document_model(kind).filter(pk=pk).first()
+    if instance is None:
+        return None
+    document = DOCUMENTS[kind]
+    buffer = BytesIO()
+    render_document(kind, instance, buffer)
+    field_file = getattr(instance, document.field_name)
+    field_file.save(document.filename(instance), ContentFile(buffer.getvalue()), save=False)
+    # Update only the file column so a concurrent edit of the document is not overwritten.
+    type(instance).objects.filter(pk=pk).update(**{document.field_name: field_file.name})
+    return field_file.name
+
+
+def queue_render(kind, instance):
+    """Render the document on the background queue after the current transaction commits."""
+    enqueue(render_and_store, kind, instance.pk)
+
+
+def ensure_rendered(kind, instance):
+    """Return the stored PDF for `instance`, rendering it inline if the queue has not yet."""
+    field_file = getattr(instance, DOCUMENTS[kind].field_name)
+    if not field_file:
+        render_and_store(kind, instance.pk)
+        instance.refresh_from_db(fields=[DOCUMENTS[kind].field_name])
+        field_file = getattr(instance, DOCUMENTS[kind].field_name)
+    return field_file
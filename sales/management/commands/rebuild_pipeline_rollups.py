@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from sales.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the sales pipeline rollup tables from inquiries, quotes, sales orders and job cards."
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} pipeline rollup rows."))
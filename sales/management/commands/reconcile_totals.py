@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Abs
+
+from sales.models import OrderService, Quote, QuoteProduct, SalesOrder
+from sales.pricing import (
+    DRIFT_TOLERANCE, _money_expression, money, quote_total_expressions, recompute_quote_totals,
+    recompute_sales_order_totals, sales_order_total_expressions, with_drift,
+)
+from sales.rollups import apply_change, contribution
+
+DOCUMENTS = [
+    # label, model, number field, expressions, recompute, line model, parent field, line total, price field
+    ('quotes', Quote, 'quote_no', quote_total_expressions, recompute_quote_totals,
+     QuoteProduct, 'quote', 'total_price', 'unit_price'),
+    ('sales orders', SalesOrder, 'order_no', sales_order_total_expressions, recompute_sales_order_totals,
+     OrderService, 'sales_order', 'amount', 'rate'),
+]
+
+
+class Command(BaseCommand):
+    help = "Report quotes and sales orders whose stored totals differ from their lines, and fix them with --fix."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Rewrite drifted totals from their lines.")
+        parser.add_argument('--show', type=int, default=20, help="How many drifted documents to list.")
+
+    def handle(self, *args, **options):
+        for label, model, number_field, expressions, recompute, line_model, parent_field, total_field, price_field in DOCUMENTS:
+            expressions = expressions()
+            drifted = with_drift(model.objects.all(), expressions)
+            drifted_lines = line_model.objects.annotate(
+                drift=Abs(_money_expression(F(total_field) - F('qty') * F(price_field)))
+            ).filter(drift__gt=DRIFT_TOLERANCE)
+            affected = model.objects.filter(
+                Q(pk__in=drifted.values('pk')) | Q(pk__in=drifted_lines.values(parent_field))
+            )
+
+            fields = list(expressions)
+            sample = drifted.values('pk', number_field, *fields, *[f'expected_{f}' for f in fields])[:options['show']]
+            for row in sample:
+                changes = ", ".join(
+                    f"{f} {row[f]} -> {money(row[f'expected_{f}'])}"
+                    for f in fields if row[f] != money(row[f'expected_{f}'])
+                )
+                self.stdout.write(f"  {label[:-1]} {row[number_field]} (id {row['pk']}): {changes}")
+
+            if options['fix']:
+                with transaction.atomic():
+                    # The recompute is a bulk UPDATE that skips the rollup signals, so the
+                    # rollups are moved by each document's value change here instead.
+                    documents = model.objects.filter(pk__in=list(affected.values_list('pk', flat=True)))
+                    before = {document.pk: contribution(document) for document in documents}
+                    fixed = recompute(documents)
+                    for document in documents.all():
+                        apply_change(before[document.pk], contribution(document))
+                self.stdout.write(self.style.SUCCESS(f"Fixed {fixed} {label}."))
+            else:
+                self.stdout.write(f"{affected.count()} {label} have drifted totals.")
@@ -0,0 +1,194 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from rest_framework import serializers
+
+from inventory.models import CostConsumption, RemovalRequest, RemovalRequestItem
+from .models import JobCardMaterial
+
+ZERO_COST = Value(0, output_field=DecimalField(max_digits=20, decimal_places=4))
+DEDUCTED = Q(removal_item__request__stock_deducted=True)
+
+
+def _untouched(request):
+    return request.accounts_status == request.gm_status == request.mgmt_status == 'pending'
+
+
+def _check_editable(material):
+    """Lines on a request that is deducted or being approved cannot change under the approvers."""
+    if material.removal_item_id is None:
+        return
+    request = material.removal_item.request
+    if request.stock_deducted:
+        raise serializers.ValidationError({'materials': f"Material line {material.pk} has already been taken out of stock."})
+    if not _untouched(request) and not request.is_rejected:
+        raise serializers.ValidationError({
+            'materials': f"Material line {material.pk} is on removal request {request.request_no}, which is already under approval."
+        })
+
+
+def _open_request(job_card, product_type, user):
+    """A removal request of this job card still untouched by approvers, or a new one."""
+    request = (
+        RemovalRequest.objects.filter(
+            job_card=job_card, type=product_type, stock_deducted=False,
+            accounts_status='pending', gm_status='pending', mgmt_status='pending',
+        ).order_by('pk').first()
+    )
+    if request is None:
+        request = RemovalRequest.objects.create(
+            job_card=job_card, type=product_type, removal_type='sales', requested_by=user,
+            remarks=f"Materials for job card {job_card.job_card_no}",
+        )
+    return request
+
+
+@transaction.atomic
+def sync_materials(job_card, lines, user):
+    """
+    Make a job card's material lines match `lines` (validated dicts; an `id`
+    updates that line, none adds one, a missing line is dropped) and keep a
+    removal request item behind every line. Lines on a request already
+    deducted or under approval cannot change; a line on a rejected request
+    moves to a new request. Raises a ValidationError, undoing everything, if a vehicle
+    is not on this job card or the stock is not available.
+    """
+    existing = {
+        material.pk: material
+        for material in job_card.materials.select_related('removal_item__request')
+    }
+    ids = [line['id'] for line in lines if line.get('id') is not None]
+    unknown = [pk for pk in ids if pk not in existing]
+    if unknown:
+        raise serializers.ValidationError({'materials': f"Material id(s) {unknown} do not belong to this job card."})
+    repeated = sorted(pk for pk, count in Counter(ids).items() if count > 1)
+    if repeated:
+        raise serializers.ValidationError({'materials': f"Material id(s) {repeated} appear more than once."})
+
+    touched, pending = {}, []
+
+    def detach(material):
+        if material.removal_item_id:
+            request = material.removal_item.request
+            # A rejected request keeps its items as the record of what was turned down.
+            if not request.is_rejected:
+                touched[request.pk] = request
+                material.removal_item.delete()
+            material.removal_item = None
+
+    for line in lines:
+        data = dict(line)
+        pk = data.pop('id', None)
+        vehicle = data.get('vehicle')
+        if vehicle is not None and vehicle.job_card_id != job_card.pk:
+            raise serializers.ValidationError({'materials': f"Vehicle {vehicle.chassis_number} is not on this job card."})
+        if pk is None:
+            material = JobCardMaterial(job_card=job_card, **data)
+        else:
+            material = existing.pop(pk)
+            changed = {attr: value for attr, value in data.items() if getattr(material, attr) != value}
+            if not changed and material.removal_item_id:
+                continue
+            if changed:
+                _check_editable(material)
+            for attr, value in changed.items():
+                setattr(material, attr, value)
+            detach(material)
+        material.save()
+        pending.append(material)
+
+    for material in existing.values():
+        _check_editable(material)
+        detach(material)
+        material.delete()
+
+    by_type = defaultdict(list)
+    for material in pending:
+        by_type[material.product.type].append(material)
+    for product_type, materials in by_type.items():
+        request = _open_request(job_card, product_type, user)
+        touched[request.pk] = request
+        items = RemovalRequestItem.objects.bulk_create([
+            RemovalRequestItem(request=request, product=material.product, quantity=material.quantity, location=material.location)
+            for material in materials
+        ])
+        for material, item in zip(materials, items):
+            material.removal_item = item
+        JobCardMaterial.objects.bulk_update(materials, ['removal_item'])
+
+    for request in touched.values():
+        if request.items.exists():
+            request.sync_reservations()
+        else:
+            request.delete()
+
+
+def _amount(quantity, cost):
+    return ExpressionWrapper(F(quantity) * F(cost), output_field=DecimalField(max_digits=20, decimal_places=4))
+
+
+def job_card_costs(job_card_ids):
+    """
+    {job card id: {'material_cost', 'pending_cost', 'lines'}} in two grouped
+    queries. Material cost is what approved removals actually consumed;
+    pending cost values lines not yet taken out of stock at average cost.
+    """
+    job_card_ids = list(job_card_ids)
+    costs = {pk: {'material_cost': 0, 'pending_cost': 0, 'lines': 0} for pk in job_card_ids}
+    consumed = (
+        CostConsumption.objects.filter(removal_item__job_card_material__job_card__in=job_card_ids)
+        .values(job_card=F('removal_item__job_card_material__job_card')).order_by()
+        .annotate(cost=Sum(_amount('quantity', 'unit_cost')))
+    )
+    for row in consumed:
+        costs[row['job_card']]['material_cost'] = row['cost']
+    pending = (
+        JobCardMaterial.objects.filter(job_card__in=job_card_ids)
+        .values('job_card').order_by()
+        .annotate(
+            lines=Count('pk'),
+            cost=Coalesce(
+                Sum(_amount('quantity', 'product__average_cost'), filter=~DEDUCTED), ZERO_COST,
+            ),
+        )
+    )
+    for row in pending:
+        costs[row['job_card']].update(pending_cost=row['cost'], lines=row['lines'])
+    return costs
+
+
+def _per_order(queryset, order_field, value):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{order_field: OuterRef('pk')})
+            .values(order_field).order_by().annotate(total=Sum(value)).values('total')
+        ),
+        ZERO_COST,
+    )
+
+
+def sales_order_profitability(orders):
+    """
+    Revenue (subtotal before VAT) against the material cost of the order's
+    job cards, one row per sales order, each cost a grouped subquery over the
+    job card's sales order foreign key.
+    """
+    return orders.annotate(
+        material_cost=_per_order(
+            CostConsumption.objects.all(), 'removal_item__job_card_material__job_card__sales_order',
+            _amount('quantity', 'unit_cost'),
+        ),
+        pending_cost=_per_order(
+            JobCardMaterial.objects.exclude(DEDUCTED), 'job_card__sales_order',
+            _amount('quantity', 'product__average_cost'),
+        ),
+    ).annotate(
+        margin=ExpressionWrapper(
+            F('subtotal') - F('material_cost') - F('pending_cost'),
+            output_field=DecimalField(max_digits=20, decimal_places=4),
+        ),
+    ).values(
+        'id', 'order_no', 'company_name', 'status', 'created_on', 'subtotal', 'material_cost', 'pending_cost', 'margin',
+    )
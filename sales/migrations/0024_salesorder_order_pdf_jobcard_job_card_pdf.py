@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0023_alter_jobcard_job_card_no'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobcard',
+            name='job_card_pdf',
+            field=models.FileField(blank=True, null=True, upload_to='job_cards/'),
+        ),
+        migrations.AddField(
+            model_name='salesorder',
+            name='order_pdf',
+            field=models.FileField(blank=True, null=True, upload_to='sales_orders/'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:10
+
+from django.db import migrations, models
+import sales.pricing
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0024_salesorder_order_pdf_jobcard_job_card_pdf'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesorder',
+            name='vat_percentage',
+            field=models.DecimalField(decimal_places=2, default=sales.pricing.default_vat_percentage, max_digits=5),
+        ),
+        migrations.AlterField(
+            model_name='orderservice',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='orderservice',
+            name='rate',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='quote',
+            name='grand_total',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='quote',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='quote',
+            name='vat_amount',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='quote',
+            name='vat_percentage',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=5),
+        ),
+        migrations.AlterField(
+            model_name='quoteproduct',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='quoteproduct',
+            name='unit_price',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='salesorder',
+            name='advance_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='salesorder',
+            name='net_total',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='salesorder',
+            name='omc_cost',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='salesorder',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='salesorder',
+            name='vat',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import OuterRef, Subquery
+
+
+def link_companies(apps, schema_editor):
+    # Match each document to the oldest contact with the same company name.
+    Contact = apps.get_model('sales', 'Contact')
+    for model_name in ('Inquiry', 'Quote', 'OutgoingMail', 'SalesOrder', 'JobCard'):
+        model = apps.get_model('sales', model_name)
+        model.objects.filter(company__isnull=True).update(company=Subquery(
+            Contact.objects.filter(company_name=OuterRef('company_name')).order_by('pk').values('pk')[:1]
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0025_decimal_money_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inquiry',
+            name='company',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='inquiries', to='sales.contact'),
+        ),
+        migrations.AddField(
+            model_name='jobcard',
+            name='company',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='job_cards', to='sales.contact'),
+        ),
+        migrations.AddField(
+            model_name='outgoingmail',
+            name='company',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='outgoing_mails', to='sales.contact'),
+        ),
+        migrations.AddField(
+            model_name='quote',
+            name='company',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='quotes', to='sales.contact'),
+        ),
+        migrations.AddField(
+            model_name='salesorder',
+            name='company',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales_orders', to='sales.contact'),
+        ),
+        migrations.AlterField(
+            model_name='contact',
+            name='company_name',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.RunPython(link_companies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0026_company_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inquiry',
+            index=models.Index(fields=['company', 'created_on'], name='sales_inqui_company_771312_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(fields=['company', 'created_on'], name='sales_jobca_company_d3f2ee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outgoingmail',
+            index=models.Index(fields=['company', 'created_on'], name='sales_outgo_company_0357a0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['company', 'create_date'], name='sales_quote_company_463210_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesorder',
+            index=models.Index(fields=['company', 'created_on'], name='sales_sales_company_513736_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_stock_reservations'),
+        ('sales', '0028_pipeline_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderservice',
+            name='inventory_product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_lines', to='inventory.product'),
+        ),
+        migrations.AddField(
+            model_name='quoteproduct',
+            name='inventory_product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='quote_lines', to='inventory.product'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0018_removal_request_job_card'),
+        ('sales', '0029_line_inventory_products'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobcard',
+            name='sales_order_number',
+            field=models.CharField(db_index=True, max_length=5),
+        ),
+        migrations.CreateModel(
+            name='JobCardMaterial',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('remarks', models.TextField(blank=True)),
+                ('created_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('job_card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='materials', to='sales.jobcard')),
+                ('location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='job_card_materials', to='inventory.location')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='job_card_materials', to='inventory.product')),
+                ('removal_item', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='job_card_material', to='inventory.removalrequestitem')),
+                ('vehicle', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='materials', to='sales.vehicle')),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:38
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef, Subquery
+
+
+def link_sales_orders(apps, schema_editor):
+    JobCard = apps.get_model('sales', 'JobCard')
+    SalesOrder = apps.get_model('sales', 'SalesOrder')
+    StockReservation = apps.get_model('inventory', 'StockReservation')
+    JobCard.objects.filter(sales_order__isnull=True).update(sales_order=Subquery(
+        SalesOrder.objects.filter(order_no=OuterRef('sales_order_number')).values('pk')[:1]
+    ))
+    # Orders with job cards take the status their job cards imply; orders without any are left alone.
+    job_cards = JobCard.objects.filter(sales_order=OuterRef('pk'))
+    with_cards = SalesOrder.objects.filter(Exists(job_cards))
+    completed = with_cards.exclude(Exists(job_cards.exclude(status='delivered')))
+    StockReservation.objects.filter(source_type='sales_order', source_id__in=completed.values('pk')).delete()
+    completed.update(status='completed')
+    with_cards.exclude(status='completed').update(status='job_card_created')
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0018_removal_request_job_card'),
+        ('sales', '0030_job_card_materials'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobcard',
+            name='sales_order',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='job_cards', to='sales.salesorder'),
+        ),
+        migrations.AlterField(
+            model_name='jobcard',
+            name='sales_order_number',
+            field=models.CharField(max_length=5),
+        ),
+        migrations.RunPython(link_sales_orders, migrations.RunPython.noop),
+    ]
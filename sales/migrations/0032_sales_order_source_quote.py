@@ -0,0 +1,19 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0031_job_card_sales_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesorder',
+            name='source_quote',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales_order', to='sales.quote'),
+        ),
+    ]
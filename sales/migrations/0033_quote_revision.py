@@ -0,0 +1,33 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('sales', '0032_sales_order_source_quote'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuoteRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('snapshot', models.JSONField()),
+                ('created_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('pdf', models.FileField(blank=True, null=True, upload_to='quote_revisions/')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='quote_revisions', to=settings.AUTH_USER_MODEL)),
+                ('quote', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='sales.quote')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='quoterevision',
+            constraint=models.UniqueConstraint(fields=('quote', 'number'), name='sales_quoterevision_number_uniq'),
+        ),
+    ]
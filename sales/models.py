@@ -1,11 +1,24 @@
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q, Sum
 from django.contrib.auth.models import User
 import random 
 from django.core.exceptions import ValidationError
+from .pricing import default_vat_percentage, line_total
+
+# Fields each company-linked model copies from its Contact, kept current by
+# copy_company_fields() on save and Contact.save() on rename.
+COMPANY_DISPLAY_FIELDS = ('company_name', 'contact_name', 'contact_number')
+
+
+def copy_company_fields(instance):
+    if instance.company_id:
+        for field in instance.company_display_fields:
+            setattr(instance, field, getattr(instance.company, field))
+
 
 class Contact(models.Model):
-    company_name = models.CharField(max_length=255)
+    company_name = models.CharField(max_length=255, db_index=True)
     contact_name = models.CharField(max_length=255)
     company_email = models.EmailField()
     contact_email = models.EmailField()
@@ -20,6 +33,21 @@ class Contact(models.Model):
 
     def __str__(self):
         return f"{self.company_name} - {self.contact_name}"
+
+    @staticmethod
+    def resolve(company_name, **filters):
+        """The contact for a free-text company name; the oldest one if the name is duplicated."""
+        if not company_name:
+            return None
+        return Contact.objects.filter(company_name=company_name, **filters).order_by('pk').first()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Push renamed company/contact details to every document linked to this contact.
+        for model in (Inquiry, Quote, OutgoingMail, SalesOrder, JobCard):
+            model.objects.filter(company=self).update(
+                **{field: getattr(self, field) for field in model.company_display_fields}
+            )
     
 class Inquiry(models.Model):
     STATUS_CHOICES = [
@@ -28,6 +56,7 @@ class Inquiry(models.Model):
         ('closed', 'Closed'),
     ]
     
+    company = models.ForeignKey(Contact, on_delete=models.SET_NULL, null=True, blank=True, related_name="inquiries")
     company_name = models.CharField(max_length=255)
     contact_name = models.CharField(max_length=255)
     contact_number = models.CharField(max_length=20)
@@ -38,8 +67,13 @@ class Inquiry(models.Model):
     created_on = models.DateTimeField(default=timezone.now)
     year = models.PositiveIntegerField(default=timezone.now().year)  
 
+    company_display_fields = COMPANY_DISPLAY_FIELDS
+
+    class Meta:
+        indexes = [models.Index(fields=['company', 'created_on'])]
+
     def save(self, *args, **kwargs):
-        
+        copy_company_fields(self)
         if not self.year:
             self.year = self.created_on.year
         super().save(*args, **kwargs)
@@ -57,6 +91,7 @@ class Quote(models.Model):
     ]
     year = models.IntegerField()
     quote_title = models.CharField(max_length=255)
+    company = models.ForeignKey(Contact, on_delete=models.SET_NULL, null=True, blank=True, related_name="quotes")
     company_name = models.CharField(max_length=255)
     contact_name = models.CharField(max_length=255, blank=True)
     contact_number = models.CharField(max_length=20, blank=True)
@@ -65,19 +100,28 @@ class Quote(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='new')
     quote_no = models.CharField(max_length=5)
     vat_applicable = models.BooleanField(default=False)
-    vat_percentage = models.FloatField(default=0)
-    subtotal = models.FloatField()
-    vat_amount = models.FloatField()
-    grand_total = models.FloatField()
+    vat_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    subtotal = models.DecimalField(max_digits=14, decimal_places=2)
+    vat_amount = models.DecimalField(max_digits=14, decimal_places=2)
+    grand_total = models.DecimalField(max_digits=14, decimal_places=2)
     notes_remarks = models.TextField(blank=True)
     assign_to = models.ForeignKey(User, related_name="assigned_quotes", on_delete=models.SET_NULL, null=True)
     created_by = models.ForeignKey(User, related_name="created_quotes", on_delete=models.SET_NULL, null=True)
     create_date = models.DateTimeField(auto_now_add=True)
     invoice_pdf = models.FileField(upload_to='invoices/', blank=True, null=True)
 
+    company_display_fields = COMPANY_DISPLAY_FIELDS
+
+    class Meta:
+        indexes = [models.Index(fields=['company', 'create_date'])]
+
     def __str__(self):
         return f"{self.quote_title} ({self.quote_no})"
 
+    def save(self, *args, **kwargs):
+        copy_company_fields(self)
+        super().save(*args, **kwargs)
+
 
     @staticmethod
     def generate_unique_quote_no():
@@ -92,25 +136,55 @@ class Quote(models.Model):
 
 class QuoteProduct(models.Model):
     quote = models.ForeignKey(Quote, related_name='products', on_delete=models.CASCADE)
+    inventory_product = models.ForeignKey('inventory.Product', on_delete=models.SET_NULL, null=True, blank=True, related_name="quote_lines")
     product = models.CharField(max_length=255)
     specification = models.TextField(blank=True)
     qty = models.IntegerField()
-    unit_price = models.FloatField()
-    total_price = models.FloatField()
+    unit_price = models.DecimalField(max_digits=14, decimal_places=2)
+    total_price = models.DecimalField(max_digits=14, decimal_places=2)
+
+    computed_fields = ('total_price',)
+
+    def compute_totals(self):
+        self.total_price = line_total(self.qty, self.unit_price)
 
     def save(self, *args, **kwargs):
-        self.total_price = self.qty * self.unit_price
+        self.compute_totals()
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.product} - {self.qty} x {self.unit_price}"
 
+class QuoteRevision(models.Model):
+    """
+    One saved version of a quote, append-only. `snapshot` is the quote's
+    document context with its lines stored as rows (see sales.revisions).
+    """
+    quote = models.ForeignKey(Quote, related_name='revisions', on_delete=models.CASCADE)
+    number = models.PositiveIntegerField()
+    snapshot = models.JSONField()
+    created_by = models.ForeignKey(User, related_name="quote_revisions", on_delete=models.SET_NULL, null=True)
+    created_on = models.DateTimeField(default=timezone.now)
+    pdf = models.FileField(upload_to='quote_revisions/', blank=True, null=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['quote', 'number'], name='sales_quoterevision_number_uniq')]
+
+    def __str__(self):
+        return f"Quote {self.quote_id} revision {self.number}"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValidationError("Quote revisions cannot be changed once saved.")
+        super().save(*args, **kwargs)
+
 class OutgoingMail(models.Model):
     STATUS_CHOICES = [
         ('new', 'New'),
         ('open', 'Open'),
         ('closed', 'Closed'),
     ]
+    company = models.ForeignKey(Contact, on_delete=models.SET_NULL, null=True, blank=True, related_name="outgoing_mails")
     company_name = models.CharField(max_length=255)
     contact_name = models.CharField(max_length=255, blank=True, null=True)  
     contact_number = models.CharField(max_length=20, blank=True, null=True)  
@@ -124,7 +198,13 @@ class OutgoingMail(models.Model):
     mail_subject = models.CharField(max_length=255)
     quote_no = models.CharField(max_length=100, blank=True)
 
+    company_display_fields = COMPANY_DISPLAY_FIELDS + ('company_email', 'contact_email')
+
+    class Meta:
+        indexes = [models.Index(fields=['company', 'created_on'])]
+
     def save(self, *args, **kwargs):
+        copy_company_fields(self)
         if not self.year:
             self.year = self.created_on.year
         super().save(*args, **kwargs)
@@ -155,6 +235,7 @@ class SalesOrder(models.Model):
         ('pending', 'Pending'),
     ]
 
+    company = models.ForeignKey(Contact, on_delete=models.SET_NULL, null=True, blank=True, related_name="sales_orders")
     company_name = models.CharField(max_length=255)
     contact_email = models.EmailField()
     order_no = models.CharField(max_length=5, unique=True)
@@ -169,23 +250,83 @@ class SalesOrder(models.Model):
     currency = models.CharField(max_length=3, default="USD")
     cust_ref = models.CharField(max_length=100, blank=True)
     our_ref = models.CharField(max_length=100, blank=True)
-    advance_amount = models.FloatField(default=0)
+    advance_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
     remarks = models.TextField(blank=True)
     payment_terms = models.CharField(max_length=255)
     delivery_terms = models.CharField(max_length=255)
-    omc_cost = models.FloatField(default=0)
-    subtotal = models.FloatField()
-    vat = models.FloatField()  
-    net_total = models.FloatField()
+    omc_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    subtotal = models.DecimalField(max_digits=14, decimal_places=2)
+    vat_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=default_vat_percentage)
+    vat = models.DecimalField(max_digits=14, decimal_places=2)
+    net_total = models.DecimalField(max_digits=14, decimal_places=2)
     created_by = models.ForeignKey(User, related_name="sales_orders", on_delete=models.SET_NULL, null=True)
     created_on = models.DateTimeField(default=timezone.now)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='new')
     accounts_status = models.CharField(max_length=20, choices=ACCOUNTS_STATUS_CHOICES, default='pending')
     gm_status = models.CharField(max_length=20, choices=GM_STATUS_CHOICES, default='under_review')
     mgmt_status = models.CharField(max_length=20, choices=MGMT_STATUS_CHOICES, default='pending')
+    order_pdf = models.FileField(upload_to='sales_orders/', blank=True, null=True)
+    source_quote = models.OneToOneField(Quote, on_delete=models.SET_NULL, null=True, blank=True, related_name="sales_order")
+
+    company_display_fields = COMPANY_DISPLAY_FIELDS + ('contact_email',)
+    # Orders in these statuses hold inventory reservations for their product lines.
+    RESERVING_STATUSES = ('new', 'job_card_created')
+
+    class Meta:
+        indexes = [models.Index(fields=['company', 'created_on'])]
 
     def __str__(self):
         return f"Sales Order {self.lpo_no} - {self.company_name}"
+
+    def save(self, *args, **kwargs):
+        copy_company_fields(self)
+        super().save(*args, **kwargs)
+
+    def sync_fulfilment_status(self):
+        """
+        Move the order between new, job_card_created and completed to match its
+        job cards: completed once every job card is delivered.
+        """
+        statuses = set(self.job_cards.values_list('status', flat=True))
+        if not statuses:
+            status = 'new'
+        elif statuses == {'delivered'}:
+            status = 'completed'
+        else:
+            status = 'job_card_created'
+        if status != self.status:
+            self.status = status
+            self.save(update_fields=['status'])
+            self.sync_reservations(check=False)
+
+    def sync_reservations(self, check=True):
+        """
+        Hold inventory for this order's product lines while it is open; release it otherwise.
+        Quantities already raised on removal requests of the order's job cards are held (or
+        were deducted) by those requests, so the order only holds what is left.
+        """
+        from inventory.reservations import quantities_by_product, release, reserve
+        if self.status in self.RESERVING_STATUSES:
+            lines = self.order_services.values_list('inventory_product', 'qty')
+            raised = self.raised_quantities()
+            quantities = {
+                pk: quantity - raised.get(pk, 0)
+                for pk, quantity in quantities_by_product(lines).items()
+                if quantity > raised.get(pk, 0)
+            }
+            reserve('sales_order', self.pk, quantities, check=check)
+        else:
+            release('sales_order', self.pk)
+
+    def raised_quantities(self):
+        """{product id: quantity} on this order's job-card removal requests that are not rejected."""
+        from inventory.models import RemovalRequestItem
+        rejected = Q(request__accounts_status='rejected') | Q(request__gm_status='rejected') | Q(request__mgmt_status='rejected')
+        return dict(
+            RemovalRequestItem.objects.filter(request__job_card__sales_order=self).exclude(rejected)
+            .values('product_id').order_by().annotate(total=Sum('quantity'))
+            .values_list('product_id', 'total')
+        )
     
     @staticmethod
     def generate_unique_order_no():
@@ -198,16 +339,22 @@ class SalesOrder(models.Model):
 
 class OrderService(models.Model):
     sales_order = models.ForeignKey(SalesOrder, related_name="order_services", on_delete=models.CASCADE)
+    inventory_product = models.ForeignKey('inventory.Product', on_delete=models.SET_NULL, null=True, blank=True, related_name="order_lines")
     sorp = models.CharField(max_length=100, blank=True)
     barcode = models.CharField(max_length=100, blank=True)
     service_title = models.CharField(max_length=255)
     qty = models.IntegerField()
-    rate = models.FloatField()
+    rate = models.DecimalField(max_digits=14, decimal_places=2)
     unit = models.CharField(max_length=50, blank=True)
-    amount = models.FloatField()
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+
+    computed_fields = ('amount',)
+
+    def compute_totals(self):
+        self.amount = line_total(self.qty, self.rate)
 
     def save(self, *args, **kwargs):
-        self.amount = self.qty * self.rate
+        self.compute_totals()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -219,10 +366,13 @@ class JobCard(models.Model):
         ('delivered', 'Delivered'),
     ]
 
+    company = models.ForeignKey(Contact, on_delete=models.SET_NULL, null=True, blank=True, related_name="job_cards")
     company_name = models.CharField(max_length=255)
     contact_email = models.EmailField()
     contact_name = models.CharField(max_length=255, blank=True, null=True)
     contact_number = models.CharField(max_length=20, blank=True, null=True)
+    sales_order = models.ForeignKey('SalesOrder', on_delete=models.PROTECT, null=True, blank=True, related_name="job_cards")
+    # The order's number, kept for display; set from `sales_order` on save.
     sales_order_number = models.CharField(max_length=5)
     quantity = models.IntegerField()
     remarks = models.TextField(blank=True)
@@ -230,8 +380,17 @@ class JobCard(models.Model):
     job_card_no = models.CharField(max_length=5, unique=True, blank=True, null=True)
     created_by = models.ForeignKey(User, related_name="job_cards", on_delete=models.SET_NULL, null=True)
     created_on = models.DateTimeField(default=timezone.now)
+    job_card_pdf = models.FileField(upload_to='job_cards/', blank=True, null=True)
+
+    company_display_fields = COMPANY_DISPLAY_FIELDS + ('contact_email',)
+
+    class Meta:
+        indexes = [models.Index(fields=['company', 'created_on'])]
 
     def save(self, *args, **kwargs):
+        copy_company_fields(self)
+        if self.sales_order_id:
+            self.sales_order_number = self.sales_order.order_no
         if not self.job_card_no:
             max_attempts = 100
             for attempt in range(max_attempts):
@@ -241,7 +400,18 @@ class JobCard(models.Model):
                     break
             else:
                 raise ValidationError("Unable to generate a unique job card number after multiple attempts.")
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            previous_order_id = (
+                JobCard.objects.filter(pk=self.pk).values_list('sales_order_id', flat=True).first()
+                if self.pk else None
+            )
+            super().save(*args, **kwargs)
+            # The order status follows its job cards, committed together with this change.
+            for order in SalesOrder.objects.filter(pk__in={previous_order_id, self.sales_order_id} - {None}):
+                order.sync_fulfilment_status()
+                if previous_order_id != self.sales_order_id:
+                    # This job card's removal requests now count against the other order.
+                    order.sync_reservations(check=False)
 
     def __str__(self):
         return f"Job Card {self.job_card_no or 'Pending'} for {self.company_name} - {self.sales_order_number}"
@@ -256,4 +426,51 @@ class Vehicle(models.Model):
     vehicle_type = models.CharField(max_length=100, blank=True)
 
     def __str__(self):
-        return f"Vehicle {self.chassis_number} for Job Card {self.job_card.id}"
\ No newline at end of file
+        return f"Vehicle {self.chassis_number} for Job Card {self.job_card.id}"
+
+class JobCardMaterial(models.Model):
+    """An inventory part used on a job card, taken out of stock through the removal request item it links to."""
+    job_card = models.ForeignKey(JobCard, related_name="materials", on_delete=models.CASCADE)
+    vehicle = models.ForeignKey(Vehicle, related_name="materials", on_delete=models.SET_NULL, null=True, blank=True)
+    product = models.ForeignKey('inventory.Product', related_name="job_card_materials", on_delete=models.PROTECT)
+    location = models.ForeignKey('inventory.Location', related_name="job_card_materials", on_delete=models.PROTECT, null=True, blank=True)
+    quantity = models.PositiveIntegerField()
+    removal_item = models.OneToOneField(
+        'inventory.RemovalRequestItem', related_name="job_card_material", on_delete=models.SET_NULL, null=True, blank=True,
+    )
+    remarks = models.TextField(blank=True)
+    created_on = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product.product_name} for Job Card {self.job_card.job_card_no}"
+
+class PipelineRollup(models.Model):
+    """
+    Pre-aggregated document counts and values per period, stage, status and
+    assignee, kept current by sales.signals and rebuilt by `rebuild_pipeline_rollups`.
+    Reports sum over matching rows, so a key may safely appear more than once.
+    """
+    PERIOD_CHOICES = [
+        ('day', 'Day'),
+        ('month', 'Month'),
+    ]
+    STAGE_CHOICES = [
+        ('inquiry', 'Inquiry'),
+        ('quote', 'Quote'),
+        ('sales_order', 'Sales Order'),
+        ('job_card', 'Job Card'),
+    ]
+
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField()
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES)
+    status = models.CharField(max_length=20)
+    assignee = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="pipeline_rollups")
+    count = models.IntegerField(default=0)
+    value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['period', 'period_start', 'stage', 'status', 'assignee'])]
+
+    def __str__(self):
+        return f"{self.stage} {self.status} {self.period} {self.period_start}: {self.count}"
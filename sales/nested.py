@@ -0,0 +1,58 @@
+from collections import Counter
+
+from rest_framework import serializers
+
+
+def sync_children(model, parent_field, parent, items, create_only=False):
+    """
+    Make the `model` rows pointing at `parent` through `parent_field` match `items`.
+
+    `items` are validated child dicts. One carrying the `id` of an existing
+    child updates that row, one without an `id` becomes a new row, and any
+    existing child left out is deleted. The whole diff costs one select, one
+    bulk_create, one bulk_update and one delete. Computed columns are filled
+    in by the model's `compute_totals()` (listed in its `computed_fields`),
+    since bulk writes skip save().
+
+    Returns the children as they now stand. Call inside a transaction.
+    """
+    existing = {} if create_only else {obj.pk: obj for obj in model.objects.filter(**{parent_field: parent})}
+
+    ids = [item['id'] for item in items if item.get('id') is not None]
+    unknown = [pk for pk in ids if pk not in existing]
+    if unknown:
+        raise serializers.ValidationError({
+            'id': f"{model._meta.verbose_name.capitalize()} id(s) {unknown} do not belong to this record."
+        })
+    repeated = sorted(pk for pk, count in Counter(ids).items() if count > 1)
+    if repeated:
+        raise serializers.ValidationError({
+            'id': f"{model._meta.verbose_name.capitalize()} id(s) {repeated} appear more than once."
+        })
+
+    computed_fields = getattr(model, 'computed_fields', ())
+    to_create, to_update, update_fields, children = [], [], set(), []
+    for item in items:
+        data = dict(item)
+        pk = data.pop('id', None)
+        if pk is None:
+            obj = model(**{parent_field: parent}, **data)
+            to_create.append(obj)
+        else:
+            obj = existing.pop(pk)
+            for attr, value in data.items():
+                setattr(obj, attr, value)
+            update_fields.update(data)
+            to_update.append(obj)
+        if computed_fields:
+            obj.compute_totals()
+        children.append(obj)
+
+    if existing:
+        model.objects.filter(pk__in=list(existing)).delete()
+    if to_create:
+        model.objects.bulk_create(to_create)
+    if to_update:
+        update_fields.update(computed_fields)
+        model.objects.bulk_update(to_update, sorted(update_fields))
+    return children
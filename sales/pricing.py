@@ -0,0 +1,115 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Abs, Coalesce, Round
+
+CENT = Decimal('0.01')
+HUNDRED = Decimal('100')
+# Multiply by this rather than divide by HUNDRED in SQL: SQLite keeps whole-number
+# decimals as integers and would otherwise do integer division.
+PERCENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+MONEY_DIGITS = 14
+# Totals that differ from the recomputed value by more than this are reported as drift.
+DRIFT_TOLERANCE = Decimal('0.005')
+
+
+def money(value):
+    """Round to cents, half up, going through str so floats do not leak binary error."""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def default_vat_percentage():
+    return Decimal(str(settings.SALES_VAT_PERCENTAGE))
+
+
+def line_total(qty, unit_price):
+    return money(Decimal(qty) * money(unit_price))
+
+
+def vat_for(subtotal, vat_percentage):
+    return money(subtotal * Decimal(str(vat_percentage)) / HUNDRED)
+
+
+def compute_totals(lines, vat_percentage):
+    """
+    `lines` is an iterable of (qty, unit_price) pairs. Returns the subtotal,
+    VAT and grand total in Decimal, with VAT taken on the rounded subtotal.
+    """
+    subtotal = sum((line_total(qty, unit_price) for qty, unit_price in lines), ZERO)
+    vat = vat_for(subtotal, vat_percentage)
+    return {'subtotal': subtotal, 'vat': vat, 'grand_total': subtotal + vat}
+
+
+def _money_expression(expression):
+    return ExpressionWrapper(expression, output_field=DecimalField(max_digits=MONEY_DIGITS, decimal_places=2))
+
+
+def _line_sum_subquery(line_model, parent_field, price_field):
+    # Sums qty * price rather than the stored line totals, so drifted lines are caught too.
+    lines = (
+        line_model.objects.filter(**{parent_field: OuterRef('pk')})
+        .values(parent_field)
+        .annotate(total=Sum(_money_expression(F('qty') * F(price_field))))
+        .values('total')
+    )
+    return Coalesce(Subquery(lines), Value(ZERO), output_field=DecimalField(max_digits=MONEY_DIGITS, decimal_places=2))
+
+
+def _vat_expression(subtotal, percentage_field, applicable_field=None):
+    vat = Round(_money_expression(subtotal * F(percentage_field) * Value(PERCENT)), 2)
+    if applicable_field is None:
+        return vat
+    return Case(When(**{applicable_field: True}, then=vat), default=Value(ZERO), output_field=DecimalField(max_digits=MONEY_DIGITS, decimal_places=2))
+
+
+def quote_total_expressions():
+    from .models import QuoteProduct
+    subtotal = _line_sum_subquery(QuoteProduct, 'quote', 'unit_price')
+    vat = _vat_expression(subtotal, 'vat_percentage', 'vat_applicable')
+    return {'subtotal': subtotal, 'vat_amount': vat, 'grand_total': _money_expression(subtotal + vat)}
+
+
+def sales_order_total_expressions():
+    from .models import OrderService
+    subtotal = _line_sum_subquery(OrderService, 'sales_order', 'rate')
+    vat = _vat_expression(subtotal, 'vat_percentage')
+    return {'subtotal': subtotal, 'vat': vat, 'net_total': _money_expression(subtotal + vat)}
+
+
+def recompute_quote_totals(queryset=None):
+    """Recompute stored quote totals from their lines: one UPDATE for the lines, one for the quotes."""
+    from .models import Quote, QuoteProduct
+    queryset = Quote.objects.all() if queryset is None else queryset
+    QuoteProduct.objects.filter(quote__in=queryset.values('pk')).update(
+        total_price=_money_expression(F('qty') * F('unit_price'))
+    )
+    return queryset.update(**quote_total_expressions())
+
+
+def recompute_sales_order_totals(queryset=None):
+    from .models import OrderService, SalesOrder
+    queryset = SalesOrder.objects.all() if queryset is None else queryset
+    OrderService.objects.filter(sales_order__in=queryset.values('pk')).update(
+        amount=_money_expression(F('qty') * F('rate'))
+    )
+    return queryset.update(**sales_order_total_expressions())
+
+
+def _drift_filter(expressions):
+    drift = Q()
+    for field in expressions:
+        drift |= Q(**{f'{field}_drift__gt': DRIFT_TOLERANCE})
+    return drift
+
+
+def with_drift(queryset, expressions):
+    """Annotate each document with its recomputed totals and keep only those whose stored totals drifted."""
+    annotations = {}
+    for field, expression in expressions.items():
+        annotations[f'expected_{field}'] = expression
+        annotations[f'{field}_drift'] = Abs(_money_expression(F(field) - expression))
+    return queryset.annotate(**annotations).filter(_drift_filter(expressions))
@@ -0,0 +1,93 @@
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from backend.tasks import enqueue
+from .documents import QuoteDocument, render_context
+from .models import Quote, QuoteRevision
+
+# Lines are stored as rows in this column order rather than as dicts, so the
+# keys are not repeated per line; the id lets diffs pair up lines.
+LINE_FIELDS = ('id', 'product', 'specification', 'qty', 'unit_price', 'total_price')
+
+
+def take_snapshot(quote):
+    """The quote's document context with its lines as rows. `quote` should have its products prefetched."""
+    ctx = QuoteDocument.context(quote)
+    ctx['products'] = [
+        [product.pk] + [line[field] for field in LINE_FIELDS[1:]]
+        for product, line in zip(quote.products.all(), ctx['products'])
+    ]
+    return ctx
+
+
+def expand(snapshot):
+    """A snapshot back in QuoteDocument.context form, lines as dicts."""
+    return {**snapshot, 'products': [dict(zip(LINE_FIELDS, row)) for row in snapshot['products']]}
+
+
+@transaction.atomic
+def record_revision(quote_id, user):
+    """
+    Append the quote's current state as its next revision and queue its PDF.
+    Nothing is stored when the quote is unchanged since the last revision.
+    """
+    # Lock the quote so concurrent saves number their revisions one after another.
+    list(Quote.objects.select_for_update().filter(pk=quote_id).values_list('pk'))
+    quote = Quote.objects.select_related('assign_to', 'created_by').prefetch_related('products').get(pk=quote_id)
+    snapshot = take_snapshot(quote)
+    last = quote.revisions.order_by('-number').first()
+    if last is not None and last.snapshot == snapshot:
+        return last
+    revision = QuoteRevision.objects.create(
+        quote=quote, number=last.number + 1 if last else 1, snapshot=snapshot, created_by=user,
+    )
+    enqueue(render_revision, revision.pk)
+    return revision
+
+
+def _changes(old, new, fields):
+    return {field: [old.get(field), new.get(field)] for field in fields if old.get(field) != new.get(field)}
+
+
+def diff(old, new):
+    """What changed between two snapshots: quote fields, and lines added, removed or changed."""
+    fields = sorted((old.keys() | new.keys()) - {'products'})
+    old_lines = {line['id']: line for line in expand(old)['products']}
+    new_lines = {line['id']: line for line in expand(new)['products']}
+    changed = []
+    for pk, line in new_lines.items():
+        if pk in old_lines:
+            changes = _changes(old_lines[pk], line, LINE_FIELDS[1:])
+            if changes:
+                changed.append({'id': pk, 'product': line['product'], 'changes': changes})
+    return {
+        'fields': _changes(old, new, fields),
+        'lines_added': [line for pk, line in new_lines.items() if pk not in old_lines],
+        'lines_removed': [line for pk, line in old_lines.items() if pk not in new_lines],
+        'lines_changed': changed,
+    }
+
+
+def render_revision(pk):
+    """Render a revision's PDF from its snapshot and store it; the stored file is served from then on."""
+    revision = QuoteRevision.objects.filter(pk=pk).first()
+    if revision is None:
+        return None
+    buffer = BytesIO()
+    render_context('quote', expand(revision.snapshot), buffer)
+    revision.pdf.save(
+        f"invoice_{revision.snapshot['quote_no']}_r{revision.number}.pdf", ContentFile(buffer.getvalue()), save=False,
+    )
+    # Revisions refuse save(); the PDF is the one column filled in afterwards.
+    QuoteRevision.objects.filter(pk=pk).update(pdf=revision.pdf.name)
+    return revision.pdf.name
+
+
+def revision_pdf(revision):
+    """The revision's stored PDF, rendering it inline if the queue has not yet."""
+    if not revision.pdf:
+        render_revision(revision.pk)
+        revision.refresh_from_db(fields=['pdf'])
+    return revision.pdf
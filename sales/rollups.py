@@ -0,0 +1,139 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDay, TruncMonth
+from django.utils import timezone
+
+from .models import Inquiry, JobCard, PipelineRollup, Quote, SalesOrder
+from .pricing import ZERO
+
+# stage: (model, date field, assignee field, value field or None)
+STAGES = {
+    'inquiry': (Inquiry, 'created_on', 'assign_to', None),
+    'quote': (Quote, 'create_date', 'assign_to', 'grand_total'),
+    'sales_order': (SalesOrder, 'created_on', 'created_by', 'net_total'),
+    'job_card': (JobCard, 'created_on', 'created_by', None),
+}
+STAGE_FOR_MODEL = {spec[0]: stage for stage, spec in STAGES.items()}
+PERIODS = {'day': TruncDay, 'month': TruncMonth}
+
+
+def period_starts(moment):
+    day = timezone.localdate(moment) if timezone.is_aware(moment) else moment.date()
+    return {'day': day, 'month': day.replace(day=1)}
+
+
+def contribution(instance):
+    """The (key, value) rows this document adds to the rollups, or () if it has no date yet."""
+    stage = STAGE_FOR_MODEL[type(instance)]
+    _, date_field, assignee_field, value_field = STAGES[stage]
+    moment = getattr(instance, date_field)
+    if moment is None:
+        return ()
+    value = Decimal(getattr(instance, value_field) or 0) if value_field else ZERO
+    assignee_id = getattr(instance, f'{assignee_field}_id')
+    return tuple(
+        ((period, start, stage, instance.status, assignee_id), value)
+        for period, start in period_starts(moment).items()
+    )
+
+
+def _apply(key, count, value):
+    period, period_start, stage, status, assignee_id = key
+    rows = PipelineRollup.objects.filter(
+        period=period, period_start=period_start, stage=stage, status=status, assignee_id=assignee_id,
+    )
+    # Increment in SQL so concurrent saves cannot lose updates. A concurrent
+    # first insert may create a second row for the key; reports sum rows.
+    if not rows.update(count=F('count') + count, value=F('value') + value):
+        PipelineRollup.objects.create(
+            period=period, period_start=period_start, stage=stage, status=status,
+            assignee_id=assignee_id, count=count, value=value,
+        )
+
+
+def apply_change(old, new):
+    """Move a document's rollup contribution from `old` to `new` (either may be empty)."""
+    counts, values = Counter(), Counter()
+    for key, value in old:
+        counts[key] -= 1
+        values[key] -= value
+    for key, value in new:
+        counts[key] += 1
+        values[key] += value
+    changed = [key for key in counts.keys() | values.keys() if counts[key] or values[key]]
+    if not changed:
+        return
+    with transaction.atomic():
+        for key in changed:
+            _apply(key, counts[key], values[key])
+
+
+@transaction.atomic
+def rebuild():
+    """Recompute every rollup row from the document tables with grouped queries."""
+    PipelineRollup.objects.all().delete()
+    rows = []
+    for stage, (model, date_field, assignee_field, value_field) in STAGES.items():
+        for period, trunc in PERIODS.items():
+            grouped = (
+                model.objects.exclude(**{f'{date_field}__isnull': True})
+                .annotate(period_start=trunc(date_field))
+                .values('period_start', 'status', assignee_field)
+                .order_by()
+                .annotate(count=Count('pk'), value=Sum(value_field) if value_field else Count('pk'))
+            )
+            for row in grouped:
+                start = row['period_start']
+                rows.append(PipelineRollup(
+                    period=period,
+                    period_start=start.date() if hasattr(start, 'date') else start,
+                    stage=stage,
+                    status=row['status'],
+                    assignee_id=row[assignee_field],
+                    count=row['count'],
+                    value=(row['value'] or ZERO) if value_field else ZERO,
+                ))
+    PipelineRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+CONVERSIONS = [
+    ('inquiry_to_quote', 'inquiry', 'quote'),
+    ('quote_to_sales_order', 'quote', 'sales_order'),
+    ('sales_order_to_job_card', 'sales_order', 'job_card'),
+]
+
+
+def _totals(rows, *keys):
+    return [
+        {**{key: row[key] for key in keys}, 'count': row['total_count'], 'value': row['total_value'] or ZERO}
+        for row in rows.values(*keys).order_by(*keys).annotate(total_count=Sum('count'), total_value=Sum('value'))
+    ]
+
+
+def pipeline_report(period, start, end):
+    """Pipeline figures for rollup periods starting between `start` and `end`, read only from PipelineRollup."""
+    rows = PipelineRollup.objects.filter(period=period, period_start__gte=start, period_start__lte=end)
+
+    stages = {stage: {'count': 0, 'value': ZERO} for stage in STAGES}
+    for row in _totals(rows, 'stage'):
+        stages[row['stage']] = {'count': row['count'], 'value': row['value']}
+
+    conversion = {}
+    for name, source, target in CONVERSIONS:
+        source_count = stages[source]['count']
+        conversion[name] = round(stages[target]['count'] / source_count, 4) if source_count else None
+
+    return {
+        'period': period,
+        'start': start,
+        'end': end,
+        'stages': stages,
+        'conversion': conversion,
+        'timeline': _totals(rows, 'period_start', 'stage'),
+        'quote_value_by_status': _totals(rows.filter(stage='quote'), 'period_start', 'status'),
+        'by_assignee': _totals(rows, 'assignee', 'assignee__username', 'stage'),
+    }
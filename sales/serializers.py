@@ -1,6 +1,16 @@
 from rest_framework import serializers
-from .models import Contact, Inquiry, Quote, QuoteProduct, OutgoingMail, OrderService, SalesOrder, Vehicle, JobCard
+from .models import Contact, Inquiry, Quote, QuoteProduct, QuoteRevision, OutgoingMail, OrderService, SalesOrder, Vehicle, JobCard, JobCardMaterial
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.conf import settings
+from .nested import sync_children
+from .materials import sync_materials
+from .revisions import expand
+from .pricing import ZERO, compute_totals, default_vat_percentage, money
+from inventory.reservations import availability
+
+# Money is Decimal end to end but still rendered as JSON numbers, as it was with FloatField.
+MONEY_FIELD_KWARGS = {'coerce_to_string': False}
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -14,23 +24,55 @@ class ContactSerializer(serializers.ModelSerializer):
         model = Contact
         exclude = ['created_by']
 
+def link_company(data, **filters):
+    """Return the Contact for `data`, preferring the `company` PK over a lookup by company_name."""
+    if data.get('company') is None:
+        data['company'] = Contact.resolve(data.get('company_name'), **filters)
+    if data['company'] is not None:
+        data['company_name'] = data['company'].company_name
+    return data['company']
+
+
+def attach_availability(lines):
+    """Add live stock figures to serialized lines linked to an inventory product, in one query."""
+    stock = availability(line.get('inventory_product') for line in lines)
+    for line in lines:
+        line['availability'] = stock.get(line.get('inventory_product'))
+    return lines
+
+
+class AvailabilityListSerializer(serializers.ListSerializer):
+    """Serializes many documents, adding stock figures to all their lines in one query rather than one per document."""
+
+    def to_representation(self, data):
+        documents = super().to_representation(data)
+        attach_availability([line for document in documents for line in document[self.child.lines_field]])
+        return documents
+
+
 class InquirySerializer(serializers.ModelSerializer):
     contact_name = serializers.CharField(required=False)
     assign_to_username = serializers.CharField(source='assign_to.username', read_only=True)
 
     class Meta:
         model = Inquiry
-        fields = ['id', 'company_name', 'contact_name', 'contact_number', 'status', 'inquiry', 
+        fields = ['id', 'company', 'company_name', 'contact_name', 'contact_number', 'status', 'inquiry', 
                   'assign_to', 'assign_to_username', 'created_on', 'year']
 
 class QuoteProductSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = QuoteProduct
-        fields = ['product', 'specification', 'qty', 'unit_price', 'total_price']
+        fields = ['id', 'inventory_product', 'product', 'specification', 'qty', 'unit_price', 'total_price']
         read_only_fields = ['total_price']  
+        extra_kwargs = {field: dict(MONEY_FIELD_KWARGS) for field in ['unit_price', 'total_price']}
+        extra_kwargs['product'] = {'required': False}
 
     def validate(self, data):
-        if not data.get('product').strip():
+        if not data.get('product') and data.get('inventory_product'):
+            data['product'] = data['inventory_product'].product_name
+        if not (data.get('product') or '').strip():
             raise serializers.ValidationError({"product": "Product name cannot be empty."})
         if data.get('qty') <= 0:
             raise serializers.ValidationError({"qty": "Quantity must be greater than 0."})
@@ -46,73 +88,63 @@ class QuoteSerializer(serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
     quote_no = serializers.CharField(required=False)
 
+    lines_field = 'products'
+
     class Meta:
         model = Quote
+        list_serializer_class = AvailabilityListSerializer
         fields = [
-            'id', 'year', 'quote_title', 'company_name', 'contact_name',
+            'id', 'year', 'quote_title', 'company', 'company_name', 'contact_name',
             'contact_number', 'contact_email', 'company_email', 'status',
             'quote_no', 'vat_applicable', 'vat_percentage', 'subtotal',
             'vat_amount', 'grand_total', 'notes_remarks', 'assign_to',
             'created_by', 'create_date', 'products', 'invoice_pdf'
         ]
-        read_only_fields = ['id', 'created_by', 'create_date', 'contact_name', 'contact_number']
+        read_only_fields = [
+            'id', 'created_by', 'create_date', 'contact_name', 'contact_number',
+            'subtotal', 'vat_amount', 'grand_total',
+        ]
+        extra_kwargs = {field: dict(MONEY_FIELD_KWARGS) for field in ['vat_percentage', 'subtotal', 'vat_amount', 'grand_total']}
 
     def validate(self, data):
         if self.instance is None or 'products' in data:
             if not data.get('products'):
                 raise serializers.ValidationError({"products": "At least one product is required."})
 
-            
-            expected_subtotal = sum(
-                product_data['qty'] * product_data['unit_price']
-                for product_data in data.get('products')
-            )
-
-            
-            subtotal = data.get('subtotal', self.instance.subtotal if self.instance else 0)
-            if not isinstance(subtotal, (int, float)) or subtotal <= 0:
-                raise serializers.ValidationError({"subtotal": "Subtotal must be a positive number."})
-            if abs(subtotal - expected_subtotal) > 0.01:  
-                raise serializers.ValidationError({
-                    "subtotal": f"Subtotal ({subtotal}) does not match the sum of product totals ({expected_subtotal})."
-                })
-
-            
-            vat_percentage = data.get('vat_percentage', self.instance.vat_percentage if self.instance else 0)
+        # Totals are always computed here; any client-supplied values are ignored.
+        if self.instance is None or {'products', 'vat_applicable', 'vat_percentage'} & data.keys():
+            if 'products' in data:
+                lines = [(p['qty'], p['unit_price']) for p in data['products']]
+            else:
+                lines = self.instance.products.values_list('qty', 'unit_price')
+
             vat_applicable = data.get('vat_applicable', self.instance.vat_applicable if self.instance else False)
-            expected_vat_amount = (subtotal * vat_percentage / 100) if vat_applicable else 0
-            vat_amount = data.get('vat_amount', self.instance.vat_amount if self.instance else 0)
-            if not isinstance(vat_amount, (int, float)):
-                raise serializers.ValidationError({"vat_amount": "VAT amount must be a number."})
-            if abs(vat_amount - expected_vat_amount) > 0.01:
-                raise serializers.ValidationError({
-                    "vat_amount": f"VAT amount ({vat_amount}) does not match expected value ({expected_vat_amount})."
-                })
-
-            
-            grand_total = data.get('grand_total', self.instance.grand_total if self.instance else 0)
-            expected_grand_total = subtotal + expected_vat_amount
-            if not isinstance(grand_total, (int, float)):
-                raise serializers.ValidationError({"grand_total": "Grand total must be a number."})
-            if abs(grand_total - expected_grand_total) > 0.01:
-                raise serializers.ValidationError({
-                    "grand_total": f"Grand total ({grand_total}) does not match expected value ({expected_grand_total})."
-                })
+            if 'vat_percentage' in data:
+                vat_percentage = data['vat_percentage']
+            elif self.instance is not None:
+                vat_percentage = self.instance.vat_percentage
+            else:
+                vat_percentage = money(settings.QUOTE_DEFAULT_VAT_PERCENTAGE) if vat_applicable else ZERO
+            if vat_applicable:
+                data['vat_percentage'] = vat_percentage
+
+            totals = compute_totals(lines, vat_percentage if vat_applicable else ZERO)
+            data['subtotal'] = totals['subtotal']
+            data['vat_amount'] = totals['vat']
+            data['grand_total'] = totals['grand_total']
 
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         products_data = validated_data.pop('products')
         validated_data['created_by'] = self.context['request'].user
         validated_data['assign_to'] = validated_data.get('assign_to', self.context['request'].user)
         quote = Quote.objects.create(**validated_data)
-        
-        
-        for product_data in products_data:
-            QuoteProduct.objects.create(quote=quote, **product_data)
-        
+        sync_children(QuoteProduct, 'quote', quote, products_data, create_only=True)
         return quote
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         products_data = validated_data.pop('products', None)
         
@@ -121,15 +153,42 @@ class QuoteSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         instance.save()
 
-        
         if products_data:
-            instance.products.all().delete()
-            for product_data in products_data:
-                QuoteProduct.objects.create(quote=instance, **product_data)
+            sync_children(QuoteProduct, 'quote', instance, products_data)
         
         return instance
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        if not isinstance(self.parent, AvailabilityListSerializer):
+            attach_availability(representation['products'])
+        return representation
     
 
+class QuoteRevisionListSerializer(serializers.ModelSerializer):
+    created_by_username = serializers.CharField(source='created_by.username', read_only=True, allow_null=True)
+    grand_total = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = QuoteRevision
+        fields = ['id', 'number', 'created_by', 'created_by_username', 'created_on', 'grand_total', 'pdf']
+        read_only_fields = fields
+
+
+class QuoteRevisionSerializer(serializers.ModelSerializer):
+    created_by_username = serializers.CharField(source='created_by.username', read_only=True, allow_null=True)
+
+    class Meta:
+        model = QuoteRevision
+        fields = ['id', 'quote', 'number', 'created_by', 'created_by_username', 'created_on', 'pdf', 'snapshot']
+        read_only_fields = fields
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        representation['snapshot'] = expand(representation['snapshot'])
+        return representation
+
+
 class OutgoingMailSerializer(serializers.ModelSerializer):
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     company_name = serializers.CharField(required=False)
@@ -137,7 +196,7 @@ class OutgoingMailSerializer(serializers.ModelSerializer):
     class Meta:
         model = OutgoingMail
         fields = [
-            'id', 'company_name', 'contact_name', 'contact_number', 'status', 'message',
+            'id', 'company', 'company_name', 'contact_name', 'contact_number', 'status', 'message',
             'created_on', 'year', 'created_by', 'created_by_username', 'company_email',
             'contact_email', 'mail_subject', 'quote_no'
         ]
@@ -152,11 +211,18 @@ class OutgoingMailSerializer(serializers.ModelSerializer):
 
 
 class OrderServiceSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = OrderService
-        fields = ['sorp', 'barcode', 'service_title', 'qty', 'rate', 'unit', 'amount']
+        fields = ['id', 'inventory_product', 'sorp', 'barcode', 'service_title', 'qty', 'rate', 'unit', 'amount']
+        read_only_fields = ['amount']
+        extra_kwargs = {field: dict(MONEY_FIELD_KWARGS) for field in ['rate', 'amount']}
+        extra_kwargs['service_title'] = {'required': False}
 
     def validate(self, data):
+        if not data.get('service_title') and data.get('inventory_product'):
+            data['service_title'] = data['inventory_product'].product_name
         if not data.get('service_title'):
             raise serializers.ValidationError({"service_title": "Service title is required."})
         if data.get('qty', 0) <= 0:
@@ -171,17 +237,30 @@ class SalesOrderSerializer(serializers.ModelSerializer):
     contact_name = serializers.CharField(read_only=True, allow_null=True)
     contact_number = serializers.CharField(read_only=True, allow_null=True)
 
+    lines_field = 'order_services'
+
     class Meta:
         model = SalesOrder
+        list_serializer_class = AvailabilityListSerializer
         fields = [
-            'id', 'company_name', 'contact_email', 'order_no', 'company_email', 'lpo_no', 'address',
+            'id', 'company', 'company_name', 'contact_email', 'order_no', 'company_email', 'lpo_no', 'address',
             'subject', 'terms_and_conditions', 'issue_date', 'currency',
             'cust_ref', 'our_ref', 'advance_amount', 'remarks', 'payment_terms',
-            'delivery_terms', 'omc_cost', 'subtotal', 'vat', 'net_total', 'created_by',
+            'delivery_terms', 'omc_cost', 'subtotal', 'vat_percentage', 'vat', 'net_total', 'created_by',
             'created_by_username', 'created_on', 'order_services', 'status', 'accounts_status',
-            'gm_status', 'mgmt_status', 'contact_name', 'contact_number'
+            'gm_status', 'mgmt_status', 'contact_name', 'contact_number', 'order_pdf', 'source_quote'
+        ]
+        read_only_fields = [
+            'id', 'order_no', 'created_by', 'created_by_username', 'created_on', 'contact_name', 'contact_number', 'order_pdf',
+            'source_quote',
+            'subtotal', 'vat', 'net_total',
         ]
-        read_only_fields = ['id', 'order_no', 'created_by', 'created_by_username', 'created_on', 'contact_name', 'contact_number']
+        extra_kwargs = {
+            field: dict(MONEY_FIELD_KWARGS)
+            for field in ['advance_amount', 'omc_cost', 'subtotal', 'vat_percentage', 'vat', 'net_total']
+        }
+        # Both can be filled from `company` instead; validate() still requires them.
+        extra_kwargs.update({'company_name': {'required': False}, 'contact_email': {'required': False}})
 
     def validate(self, data):
         
@@ -195,6 +274,13 @@ class SalesOrderSerializer(serializers.ModelSerializer):
             'issue_date', 'currency', 'payment_terms', 'delivery_terms'
         ]
         errors = {}
+        contact = link_company(data)
+        if contact is not None:
+            data.setdefault('contact_email', contact.contact_email)
+            if not data.get('company_email'):
+                data['company_email'] = contact.company_email
+        elif data.get('company_name'):
+            errors['company_name'] = "Company does not exist in contacts."
         for field in required_fields:
             if not data.get(field):
                 errors[field] = f"{field.replace('_', ' ')} is required."
@@ -203,50 +289,33 @@ class SalesOrderSerializer(serializers.ModelSerializer):
             errors['order_services'] = "At least one service is required."
         
         
-        company_name = data.get('company_name')
-        if company_name:
-            try:
-                contact = Contact.objects.get(company_name=company_name)
-                data['contact_name'] = contact.contact_name
-                data['contact_number'] = contact.contact_number
-                
-                if data.get('contact_email') and data['contact_email'] != contact.contact_email:
-                    errors['contact_email'] = "Contact email must match the email of the selected company."
-                else:
-                    data['contact_email'] = contact.contact_email
-                
-                if not data.get('company_email'):
-                    data['company_email'] = contact.company_email
-            except Contact.DoesNotExist:
-                errors['company_name'] = "Company does not exist in contacts."
-        else:
-            errors['company_name'] = "Company name is required."
+        if contact is not None and data.get('contact_email') and data['contact_email'] != contact.contact_email:
+            errors['contact_email'] = "Contact email must match the email of the selected company."
 
         if errors:
             raise serializers.ValidationError(errors)
         
         
         services = data.get('order_services', [])
-        subtotal = sum((service.get('qty', 0) * service.get('rate', 0)) for service in services)
-        vat = subtotal * 0.05  
-        net_total = subtotal + vat
+        vat_percentage = data.get('vat_percentage', self.instance.vat_percentage if self.instance else default_vat_percentage())
+        totals = compute_totals([(service['qty'], service['rate']) for service in services], vat_percentage)
 
-        data['subtotal'] = subtotal
-        data['vat'] = vat
-        data['net_total'] = net_total
+        data['subtotal'] = totals['subtotal']
+        data['vat'] = totals['vat']
+        data['net_total'] = totals['grand_total']
 
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         services_data = validated_data.pop('order_services')
         validated_data['order_no'] = SalesOrder.generate_unique_order_no()
         sales_order = SalesOrder.objects.create(**validated_data)
-        
-        for service_data in services_data:
-            OrderService.objects.create(sales_order=sales_order, **service_data)
-        
+        sync_children(OrderService, 'sales_order', sales_order, services_data, create_only=True)
+        sales_order.sync_reservations()
         return sales_order
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         services_data = validated_data.pop('order_services', None)
         
@@ -255,31 +324,61 @@ class SalesOrderSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         
         
+        # Totals follow the lines and the VAT rate; a PATCH of either alone still recomputes them.
         if services_data is not None:
-            instance.order_services.all().delete()
-            for service_data in services_data:
-                OrderService.objects.create(sales_order=instance, **service_data)
-            
-            
-            instance.subtotal = sum(service.qty * service.rate for service in instance.order_services.all())
-            instance.vat = instance.subtotal * 0.05
-            instance.net_total = instance.subtotal + instance.vat
+            services = sync_children(OrderService, 'sales_order', instance, services_data)
+            lines = [(service.qty, service.rate) for service in services]
+        elif 'vat_percentage' in validated_data:
+            lines = instance.order_services.values_list('qty', 'rate')
+        else:
+            lines = None
+
+        if lines is not None:
+            totals = compute_totals(lines, instance.vat_percentage)
+            instance.subtotal = totals['subtotal']
+            instance.vat = totals['vat']
+            instance.net_total = totals['grand_total']
 
         instance.save()
+        instance.sync_reservations()
         return instance
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        if not isinstance(self.parent, AvailabilityListSerializer):
+            attach_availability(representation['order_services'])
+        return representation
     
 class VehicleSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = Vehicle
-        fields = ['chassis_number', 'specification', 'remarks', 'vehicle_make', 'vehicle_type']
+        fields = ['id', 'chassis_number', 'specification', 'remarks', 'vehicle_make', 'vehicle_type']
 
     def validate(self, data):
         if not data.get('chassis_number'):
             raise serializers.ValidationError({"chassis_number": "Chassis number is required."})
         return data
 
+class JobCardMaterialSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    product_name = serializers.CharField(source='product.product_name', read_only=True)
+    removal_request = serializers.IntegerField(source='removal_item.request_id', read_only=True, allow_null=True)
+    stock_deducted = serializers.BooleanField(source='removal_item.request.stock_deducted', read_only=True, allow_null=True)
+
+    class Meta:
+        model = JobCardMaterial
+        fields = [
+            'id', 'vehicle', 'product', 'product_name', 'location', 'quantity', 'remarks',
+            'removal_request', 'stock_deducted', 'created_on'
+        ]
+        read_only_fields = ['created_on']
+        extra_kwargs = {'quantity': {'min_value': 1}}
+
 class JobCardSerializer(serializers.ModelSerializer):
     vehicles = VehicleSerializer(many=True, required=True)
+    materials = JobCardMaterialSerializer(many=True, required=False)
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     contact_name = serializers.CharField(read_only=True, allow_null=True)
     contact_number = serializers.CharField(read_only=True, allow_null=True)
@@ -287,18 +386,35 @@ class JobCardSerializer(serializers.ModelSerializer):
     class Meta:
         model = JobCard
         fields = [
-            'id', 'job_card_no', 'company_name', 'contact_email', 'sales_order_number', 'quantity', 'status',
-            'remarks', 'created_by', 'created_by_username', 'created_on', 'vehicles',
-            'contact_name', 'contact_number'
+            'id', 'job_card_no', 'company', 'company_name', 'contact_email', 'sales_order', 'sales_order_number', 'quantity', 'status',
+            'remarks', 'created_by', 'created_by_username', 'created_on', 'vehicles', 'materials',
+            'contact_name', 'contact_number', 'job_card_pdf'
         ]
-        read_only_fields = ['id', 'job_card_no', 'created_by', 'created_by_username', 'created_on', 'contact_name', 'contact_number']
+        read_only_fields = ['id', 'job_card_no', 'created_by', 'created_by_username', 'created_on', 'contact_name', 'contact_number', 'job_card_pdf']
+        extra_kwargs = {
+            'company_name': {'required': False}, 'contact_email': {'required': False},
+            'sales_order_number': {'required': False},
+        }
 
     def validate(self, data):
+        # The order may be given by id or by its number; either way the job card links to it.
+        if data.get('sales_order'):
+            data['sales_order_number'] = data['sales_order'].order_no
+        elif data.get('sales_order_number'):
+            data['sales_order'] = SalesOrder.objects.filter(order_no=data['sales_order_number']).first()
+            if data['sales_order'] is None:
+                raise serializers.ValidationError({'sales_order_number': "Invalid sales order number."})
+
         if self.partial:
             return data
         
         errors = {}
         required_fields = ['company_name', 'contact_email', 'sales_order_number', 'quantity']
+        contact = link_company(data)
+        if contact is not None:
+            data.setdefault('contact_email', contact.contact_email)
+        elif data.get('company_name'):
+            errors['company_name'] = "Company does not exist in contacts."
         for field in required_fields:
             if not data.get(field):
                 errors[field] = f"{field.replace('_', ' ')} is required."
@@ -309,48 +425,67 @@ class JobCardSerializer(serializers.ModelSerializer):
         if not data.get('vehicles'):
             errors['vehicles'] = "At least one vehicle is required."
 
-        company_name = data.get('company_name')
-        if company_name:
-            try:
-                contact = Contact.objects.get(company_name=company_name)
-                data['contact_name'] = contact.contact_name
-                data['contact_number'] = contact.contact_number
-                if data.get('contact_email') and data['contact_email'] != contact.contact_email:
-                    errors['contact_email'] = "Contact email must match the email of the selected company."
-                else:
-                    data['contact_email'] = contact.contact_email
-            except Contact.DoesNotExist:
-                errors['company_name'] = "Company does not exist in contacts."
-
-        sales_order_number = data.get('sales_order_number')
-        if sales_order_number and not SalesOrder.objects.filter(order_no=sales_order_number).exists():
-            errors['sales_order_number'] = "Invalid sales order number."
+        if contact is not None and data.get('contact_email') and data['contact_email'] != contact.contact_email:
+            errors['contact_email'] = "Contact email must match the email of the selected company."
 
         if errors:
             raise serializers.ValidationError(errors)
 
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         vehicles_data = validated_data.pop('vehicles')
+        materials_data = validated_data.pop('materials', None)
         validated_data['created_by'] = self.context['request'].user
         job_card = JobCard.objects.create(**validated_data)
-
-        for vehicle_data in vehicles_data:
-            Vehicle.objects.create(job_card=job_card, **vehicle_data)
-
+        sync_children(Vehicle, 'job_card', job_card, vehicles_data, create_only=True)
+        if materials_data:
+            sync_materials(job_card, materials_data, self.context['request'].user)
         return job_card
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         vehicles_data = validated_data.pop('vehicles', None)
+        materials_data = validated_data.pop('materials', None)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
         if vehicles_data is not None:
-            instance.vehicles.all().delete()
-            for vehicle_data in vehicles_data:
-                Vehicle.objects.create(job_card=instance, **vehicle_data)
+            sync_children(Vehicle, 'job_card', instance, vehicles_data)
+        if materials_data is not None:
+            sync_materials(instance, materials_data, self.context['request'].user)
 
         instance.save()
-        return instance
\ No newline at end of file
+        return instance
+
+class FulfilmentJobCardSerializer(serializers.ModelSerializer):
+    vehicles = VehicleSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = JobCard
+        fields = ['id', 'job_card_no', 'status', 'quantity', 'created_on', 'vehicles']
+
+class SalesOrderFulfilmentSerializer(serializers.ModelSerializer):
+    """An order with its job cards and their vehicles; expects both to be prefetched."""
+    job_cards = FulfilmentJobCardSerializer(many=True, read_only=True)
+    job_card_count = serializers.SerializerMethodField()
+    delivered_count = serializers.SerializerMethodField()
+    vehicle_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SalesOrder
+        fields = [
+            'id', 'order_no', 'lpo_no', 'company_name', 'status', 'issue_date', 'created_on',
+            'job_card_count', 'delivered_count', 'vehicle_count', 'job_cards'
+        ]
+
+    def get_job_card_count(self, obj):
+        return len(obj.job_cards.all())
+
+    def get_delivered_count(self, obj):
+        return sum(1 for job_card in obj.job_cards.all() if job_card.status == 'delivered')
+
+    def get_vehicle_count(self, obj):
+        return sum(len(job_card.vehicles.all()) for job_card in obj.job_cards.all())
@@ -0,0 +1,74 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from inventory.models import RemovalRequest
+from inventory.reservations import release
+from .models import JobCard, SalesOrder
+from .rollups import STAGE_FOR_MODEL, STAGES, apply_change, contribution
+
+# Each document remembers its last saved rollup contribution, so a save only
+# moves the difference instead of recounting anything.
+
+
+def _rollup_fields(sender):
+    _, date_field, assignee_field, value_field = STAGES[STAGE_FOR_MODEL[sender]]
+    return {'status', date_field, f'{assignee_field}_id', value_field} - {None}
+
+
+def remember_rollup_contribution(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._rollup_contribution = ()
+    elif _rollup_fields(sender) & {f.attname for f in sender._meta.concrete_fields if f.attname not in instance.__dict__}:
+        # Loaded with .only()/.defer(); look the stored values up if it is saved.
+        instance._rollup_contribution = None
+    else:
+        instance._rollup_contribution = contribution(instance)
+
+
+def load_rollup_contribution(sender, instance, raw=False, **kwargs):
+    if not raw and getattr(instance, '_rollup_contribution', None) is None:
+        stored = sender.objects.filter(pk=instance.pk).first() if instance.pk is not None else None
+        instance._rollup_contribution = contribution(stored) if stored else ()
+
+
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new = contribution(instance)
+    apply_change(() if created else instance._rollup_contribution, new)
+    instance._rollup_contribution = new
+
+
+def update_rollups_on_delete(sender, instance, **kwargs):
+    old = instance._rollup_contribution
+    if old is None:
+        # The stored values are gone; `rebuild_pipeline_rollups` corrects the counts.
+        return
+    apply_change(old, ())
+
+
+# Connected per rollup model so other models' instances never reach the handlers.
+for model in STAGE_FOR_MODEL:
+    post_init.connect(remember_rollup_contribution, sender=model)
+    pre_save.connect(load_rollup_contribution, sender=model)
+    post_save.connect(update_rollups_on_save, sender=model)
+    post_delete.connect(update_rollups_on_delete, sender=model)
+
+
+@receiver(post_delete, sender=SalesOrder)
+def release_sales_order_reservations(sender, instance, **kwargs):
+    release('sales_order', instance.pk)
+
+
+@receiver(pre_delete, sender=JobCard)
+def cancel_job_card_removals(sender, instance, **kwargs):
+    """Material removals not yet taken out of stock go with the job card, releasing what they hold."""
+    for request in RemovalRequest.objects.filter(job_card=instance, stock_deducted=False):
+        request.delete()
+
+
+@receiver(post_delete, sender=JobCard)
+def update_order_status_on_job_card_delete(sender, instance, **kwargs):
+    order = SalesOrder.objects.filter(pk=instance.sales_order_id).first()
+    if order is not None:
+        order.sync_fulfilment_status()
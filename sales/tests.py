@@ -1,3 +1,213 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from inventory.models import Product, RemovalRequest, StockReservation
+from .models import Contact, JobCard, OrderService, SalesOrder
+from .nested import sync_children
+
+
+class SyncChildrenTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='sales')
+        self.contact = Contact.objects.create(
+            company_name='ACME', contact_name='Bob', company_email='office@acme.test', contact_email='bob@acme.test',
+            company_number='1', contact_number='2', license_number='L', license_expiry_date='2030-01-01',
+            tirn_number='T', created_by=self.user, license_file='licenses/acme.pdf',
+        )
+        self.order = SalesOrder.objects.create(
+            company=self.contact, contact_email='bob@acme.test', order_no='10001', lpo_no='LPO-1',
+            address='Street 1', subject='Parts', issue_date='2026-01-01', payment_terms='30 days',
+            delivery_terms='Ex works', subtotal=0, vat=0, net_total=0, created_by=self.user,
+        )
+        self.first, self.second = OrderService.objects.bulk_create([
+            OrderService(sales_order=self.order, service_title='Bolt', qty=1, rate=Decimal('5.00'), amount=Decimal('5.00')),
+            OrderService(sales_order=self.order, service_title='Nut', qty=2, rate=Decimal('1.00'), amount=Decimal('2.00')),
+        ])
+
+    def sync(self, items):
+        return sync_children(OrderService, 'sales_order', self.order, items)
+
+    def test_updates_creates_and_deletes(self):
+        children = self.sync([
+            {'id': self.first.pk, 'qty': 3},
+            {'service_title': 'Washer', 'qty': 4, 'rate': Decimal('0.50')},
+        ])
+        self.assertEqual(len(children), 2)
+        lines = {line.service_title: line for line in self.order.order_services.all()}
+        self.assertEqual(set(lines), {'Bolt', 'Washer'})
+        self.assertEqual(lines['Bolt'].qty, 3)
+        self.assertEqual(lines['Bolt'].amount, Decimal('15.00'))
+        self.assertEqual(lines['Washer'].amount, Decimal('2.00'))
+
+    def test_create_only_adds_rows(self):
+        sync_children(OrderService, 'sales_order', self.order, [
+            {'service_title': 'Washer', 'qty': 1, 'rate': Decimal('0.50')},
+        ], create_only=True)
+        self.assertEqual(self.order.order_services.count(), 3)
+
+    def test_unknown_id_is_rejected(self):
+        with self.assertRaises(serializers.ValidationError):
+            self.sync([{'id': self.second.pk + 100, 'qty': 1}])
+        self.assertEqual(self.order.order_services.count(), 2)
+
+    def test_repeated_id_is_rejected(self):
+        with self.assertRaises(serializers.ValidationError) as raised:
+            self.sync([{'id': self.first.pk, 'qty': 1}, {'id': self.first.pk, 'qty': 2}])
+        self.assertIn('more than once', str(raised.exception.detail['id']))
+        self.assertEqual(self.order.order_services.count(), 2)
+
+    def test_patch_with_repeated_id_is_a_bad_request(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        line = {'id': self.first.pk, 'service_title': 'Bolt', 'qty': 1, 'rate': '5.00'}
+        response = client.patch(f'/sales/sales-orders/{self.order.pk}/', {'order_services': [line, line]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.order.order_services.count(), 2)
+
+
+class SalesOrderTotalsTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='sales')
+        Contact.objects.create(
+            company_name='ACME', contact_name='Bob', company_email='office@acme.test', contact_email='bob@acme.test',
+            company_number='1', contact_number='2', license_number='L', license_expiry_date='2030-01-01',
+            tirn_number='T', created_by=self.user, license_file='licenses/acme.pdf',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/sales/sales-orders/', {
+            'company_name': 'ACME', 'contact_email': 'bob@acme.test', 'lpo_no': 'LPO-1', 'address': 'Street 1',
+            'subject': 'Parts', 'issue_date': '2026-01-01', 'currency': 'AED', 'payment_terms': '30 days',
+            'delivery_terms': 'Ex works', 'vat_percentage': '5.00',
+            'order_services': [{'service_title': 'Bolt', 'qty': 10, 'rate': '5.00'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.order_id = response.json()['id']
+
+    def test_patching_vat_percentage_recomputes_totals(self):
+        response = self.client.patch(f'/sales/sales-orders/{self.order_id}/', {'vat_percentage': '10.00'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['vat'], 5.0)
+        self.assertEqual(response.json()['net_total'], 55.0)
+
+    def test_patching_other_fields_keeps_totals(self):
+        response = self.client.patch(f'/sales/sales-orders/{self.order_id}/', {'remarks': 'Rush'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['vat'], 2.5)
+        self.assertEqual(response.json()['net_total'], 52.5)
+
+
+class JobCardFulfilmentTests(TestCase):
+    """Job-card materials and removal requests raised for an order take over the stock the order holds."""
+
+    def setUp(self):
+        self.user = User.objects.create(username='sales')
+        Contact.objects.create(
+            company_name='ACME', contact_name='Bob', company_email='office@acme.test', contact_email='bob@acme.test',
+            company_number='1', contact_number='2', license_number='L', license_expiry_date='2030-01-01',
+            tirn_number='T', created_by=self.user, license_file='licenses/acme.pdf',
+        )
+        self.product = Product.objects.create(
+            type='local', product_name='Bolt', part_no='B-1', storage_location='A1', measurement_unit='pcs',
+            stock_count=5, quantity_added=5,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/sales/sales-orders/', {
+            'company_name': 'ACME', 'contact_email': 'bob@acme.test', 'lpo_no': 'LPO-1', 'address': 'Street 1',
+            'subject': 'Parts', 'issue_date': '2026-01-01', 'currency': 'AED', 'payment_terms': '30 days',
+            'delivery_terms': 'Ex works',
+            'order_services': [{'inventory_product': self.product.pk, 'qty': 5, 'rate': '10.00'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.order = SalesOrder.objects.get(pk=response.json()['id'])
+
+    def held(self, source_type, source_id):
+        return sum(StockReservation.objects.filter(source_type=source_type, source_id=source_id).values_list('quantity', flat=True))
+
+    def job_card(self, materials=()):
+        response = self.client.post('/sales/job-cards/', {
+            'company_name': 'ACME', 'contact_email': 'bob@acme.test', 'sales_order': self.order.pk, 'quantity': 1,
+            'vehicles': [{'chassis_number': 'CH-1'}], 'materials': list(materials),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.json())
+        return JobCard.objects.get(pk=response.json()['id'])
+
+    def test_job_card_materials_take_over_the_order_reservation(self):
+        job_card = self.job_card([{'product': self.product.pk, 'quantity': 5}])
+        request = RemovalRequest.objects.get(job_card=job_card)
+        self.assertEqual(self.held('sales_order', self.order.pk), 0)
+        self.assertEqual(self.held('removal_request', request.pk), 5)
+
+    def test_removal_request_for_job_card_takes_over_the_order_reservation(self):
+        job_card = self.job_card()
+        response = self.client.post('/inventory/local/removal-requests/', {
+            'type': 'local', 'removal_type': 'sales', 'job_card': job_card.pk,
+            'product_items': [{'product_id': self.product.pk, 'quantity': 5}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.json())
+        self.assertEqual(self.held('sales_order', self.order.pk), 0)
+
+    def test_unrelated_removal_cannot_take_reserved_stock(self):
+        response = self.client.post('/inventory/local/removal-requests/', {
+            'type': 'local', 'removal_type': 'sales',
+            'product_items': [{'product_id': self.product.pk, 'quantity': 1}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_deduction_and_rejection(self):
+        job_card = self.job_card([{'product': self.product.pk, 'quantity': 3}])
+        request = RemovalRequest.objects.get(job_card=job_card)
+        self.assertEqual(self.held('sales_order', self.order.pk), 2)
+
+        request.deduct_stock()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_count, 2)
+        self.assertEqual(self.held('sales_order', self.order.pk), 2)
+        self.assertEqual(self.held('removal_request', request.pk), 0)
+
+        other = self.job_card([{'product': self.product.pk, 'quantity': 2}])
+        other_request = RemovalRequest.objects.get(job_card=other)
+        self.assertEqual(self.held('sales_order', self.order.pk), 0)
+        other_request.gm_status = 'rejected'
+        other_request.save()
+        other_request.sync_reservations()
+        self.assertEqual(self.held('sales_order', self.order.pk), 2)
+
+    def patch_materials(self, job_card, materials):
+        return self.client.patch(f'/sales/job-cards/{job_card.pk}/', {'materials': materials}, format='json')
+
+    def test_repeated_material_id_is_a_bad_request(self):
+        job_card = self.job_card([{'product': self.product.pk, 'quantity': 2}])
+        line = {'id': job_card.materials.get().pk, 'product': self.product.pk, 'quantity': 3}
+        response = self.patch_materials(job_card, [line, line])
+        self.assertEqual(response.status_code, 400)
+
+    def test_lines_on_a_request_under_approval_cannot_change(self):
+        job_card = self.job_card([{'product': self.product.pk, 'quantity': 2}])
+        material = job_card.materials.get()
+        RemovalRequest.objects.filter(job_card=job_card).update(accounts_status='approved')
+        response = self.patch_materials(job_card, [{'id': material.pk, 'product': self.product.pk, 'quantity': 3}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.patch_materials(job_card, []).status_code, 400)
+        self.assertEqual(RemovalRequest.objects.get(job_card=job_card).items.get().quantity, 2)
 
-# Create your tests here.
+    def test_lines_on_a_rejected_request_move_to_a_new_request(self):
+        job_card = self.job_card([{'product': self.product.pk, 'quantity': 2}])
+        material = job_card.materials.get()
+        rejected = RemovalRequest.objects.get(job_card=job_card)
+        rejected.gm_status = 'rejected'
+        rejected.save()
+        rejected.sync_reservations()
+        response = self.patch_materials(job_card, [{'id': material.pk, 'product': self.product.pk, 'quantity': 3}])
+        self.assertEqual(response.status_code, 200, response.json())
+        self.assertEqual(rejected.items.get().quantity, 2)
+        request = RemovalRequest.objects.exclude(pk=rejected.pk).get(job_card=job_card)
+        self.assertEqual(request.items.get().quantity, 3)
+        self.assertEqual(self.held('sales_order', self.order.pk), 2)
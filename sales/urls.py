@@ -1,15 +1,23 @@
 from django.urls import path
-from .views import index, ContactCreateView, ContactListView,SalesOrderDetailView, SalesOrderListCreateView,OrderCompanyListView, ContactDetailView, InquiryListCreateView, InquiryDetailView, IncomingCompanyListView, user_list, QuoteListCreateView, QuoteDetailView, QuotationCompanyListView, OutgoingMailListCreateView, OutgoingMailDetailView, JobCardListCreateView, JobCardDetailView
+from .views import index, ContactCreateView, ContactListView,SalesOrderDetailView, SalesOrderListCreateView,OrderCompanyListView, ContactDetailView, InquiryListCreateView, InquiryDetailView, IncomingCompanyListView, user_list, QuoteListCreateView, QuoteDetailView, QuotationCompanyListView, OutgoingMailListCreateView, OutgoingMailDetailView, JobCardListCreateView, JobCardDetailView, CustomerSummaryView, CustomerSummaryBatchView, PipelineAnalyticsView, JobCardCostView, JobProfitabilityView, SalesOrderFulfilmentView, QuoteConvertView, QuoteBatchConvertView, QuoteRevisionListView, QuoteRevisionDetailView, QuoteRevisionPdfView, QuoteRevisionDiffView
 
 urlpatterns = [
     path('', index, name='index'),
     path('contacts/', ContactCreateView.as_view(), name='contact-create'),
     path('contacts/all/', ContactListView.as_view(), name='contact-list'),
     path('contacts/<int:pk>/', ContactDetailView.as_view(), name='contact-detail'),
+    path('contacts/<int:pk>/summary/', CustomerSummaryView.as_view(), name='customer-summary'),
+    path('contacts/summary/', CustomerSummaryBatchView.as_view(), name='customer-summary-batch'),
     path('inquiries/', InquiryListCreateView.as_view(), name='inquiry_list_create'),
     path('inquiries/<int:pk>/', InquiryDetailView.as_view(), name='inquiry_detail'),
     path('quotes/', QuoteListCreateView.as_view(), name='quote-list-create'),
     path('quotes/<int:pk>/', QuoteDetailView.as_view(), name='quote-detail'),
+    path('quotes/<int:pk>/revisions/', QuoteRevisionListView.as_view(), name='quote-revision-list'),
+    path('quotes/<int:pk>/revisions/diff/', QuoteRevisionDiffView.as_view(), name='quote-revision-diff'),
+    path('quotes/<int:pk>/revisions/<int:number>/', QuoteRevisionDetailView.as_view(), name='quote-revision-detail'),
+    path('quotes/<int:pk>/revisions/<int:number>/pdf/', QuoteRevisionPdfView.as_view(), name='quote-revision-pdf'),
+    path('quotes/<int:pk>/convert/', QuoteConvertView.as_view(), name='quote-convert'),
+    path('quotes/convert/', QuoteBatchConvertView.as_view(), name='quote-batch-convert'),
     path('outgoing-mails/', OutgoingMailListCreateView.as_view(), name='outgoing-mail-list-create'),
     path('outgoing-mails/<int:pk>/', OutgoingMailDetailView.as_view(), name='outgoing-mail-detail'),
     path('incoming-companies/', IncomingCompanyListView.as_view(), name='company-list'),  
@@ -17,7 +25,11 @@ urlpatterns = [
     path('order-companies/', OrderCompanyListView.as_view(), name='company-list'),  
     path('users/', user_list, name='user-list'), 
     path('sales-orders/', SalesOrderListCreateView.as_view(), name='sales-order-list-create'),
+    path('sales-orders/fulfilment/', SalesOrderFulfilmentView.as_view(), name='sales-order-fulfilment'),
     path('sales-orders/<int:pk>/', SalesOrderDetailView.as_view(), name='sales-order-detail'),
     path('job-cards/', JobCardListCreateView.as_view(), name='job-card-list-create'),
     path('job-cards/<int:pk>/', JobCardDetailView.as_view(), name='job-card-detail'),
+    path('job-cards/<int:pk>/costs/', JobCardCostView.as_view(), name='job-card-costs'),
+    path('analytics/job-profitability/', JobProfitabilityView.as_view(), name='job-profitability'),
+    path('analytics/pipeline/', PipelineAnalyticsView.as_view(), name='pipeline-analytics'),
 ]
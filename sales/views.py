@@ -3,7 +3,6 @@ from django.http import HttpResponse
 from rest_framework import generics, permissions, status
 from .models import Inquiry, Contact
 from .serializers import ContactSerializer, QuoteSerializer, OutgoingMailSerializer
-import os
 from .models import Inquiry, Quote, OutgoingMail
 from django.contrib.auth.models import User
 from rest_framework.decorators import api_view
@@ -42,14 +41,9 @@ class ContactDetailView(generics.RetrieveUpdateDestroyAPIView):
 
         # Handle license_file replacement
         if 'license_file' in data and data['license_file'] and data['license_file'] != 'null':
-            # Delete existing file if it exists
+            # Release the existing file; the storage removes it once nothing else references it
             if instance.license_file:
-                file_path = instance.license_file.path
-                if os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                    except Exception as e:
-                        return JsonResponse({"error": f"Failed to delete existing file: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+                instance.license_file.delete(save=False)
         elif 'license_file' in data and (data['license_file'] is None or data['license_file'] == 'null'):
             # Remove license_file from data if not provided or invalid
             data.pop('license_file')
@@ -62,12 +56,7 @@ class ContactDetailView(generics.RetrieveUpdateDestroyAPIView):
     def delete(self, request, *args, **kwargs):
         contact = self.get_object()
         if contact.license_file:
-            file_path = contact.license_file.path
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except Exception as e:
-                    return JsonResponse({"error": f"File deletion failed: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+            contact.license_file.delete(save=False)
         return super().delete(request, *args, **kwargs)
     
 class InquiryListCreateView(generics.ListCreateAPIView):
@@ -77,30 +66,15 @@ class InquiryListCreateView(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         
-        company_name = self.request.data.get('company_name')
-        contact_number = self.request.data.get('contact_number')
-
-        if not company_name or not contact_number:
-            raise ValueError("Company name and contact number are required.")
-
-        
-        try:
-            company = Contact.objects.get(company_name=company_name, contact_number=contact_number)
-        except Contact.DoesNotExist:
-            return HttpResponse({"detail": "Company not found."}, status=status.HTTP_404_NOT_FOUND)
-
-        
-        data = {
-            'company_name': company.company_name,
-            'contact_name': company.contact_name,
-            'contact_number': company.contact_number,
-            'status': 'new',  
-            'inquiry': self.request.data.get('inquiry'),
-            'assign_to': self.request.user  
-        }
+        company = serializer.validated_data.get('company') or Contact.resolve(
+            serializer.validated_data.get('company_name'),
+            contact_number=serializer.validated_data.get('contact_number'),
+        )
+        if company is None:
+            raise ValidationError({"company_name": "Company not found."})
 
-        
-        serializer.save(**data)
+        # Inquiry.save() copies the company and contact details from the linked contact.
+        serializer.save(company=company, status='new', assign_to=self.request.user)
 
     def get_queryset(self):
         
@@ -161,20 +135,29 @@ def user_list(request):
     user_data = [{"id": user.id, "username": user.username} for user in users]
     return JsonResponse(user_data, safe=False, status=200)
 
-from django.core.exceptions import ObjectDoesNotExist
 from django.conf import settings
-from .utils import generate_invoice_pdf
-from django.core.files import File
+from django.db import transaction
+from django.db.models import F, Max
+from django.http import HttpResponseRedirect
+from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .models import QuoteRevision
+from .serializers import QuoteRevisionListSerializer, QuoteRevisionSerializer
+from .documents import queue_render, ensure_rendered
+from .revisions import diff, record_revision, revision_pdf
 
 class QuoteListCreateView(generics.ListCreateAPIView):
     serializer_class = QuoteSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
+        quotes = Quote.objects.select_related('created_by').prefetch_related('products')
         year = self.request.query_params.get('year')
         if year:
-            return Quote.objects.filter(year=year)
-        return Quote.objects.all()
+            return quotes.filter(year=year)
+        return quotes
 
     def perform_create(self, serializer):
         
@@ -183,53 +166,93 @@ class QuoteListCreateView(generics.ListCreateAPIView):
             quote_no = Quote.generate_unique_quote_no()
 
         
-        company_name = self.request.data.get('company_name')
-        try:
-            contact = Contact.objects.get(company_name=company_name)
-            quote = serializer.save(
-                created_by=self.request.user,
-                assign_to=self.request.user,
-                contact_name=contact.contact_name,
-                contact_number=contact.contact_number,
-                quote_no=quote_no  
-            )
-        except ObjectDoesNotExist:
-            quote = serializer.save(
-                created_by=self.request.user,
-                assign_to=self.request.user,
-                contact_name='',
-                contact_number='',
-                quote_no=quote_no  
-            )
-
-        
-        invoice_filename = f"invoice_{quote.quote_no}_{quote.id}.pdf"
-        invoice_dir = os.path.join(settings.MEDIA_ROOT, 'invoices')
-        invoice_path = os.path.join(invoice_dir, invoice_filename)
+        company = serializer.validated_data.get('company') or Contact.resolve(serializer.validated_data.get('company_name'))
+        # With a company linked, Quote.save() fills contact_name/contact_number from it.
+        quote = serializer.save(
+            created_by=self.request.user,
+            assign_to=self.request.user,
+            company=company,
+            contact_name='',
+            contact_number='',
+            quote_no=quote_no  
+        )
 
-        
-        os.makedirs(invoice_dir, exist_ok=True)
-
-        try:
-            generate_invoice_pdf(quote, invoice_path)
-            
-            with open(invoice_path, 'rb') as pdf_file:
-                quote.invoice_pdf.save(invoice_filename, File(pdf_file), save=True)
-        except Exception as e:
-            
-            print(f"Failed to generate PDF for quote {quote.quote_no}: {str(e)}")
-            
-            quote.invoice_pdf = None
-            quote.save()
+        queue_render('quote', quote)
+        record_revision(quote.pk, self.request.user)
 
 class QuoteDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Quote.objects.all()
     serializer_class = QuoteSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        if not serializer.instance.revisions.exists():
+            # Quotes from before revisions were kept: keep the version being replaced as revision 1.
+            record_revision(serializer.instance.pk, serializer.instance.created_by)
+        quote = serializer.save()
+        queue_render('quote', quote)
+        record_revision(quote.pk, self.request.user)
+
+class QuoteRevisionListView(generics.ListAPIView):
+    """A quote's revisions, newest first, read in one query on the (quote, number) index."""
+    serializer_class = QuoteRevisionListSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return (
+            QuoteRevision.objects.filter(quote_id=self.kwargs['pk']).order_by('-number')
+            .select_related('created_by').defer('snapshot')
+            .annotate(grand_total=F('snapshot__grand_total'))
+        )
+
+class QuoteRevisionDetailView(generics.RetrieveAPIView):
+    serializer_class = QuoteRevisionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        return get_object_or_404(
+            QuoteRevision.objects.select_related('created_by'), quote_id=self.kwargs['pk'], number=self.kwargs['number'],
+        )
+
+class QuoteRevisionPdfView(APIView):
+    """Redirect to a revision's PDF, rendered once and stored on first request."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk, number):
+        revision = get_object_or_404(QuoteRevision.objects.only('id', 'pdf'), quote_id=pk, number=number)
+        return HttpResponseRedirect(revision_pdf(revision).url)
+
+class QuoteRevisionDiffView(APIView):
+    """Changes between two revisions: ?from=&to= (revision numbers; default the latest against the one before)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        try:
+            to_number = request.query_params.get('to')
+            if to_number is None:
+                to_number = QuoteRevision.objects.filter(quote_id=pk).aggregate(Max('number'))['number__max']
+                if to_number is None:
+                    raise NotFound("This quote has no revisions.")
+            to_number = int(to_number)
+            from_number = int(request.query_params.get('from', to_number - 1))
+        except ValueError:
+            raise ValidationError({"detail": "Revision numbers must be integers."})
+        revisions = {
+            revision.number: revision
+            for revision in QuoteRevision.objects.filter(quote_id=pk, number__in=[from_number, to_number])
+        }
+        missing = [number for number in (from_number, to_number) if number not in revisions]
+        if missing:
+            raise NotFound(f"Revision(s) {missing} of this quote do not exist.")
+        return Response({
+            'from': from_number,
+            'to': to_number,
+            **diff(revisions[from_number].snapshot, revisions[to_number].snapshot),
+        })
+
 
 
-from rest_framework.exceptions import ValidationError
 from django.template.loader import render_to_string
 from django.core.mail import EmailMessage
 
@@ -240,7 +263,8 @@ class OutgoingMailListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
-        company_name = self.request.data.get('company_name')
+        company = serializer.validated_data.get('company')
+        company_name = company.company_name if company else self.request.data.get('company_name')
         mail_subject = self.request.data.get('mail_subject')
         message = self.request.data.get('message')
         quote_no = self.request.data.get('quote_no', '')
@@ -252,35 +276,23 @@ class OutgoingMailListCreateView(generics.ListCreateAPIView):
         if not message:
             raise ValidationError({"message": "This field is required."})
 
-        
-        contact_name = ''
-        contact_number = ''
-        company_email = ''
-        contact_email = ''
         email_status = 'new'  
 
-        try:
-            contact = Contact.objects.get(company_name=company_name)
-            contact_name = contact.contact_name
-            contact_number = contact.contact_number
-            company_email = contact.company_email
-            contact_email = contact.contact_email
-        except Contact.DoesNotExist:
-            
-            pass
-
-        
+        # OutgoingMail.save() copies the contact details and emails from the linked company.
         outgoing_mail = serializer.save(
             created_by=self.request.user,
-            contact_name=contact_name,
-            contact_number=contact_number,
-            company_email=company_email,
-            contact_email=contact_email,
+            company=company or Contact.resolve(company_name),
+            company_name=company_name,
+            contact_name='',
+            contact_number='',
+            company_email='',
+            contact_email='',
             status=email_status  
         )
+        contact_name = outgoing_mail.contact_name
 
         
-        recipient_list = [email for email in [company_email, contact_email] if email]
+        recipient_list = [email for email in [outgoing_mail.company_email, outgoing_mail.contact_email] if email]
         if recipient_list:
             try:
                 
@@ -306,9 +318,9 @@ class OutgoingMailListCreateView(generics.ListCreateAPIView):
                     print(quote_no)
                     try:
                         quote = Quote.objects.get(quote_no=quote_no)
-                        print(quote.invoice_pdf)
-                        if quote.invoice_pdf:
-                            with quote.invoice_pdf.open('rb') as pdf_file:
+                        invoice_pdf = ensure_rendered('quote', quote)
+                        if invoice_pdf:
+                            with invoice_pdf.open('rb') as pdf_file:
                                 email.attach(
                                     f'invoice_{quote_no}.pdf',
                                     pdf_file.read(),
@@ -349,32 +361,207 @@ class OutgoingMailDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 from .models import SalesOrder, JobCard
-from .serializers import SalesOrderSerializer, JobCardSerializer
+from .serializers import SalesOrderSerializer, JobCardSerializer, SalesOrderFulfilmentSerializer
+from django.db.models import Prefetch
+from .conversion import MAX_BATCH_SIZE as MAX_CONVERT_BATCH_SIZE, convert_quote
 
 class SalesOrderListCreateView(generics.ListCreateAPIView):
     serializer_class = SalesOrderSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return SalesOrder.objects.filter(created_by=self.request.user)
+        return (
+            SalesOrder.objects.filter(created_by=self.request.user)
+            .select_related('created_by').prefetch_related('order_services')
+        )
 
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        sales_order = serializer.save(created_by=self.request.user)
+        queue_render('sales_order', sales_order)
 
 class SalesOrderDetailView(generics.RetrieveUpdateAPIView):
     serializer_class = SalesOrderSerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = SalesOrder.objects.all()
 
+    def perform_update(self, serializer):
+        sales_order = serializer.save()
+        queue_render('sales_order', sales_order)
+
+class QuoteConvertView(APIView):
+    """Create a sales order from a quote; the body carries the order fields a quote lacks (lpo_no, address, terms)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        sales_order = convert_quote(pk, request.data, request)
+        queue_render('sales_order', sales_order)
+        return Response(SalesOrderSerializer(sales_order).data, status=status.HTTP_201_CREATED)
+
+class QuoteBatchConvertView(APIView):
+    """
+    Convert many quotes at once: {"quotes": [{"quote": <id>, "lpo_no": ..., ...}], "defaults": {...}}.
+    Each quote is converted in its own transaction, so one bad quote does not hold back the rest.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        items = request.data.get('quotes')
+        defaults = request.data.get('defaults') or {}
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise ValidationError({"quotes": "A list of quotes to convert is required."})
+        if not isinstance(defaults, dict):
+            raise ValidationError({"defaults": "Defaults must be an object."})
+        if not items:
+            raise ValidationError({"quotes": "At least one quote is required."})
+        if len(items) > MAX_CONVERT_BATCH_SIZE:
+            raise ValidationError({"quotes": f"At most {MAX_CONVERT_BATCH_SIZE} quotes can be converted at once."})
+
+        created, errors = [], {}
+        for item in items:
+            quote_id = item.get('quote')
+            try:
+                sales_order = convert_quote(quote_id, {**defaults, **item}, request)
+            except ValidationError as e:
+                errors[str(quote_id)] = e.detail
+                continue
+            queue_render('sales_order', sales_order)
+            created.append(sales_order)
+        return Response(
+            {'created': SalesOrderSerializer(created, many=True).data, 'errors': errors},
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
+class SalesOrderFulfilmentView(generics.ListAPIView):
+    """Sales orders with their job cards and vehicles in three queries; ?status= narrows the orders."""
+    serializer_class = SalesOrderFulfilmentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        orders = SalesOrder.objects.order_by('-created_on').prefetch_related(
+            Prefetch('job_cards', queryset=JobCard.objects.order_by('created_on')),
+            'job_cards__vehicles',
+        )
+        status = self.request.query_params.get('status')
+        if status:
+            if status not in dict(SalesOrder.STATUS_CHOICES):
+                raise ValidationError({"status": "Unknown sales order status."})
+            orders = orders.filter(status=status)
+        return orders
+
 class JobCardListCreateView(generics.ListCreateAPIView):
-    queryset = JobCard.objects.all()
+    queryset = JobCard.objects.prefetch_related('vehicles', 'materials__product', 'materials__removal_item__request')
     serializer_class = JobCardSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        job_card = serializer.save(created_by=self.request.user)
+        queue_render('job_card', job_card)
 
 class JobCardDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = JobCard.objects.all()
     serializer_class = JobCardSerializer
-    permission_classes = [permissions.IsAuthenticated]
\ No newline at end of file
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_update(self, serializer):
+        job_card = serializer.save()
+        queue_render('job_card', job_card)
+
+from .customers import MAX_BATCH_SIZE, customer_summaries, customer_summary
+
+
+class CustomerSummaryView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        contact = get_object_or_404(Contact, pk=pk)
+        return Response(customer_summary(contact))
+
+
+class CustomerSummaryBatchView(APIView):
+    """Summaries for many contacts at once: ?ids=1,2,3 or a POSTed {"ids": [...]}."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        ids = [value for value in request.query_params.get('ids', '').split(',') if value]
+        return self.summarize(ids)
+
+    def post(self, request):
+        ids = request.data.get('ids')
+        if not isinstance(ids, list):
+            raise ValidationError({"ids": "A list of contact ids is required."})
+        return self.summarize(ids)
+
+    def summarize(self, ids):
+        try:
+            ids = list(dict.fromkeys(int(value) for value in ids))
+        except (TypeError, ValueError):
+            raise ValidationError({"ids": "Contact ids must be integers."})
+        if not ids:
+            raise ValidationError({"ids": "At least one contact id is required."})
+        if len(ids) > MAX_BATCH_SIZE:
+            raise ValidationError({"ids": f"At most {MAX_BATCH_SIZE} contacts can be summarized at once."})
+
+        contacts = Contact.objects.in_bulk(ids)
+        summaries = customer_summaries(contacts[pk] for pk in ids if pk in contacts)
+        return Response({
+            'results': list(summaries.values()),
+            'missing': [pk for pk in ids if pk not in contacts],
+        })
+
+
+from datetime import date
+from django.utils import timezone
+from .models import PipelineRollup
+from .rollups import pipeline_report
+
+
+class PipelineAnalyticsView(APIView):
+    """Conversion rates, quote value by status and per-user figures from the pipeline rollups."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        period = request.query_params.get('period', 'month')
+        if period not in dict(PipelineRollup.PERIOD_CHOICES):
+            raise ValidationError({"period": "Period must be 'day' or 'month'."})
+
+        today = timezone.localdate()
+        try:
+            end = date.fromisoformat(request.query_params.get('end', today.isoformat()))
+            start = request.query_params.get('start')
+            start = date.fromisoformat(start) if start else end.replace(year=end.year - 1, day=1)
+        except ValueError:
+            raise ValidationError({"detail": "Dates must be in YYYY-MM-DD format."})
+        if period == 'month':
+            start = start.replace(day=1)
+
+        return Response(pipeline_report(period, start, end))
+
+
+from .materials import job_card_costs, sales_order_profitability
+
+
+class JobCardCostView(APIView):
+    """Material cost consumed so far and still pending for one job card."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        job_card = get_object_or_404(JobCard, pk=pk)
+        return Response({'id': job_card.pk, 'job_card_no': job_card.job_card_no, **job_card_costs([job_card.pk])[job_card.pk]})
+
+
+class JobProfitabilityView(APIView):
+    """Revenue against job card material cost per sales order created between ?start= and ?end= (YYYY-MM-DD)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        orders = SalesOrder.objects.order_by('-created_on')
+        try:
+            start = request.query_params.get('start')
+            end = request.query_params.get('end')
+            if start:
+                orders = orders.filter(created_on__date__gte=date.fromisoformat(start))
+            if end:
+                orders = orders.filter(created_on__date__lte=date.fromisoformat(end))
+        except ValueError:
+            raise ValidationError({"detail": "Dates must be in YYYY-MM-DD format."})
+        return Response(list(sales_order_profitability(orders)))
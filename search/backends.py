@@ -0,0 +1,97 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import SearchDocument
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERMS = 10
+SNIPPET_WORDS = 16
+
+DOCUMENT_TABLE = 'search_searchdocument'
+FTS_TABLE = 'search_searchdocument_fts'
+# PostgreSQL matches against this expression; migration 0002 builds a GIN index on exactly it.
+PG_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(body, '')), 'B')"
+)
+
+
+def query_terms(text):
+    return TERM_RE.findall(text or '')[:MAX_TERMS]
+
+
+def _sqlite_search(terms, kind, limit, offset):
+    # Every term must match, each as a prefix; terms are \w+ so quoting is enough.
+    match = ' '.join(f'"{term}"*' for term in terms)
+    where = f"{FTS_TABLE} MATCH %s"
+    params = [match]
+    if kind:
+        where += " AND d.kind = %s"
+        params.append(kind)
+    from_clause = f"FROM {FTS_TABLE} JOIN {DOCUMENT_TABLE} d ON d.id = {FTS_TABLE}.rowid WHERE {where}"
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) {from_clause}", params)
+        count = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT d.kind, d.object_id, d.title, "
+            f"snippet({FTS_TABLE}, 1, '', '', '…', {SNIPPET_WORDS}), "
+            f"bm25({FTS_TABLE}, 5.0, 1.0) AS rank "
+            f"{from_clause} ORDER BY rank LIMIT %s OFFSET %s",
+            params + [limit, offset],
+        )
+        # bm25 is lower-is-better; flip it so callers always see higher-is-better.
+        rows = [(kind_, object_id, title, snippet, -rank) for kind_, object_id, title, snippet, rank in cursor.fetchall()]
+    return count, rows
+
+
+def _postgresql_search(terms, kind, limit, offset):
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    where = f"({PG_VECTOR}) @@ to_tsquery('simple', %s)"
+    params = [tsquery]
+    if kind:
+        where += " AND kind = %s"
+        params.append(kind)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {DOCUMENT_TABLE} WHERE {where}", params)
+        count = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT kind, object_id, title, "
+            f"ts_headline('simple', body, to_tsquery('simple', %s), "
+            f"'StartSel=\"\", StopSel=\"\", MaxWords={SNIPPET_WORDS}, MinWords=5'), rank FROM ("
+            f"SELECT kind, object_id, title, body, ts_rank_cd({PG_VECTOR}, to_tsquery('simple', %s)) AS rank "
+            f"FROM {DOCUMENT_TABLE} WHERE {where} ORDER BY rank DESC LIMIT %s OFFSET %s"
+            f") ranked ORDER BY rank DESC",
+            [tsquery, tsquery] + params + [limit, offset],
+        )
+        rows = cursor.fetchall()
+    return count, rows
+
+
+def _fallback_search(terms, kind, limit, offset):
+    queryset = SearchDocument.objects.all()
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    if kind:
+        queryset = queryset.filter(kind=kind)
+    rows = [
+        (doc.kind, doc.object_id, doc.title, doc.body[:200], 0.0)
+        for doc in queryset.order_by('-updated_on')[offset:offset + limit]
+    ]
+    return queryset.count(), rows
+
+
+BACKENDS = {
+    'sqlite': _sqlite_search,
+    'postgresql': _postgresql_search,
+}
+
+
+def search(text, kind=None, limit=20, offset=0):
+    """Ranked matches for `text` as (total count, [(kind, object_id, title, snippet, rank), ...])."""
+    terms = query_terms(text)
+    if not terms:
+        return 0, []
+    backend = BACKENDS.get(connection.vendor, _fallback_search)
+    return backend(terms, kind, limit, offset)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from search.sources import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Re-index all contacts, inquiries, quotes and outgoing mails for full-text search."
+
+    def handle(self, *args, **options):
+        total = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} objects."))
@@ -0,0 +1,32 @@
+from django.db import models
+from django.utils import timezone
+
+
+class SearchDocument(models.Model):
+    """
+    The searchable text of one contact, inquiry, quote or outgoing mail.
+
+    The full-text index itself lives outside the ORM: an FTS5 table kept in
+    step by triggers on SQLite, a GIN expression index on PostgreSQL (see
+    migration 0002 and search.backends).
+    """
+    KIND_CHOICES = [
+        ('contact', 'Contact'),
+        ('inquiry', 'Inquiry'),
+        ('quote', 'Quote'),
+        ('outgoing_mail', 'Outgoing Mail'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    updated_on = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_document_unique_object'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title}"
@@ -0,0 +1,45 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from sales.models import Contact, QuoteProduct
+
+from .sources import KIND_FOR_MODEL, index_objects
+
+# Indexing waits for the commit so nested lines written after the parent
+# (e.g. quote products synced in bulk) are part of the indexed text.
+
+
+def queue_index(kind, pks):
+    pks = list(pks)
+    if pks:
+        transaction.on_commit(partial(index_objects, kind, pks))
+
+
+def index_search_source(sender, instance, raw=False, **kwargs):
+    if not raw:
+        queue_index(KIND_FOR_MODEL[sender], [instance.pk])
+
+
+for model in KIND_FOR_MODEL:
+    post_save.connect(index_search_source, sender=model)
+    post_delete.connect(index_search_source, sender=model)
+
+
+@receiver(post_save, sender=QuoteProduct)
+@receiver(post_delete, sender=QuoteProduct)
+def index_quote_for_product(sender, instance, raw=False, **kwargs):
+    if not raw:
+        queue_index('quote', [instance.quote_id])
+
+
+@receiver(post_save, sender=Contact)
+def index_documents_for_contact(sender, instance, created, raw=False, **kwargs):
+    # Contact.save() rewrites the company details on linked documents with a bulk update.
+    if created or raw:
+        return
+    queue_index('inquiry', instance.inquiries.values_list('pk', flat=True))
+    queue_index('quote', instance.quotes.values_list('pk', flat=True))
+    queue_index('outgoing_mail', instance.outgoing_mails.values_list('pk', flat=True))
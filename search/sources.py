@@ -0,0 +1,69 @@
+from django.utils import timezone
+
+from sales.models import Contact, Inquiry, OutgoingMail, Quote
+
+from .models import SearchDocument
+
+
+def _join(*parts):
+    return "\n".join(str(part) for part in parts if part)
+
+
+def contact_text(contact):
+    return contact.company_name, _join(
+        contact.contact_name, contact.company_email, contact.contact_email, contact.company_number,
+        contact.contact_number, contact.license_number, contact.tirn_number,
+    )
+
+
+def inquiry_text(inquiry):
+    return inquiry.company_name, _join(inquiry.contact_name, inquiry.inquiry)
+
+
+def quote_text(quote):
+    products = [_join(p.product, p.specification) for p in quote.products.all()]
+    return f"{quote.quote_title} ({quote.quote_no})", _join(
+        quote.company_name, quote.contact_name, quote.notes_remarks, *products,
+    )
+
+
+def outgoing_mail_text(mail):
+    return mail.mail_subject, _join(mail.company_name, mail.contact_name, mail.message)
+
+
+# kind: (model, text builder, related objects to prefetch)
+SOURCES = {
+    'contact': (Contact, contact_text, ()),
+    'inquiry': (Inquiry, inquiry_text, ()),
+    'quote': (Quote, quote_text, ('products',)),
+    'outgoing_mail': (OutgoingMail, outgoing_mail_text, ()),
+}
+KIND_FOR_MODEL = {model: kind for kind, (model, _, _) in SOURCES.items()}
+
+
+def index_objects(kind, pks):
+    """Write (or drop, for deleted rows) the search documents for these objects."""
+    model, build_text, prefetch = SOURCES[kind]
+    pks = set(pks)
+    found = set()
+    for obj in model.objects.filter(pk__in=pks).prefetch_related(*prefetch):
+        title, body = build_text(obj)
+        SearchDocument.objects.update_or_create(
+            kind=kind, object_id=obj.pk,
+            defaults={'title': title[:255], 'body': body, 'updated_on': timezone.now()},
+        )
+        found.add(obj.pk)
+    if pks - found:
+        SearchDocument.objects.filter(kind=kind, object_id__in=pks - found).delete()
+
+
+def rebuild_index(batch_size=500):
+    """Re-index every source object and drop documents whose object is gone."""
+    total = 0
+    for kind, (model, _, _) in SOURCES.items():
+        pks = list(model.objects.values_list('pk', flat=True))
+        for start in range(0, len(pks), batch_size):
+            index_objects(kind, pks[start:start + batch_size])
+        SearchDocument.objects.filter(kind=kind).exclude(object_id__in=model.objects.values('pk')).delete()
+        total += len(pks)
+    return total
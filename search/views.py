@@ -0,0 +1,39 @@
+from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .backends import search
+from .models import SearchDocument
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+
+
+class SearchView(APIView):
+    """Ranked full-text search: ?q=<text>[&kind=quote][&page=2][&page_size=20]."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({"q": "A search query is required."})
+        kind = request.query_params.get('kind') or None
+        if kind and kind not in dict(SearchDocument.KIND_CHOICES):
+            raise ValidationError({"kind": f"Kind must be one of: {', '.join(dict(SearchDocument.KIND_CHOICES))}."})
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            raise ValidationError({"detail": "page and page_size must be integers."})
+
+        count, rows = search(text, kind=kind, limit=page_size, offset=(page - 1) * page_size)
+        return Response({
+            'count': count,
+            'page': page,
+            'page_size': page_size,
+            'results': [
+                {'kind': kind_, 'id': object_id, 'title': title, 'snippet': snippet, 'rank': rank}
+                for kind_, object_id, title, snippet, rank in rows
+            ],
+        })